@@ -1,17 +1,20 @@
 from django.contrib import admin
 
-from app.models import Client, Appointment
+from app.admin_pagination import KeysetPaginationMixin
+from app.models import Appointment, ArchivedAppointment, Broadcast, Client
 
 
-class ClientAdmin(admin.ModelAdmin):
+# Фильтры по всем значениям колонки (SELECT DISTINCT по всей таблице) на больших таблицах не используются,
+# поиск по этим колонкам доступен в search_fields.
+class ClientAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ('telegram_chat_id', 'name', 'surname', 'phone')
-    list_filter = ('telegram_chat_id', 'name', 'surname')
     search_fields = ['telegram_chat_id', 'name', 'surname', 'phone']
 
 
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ('client_id', 'client_name', 'client_surname',  'date', 'time', 'pet_type')
-    list_filter = ('date', 'time', 'pet_type')
+    list_filter = ('date',)
+    list_select_related = ('client',)
     search_fields = ['client__name', 'client__surname', 'client__phone', 'date', 'time', 'pet_type']
 
     def client_name(self, obj):
@@ -23,6 +26,50 @@ class AppointmentAdmin(admin.ModelAdmin):
     client_name.admin_order_field = 'client__name'
     client_surname.admin_order_field = 'client__surname'
 
+    def get_queryset(self, request):
+        # черновики в процессе оформления в списке не показываются
+        return super().get_queryset(request).filter(status=Appointment.STATUS_CONFIRMED)
+
+
+class ArchivedAppointmentAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    # история прошедших приемов только для просмотра: записи переносятся в архив фоновой задачей бота
+    list_display = ('client_id', 'date', 'time', 'pet_type', 'archived_at')
+    list_filter = ('date',)
+    search_fields = ['client__telegram_chat_id', 'pet_type']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class BroadcastAdmin(admin.ModelAdmin):
+    # рассылку выполняет бот: созданная рассылка подхватывается в течение BROADCAST_POLL_INTERVAL
+    list_display = ('id', 'short_text', 'status', 'sent', 'failed', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    fields = ('text', 'status', 'sent', 'failed', 'created_at', 'started_at', 'finished_at')
+    readonly_fields = ('status', 'sent', 'failed', 'created_at', 'started_at', 'finished_at')
+    actions = ('cancel',)
+
+    def short_text(self, obj):
+        return obj.text[:50]
+
+    def get_readonly_fields(self, request, obj=None):
+        # текст начатой рассылки не меняется, иначе клиенты получат разные объявления
+        if obj is not None:
+            return ('text',) + self.readonly_fields
+        return self.readonly_fields
+
+    @admin.action(description='Отменить выбранные рассылки')
+    def cancel(self, request, queryset):
+        # выполняющаяся рассылка останавливается на ближайшей контрольной точке
+        cancelled = queryset.filter(status__in=[Broadcast.STATUS_PENDING, Broadcast.STATUS_RUNNING]).update(
+            status=Broadcast.STATUS_CANCELLED, locked_until=None)
+        self.message_user(request, f'Отменено рассылок: {cancelled}')
+
 
 admin.site.register(Client, ClientAdmin)
 admin.site.register(Appointment, AppointmentAdmin)
+admin.site.register(ArchivedAppointment, ArchivedAppointmentAdmin)
+admin.site.register(Broadcast, BroadcastAdmin)
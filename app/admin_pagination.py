@@ -0,0 +1,128 @@
+import json
+from typing import Optional
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+AFTER_VAR = 'after'  # id последней записи предыдущей страницы
+BEFORE_VAR = 'before'  # id первой записи следующей страницы
+KEYSET_VARS = (AFTER_VAR, BEFORE_VAR)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает все строки большой таблицы.
+    На PostgreSQL количество берется из оценки планировщика (EXPLAIN), если она больше COUNT_LIMIT,
+    на остальных БД количество считается до COUNT_LIMIT.
+    """
+
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def estimated(self) -> bool:
+        """Признак приблизительного количества: COUNT_LIMIT или больше."""
+        return self.count >= self.COUNT_LIMIT
+
+    def _planner_estimate(self) -> Optional[int]:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._planner_estimate()
+        if estimate is not None and estimate > self.COUNT_LIMIT:
+            return estimate
+        # SELECT COUNT(*) FROM (... LIMIT COUNT_LIMIT): стоимость не растет вместе с таблицей
+        return self.object_list[:self.COUNT_LIMIT].count()
+
+
+class KeysetChangeList(ChangeList):
+    """Список объектов админки с постраничным переходом по id (keyset) вместо OFFSET.
+    Используется при сортировке по убыванию id (по умолчанию), при сортировке по другим колонкам
+    список работает как обычно.
+    """
+
+    def __init__(self, request, *args, **kwargs) -> None:
+        self.after = self._keyset_value(request, AFTER_VAR)
+        self.before = self._keyset_value(request, BEFORE_VAR)
+        self.next_after: Optional[int] = None
+        self.previous_before: Optional[int] = None
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def _keyset_value(request, name: str) -> Optional[int]:
+        try:
+            return int(request.GET[name])
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def is_keyset(self) -> bool:
+        return tuple(self.queryset.query.order_by) in (('-pk',), ('-id',))
+
+    def get_filters_params(self, params=None) -> dict:
+        lookup_params = super().get_filters_params(params)
+        for name in KEYSET_VARS:
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None) -> str:
+        # ссылки фильтров и сортировки ведут на первую страницу
+        remove = [*(remove or []), *(name for name in KEYSET_VARS if name not in (new_params or {}))]
+        return super().get_query_string(new_params, remove)
+
+    @property
+    def next_url(self) -> str:
+        return self.get_query_string({AFTER_VAR: self.next_after})
+
+    @property
+    def previous_url(self) -> str:
+        return self.get_query_string({BEFORE_VAR: self.previous_before})
+
+    def get_results(self, request) -> None:
+        if not self.is_keyset:
+            super().get_results(request)
+            return
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        if self.before is not None:
+            rows = list(self.queryset.filter(pk__gt=self.before).order_by('pk')[:self.list_per_page + 1])
+            has_previous, has_next = len(rows) > self.list_per_page, True
+            rows = rows[:self.list_per_page][::-1]
+        else:
+            queryset = self.queryset if self.after is None else self.queryset.filter(pk__lt=self.after)
+            rows = list(queryset[:self.list_per_page + 1])
+            has_previous, has_next = self.after is not None, len(rows) > self.list_per_page
+            rows = rows[:self.list_per_page]
+
+        self.next_after = rows[-1].pk if has_next and rows else None
+        self.previous_before = rows[0].pk if has_previous and rows else None
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_previous or has_next
+        self.paginator = paginator
+
+
+class KeysetPaginationMixin(object):
+    """Примесь ModelAdmin: keyset-пагинация списка и оценка количества строк без COUNT(*) по всей таблице."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -1,5 +0,0 @@
-import os
-import django
-
-os.environ['DJANGO_SETTINGS_MODULE'] = 'main.settings'
-django.setup()
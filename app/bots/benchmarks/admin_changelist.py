@@ -0,0 +1,88 @@
+"""Бенчмарк списка записей на прием в админке.
+
+Сравнивает прежнюю конфигурацию AppointmentAdmin (COUNT(*) и OFFSET стандартного пагинатора, запрос клиента
+на каждую строку, фильтры по всем значениям колонок) с текущей (оценка количества, keyset-пагинация по id,
+клиенты в том же запросе) на первой странице и на странице из середины списка по мере роста таблицы.
+
+Запуск: python -m app.bots.benchmarks.admin_changelist --sizes 1000 10000 100000
+"""
+import argparse
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from app.admin import AppointmentAdmin
+from app.bots.benchmarks.common import benchmark_database, measure
+from app.models import Appointment, Client
+
+
+CLIENTS_PER_APPOINTMENTS = 10  # одна запись клиента на столько записей на прием
+
+
+class LegacyAppointmentAdmin(admin.ModelAdmin):
+    """Конфигурация AppointmentAdmin до оптимизации."""
+    list_display = ('client_id', 'client_name', 'client_surname', 'date', 'time', 'pet_type')
+    list_filter = ('date', 'time', 'pet_type')
+
+    def client_name(self, obj):
+        return obj.client.name
+
+    def client_surname(self, obj):
+        return obj.client.surname
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(status=Appointment.STATUS_CONFIRMED)
+
+
+def fill(size: int) -> None:
+    """Дополнение таблиц до заданного количества записей на прием."""
+    existing = Appointment.objects.count()
+    clients = range(existing // CLIENTS_PER_APPOINTMENTS, size // CLIENTS_PER_APPOINTMENTS + 1)
+    Client.objects.bulk_create(
+        [Client(telegram_chat_id=i, name='Bench', surname='Bench', phone='12345678901') for i in clients],
+        batch_size=5000, ignore_conflicts=True)
+    Appointment.objects.bulk_create(
+        [Appointment(client_id=i // CLIENTS_PER_APPOINTMENTS, date='2030-01-01', time='10:00', pet_type='Кошка',
+                     status=Appointment.STATUS_CONFIRMED) for i in range(existing, size)],
+        batch_size=5000)
+
+
+def run(sizes: list[int], repeat: int) -> None:
+    factory = RequestFactory()
+    with benchmark_database(file_based=True):
+        user = User.objects.create_superuser('bench', 'bench@example.com', 'bench')
+        legacy = LegacyAppointmentAdmin(Appointment, admin.site)
+        current = AppointmentAdmin(Appointment, admin.site)
+
+        def page(model_admin: admin.ModelAdmin, params: dict) -> int:
+            request = factory.get('/admin/app/appointment/', params)
+            request.user = user
+            with CaptureQueriesContext(connection) as queries:
+                model_admin.changelist_view(request).render()
+            return len(queries)
+
+        print(f'{"rows":>8} {"page":>7} {"legacy, ms":>11} {"queries":>8} {"keyset, ms":>11} {"queries":>8}')
+        for size in sizes:
+            fill(size)
+            middle_id = Appointment.objects.order_by('-id').values_list('id', flat=True)[size // 2]
+            middle_page = size // 2 // current.list_per_page + 1
+            for name, legacy_params, current_params in (
+                    ('first', {}, {}),
+                    ('middle', {'p': middle_page}, {'after': middle_id}),
+            ):
+                legacy_ms = measure(lambda: page(legacy, legacy_params), repeat)
+                current_ms = measure(lambda: page(current, current_params), repeat)
+                print(f'{size:>8} {name:>7} {legacy_ms:>11.2f} {page(legacy, legacy_params):>8} '
+                      f'{current_ms:>11.2f} {page(current, current_params):>8}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,100 @@
+"""Бенчмарк переноса прошедших записей на прием в архив.
+
+Заполняет временную БД оформленными записями, равномерно распределенными по последним --years годам
+и ближайшей неделе, измеряет запросы к рабочей таблице, переносит в архив записи старше --after-days
+(AppointmentRepository.archive) и повторяет измерения. Выводится скорость переноса (записей в секунду)
+и медианное время запросов до и после переноса:
+- applist – записи клиента для /applist;
+- reminders – пачка записей, для которых нужно поставить напоминания;
+- occupancy – занятость слотов на ближайшую неделю;
+- count – количество оформленных записей (счетчик админки без ограничения).
+
+Запуск: python -m app.bots.benchmarks.archive --rows 500000 --years 5
+"""
+import argparse
+import datetime
+from time import perf_counter
+from typing import Iterator
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+
+from app.bots.benchmarks.common import benchmark_database, measure
+from app.bots.tail_trust.repository import AppointmentRepository
+from app.models import Appointment, ArchivedAppointment, Client
+from main.settings import SLOT_HOLD_TTL
+
+
+CLIENTS = 1000
+BATCH_SIZE = 10000
+HOURS = (10, 11, 12, 14, 15, 16, 17, 18)
+
+
+def fill(rows: int, years: int) -> None:
+    """Заполнение БД оформленными записями на прием за последние years лет и ближайшую неделю."""
+    Client.objects.bulk_create(
+        [Client(telegram_chat_id=i, name='Bench', surname='Bench', phone='12345678901') for i in range(1, CLIENTS + 1)])
+    first_day = timezone.localdate() - datetime.timedelta(days=years * 365)
+    days = years * 365 + 7
+
+    def appointments() -> Iterator[Appointment]:
+        for i in range(rows):
+            yield Appointment(client_id=i % CLIENTS + 1, date=first_day + datetime.timedelta(days=i * days // rows),
+                              time=datetime.time(HOURS[i % len(HOURS)]), pet_type='Кошка',
+                              status=Appointment.STATUS_CONFIRMED)
+
+    batch = []
+    for appointment in appointments():
+        batch.append(appointment)
+        if len(batch) == BATCH_SIZE:
+            Appointment.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Appointment.objects.bulk_create(batch)
+
+
+def measure_queries(repeat: int) -> dict:
+    today = timezone.localdate()
+    now = timezone.localtime()
+    get_client_appointments = async_to_sync(AppointmentRepository.get_client_appointments)
+    get_pending_reminder_ids = async_to_sync(AppointmentRepository.get_pending_reminder_ids)
+    get_occupancy = async_to_sync(AppointmentRepository.get_occupancy)
+    confirmed = Appointment.objects.filter(status=Appointment.STATUS_CONFIRMED)
+    hold = datetime.timedelta(seconds=SLOT_HOLD_TTL)
+    return {
+        'applist': measure(lambda: get_client_appointments(CLIENTS // 2), repeat),
+        'reminders': measure(lambda: get_pending_reminder_ids(now, 0, 500), repeat),
+        'occupancy': measure(lambda: get_occupancy(today, today + datetime.timedelta(days=7), hold), repeat),
+        'count': measure(confirmed.count, repeat),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    archive = async_to_sync(AppointmentRepository.archive)
+
+    with benchmark_database():
+        fill(args.rows, args.years)
+        before = measure_queries(args.repeat)
+
+        started = perf_counter()
+        archived = archive(timezone.localdate() - datetime.timedelta(days=args.after_days), args.batch_size)
+        duration = perf_counter() - started
+        after = measure_queries(args.repeat)
+
+        print(f'rows: {args.rows}, archived: {archived}, remaining: {Appointment.objects.count()}, '
+              f'archive table: {ArchivedAppointment.objects.count()}')
+        print(f'archive: {duration:.2f}s, {archived / duration:.0f} rows/s (batch size {args.batch_size})\n')
+        print(f'{"query":>10} {"before, ms":>11} {"after, ms":>10} {"speedup":>8}')
+        for name in before:
+            print(f'{name:>10} {before[name]:>11.3f} {after[name]:>10.3f} {before[name] / after[name]:>8.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000, help='количество записей на прием')
+    parser.add_argument('--years', type=int, default=5, help='глубина истории в годах')
+    parser.add_argument('--after-days', type=int, default=180, help='возраст записи в днях для переноса в архив')
+    parser.add_argument('--batch-size', type=int, default=1000, help='количество записей в одной транзакции')
+    parser.add_argument('--repeat', type=int, default=20)
+    run(parser.parse_args())
@@ -0,0 +1,115 @@
+"""Бенчмарк рассылки объявлений.
+
+Заполняет временную БД клиентами (по умолчанию 100 000) и выполняет рассылку BroadcastRunner через FakeBot
+без лимитов исходящих сообщений, то есть измеряется чтение получателей, параллельная отправка и сохранение
+контрольных точек с результатами доставки, а не лимиты Telegram. Рассылка прерывается после --interrupt
+получателей и продолжается с контрольной точки, как после перезапуска бота; проверяется, что каждый клиент
+получил объявление и повторно отправлено не больше одной пачки.
+
+Пиковая память (tracemalloc) не должна расти с количеством клиентов: в памяти находится одна пачка.
+
+Запуск: python -m app.bots.benchmarks.broadcast --clients 100000
+"""
+import argparse
+import asyncio
+import tracemalloc
+from time import perf_counter
+from typing import Iterator
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+
+from app.bots.benchmarks.common import benchmark_database
+from app.bots.benchmarks.fake_bot import FakeBot
+from app.bots.lib.sender import OutboundSender
+from app.bots.tail_trust.broadcasts import BroadcastRunner
+from app.models import Broadcast, BroadcastDelivery, Client
+
+
+BATCH_SIZE = 10000
+MB = 1024 * 1024
+
+
+def fill(clients: int) -> None:
+    """Заполнение БД зарегистрированными клиентами."""
+    def rows() -> Iterator[Client]:
+        for i in range(1, clients + 1):
+            yield Client(telegram_chat_id=i, name='Bench', surname='Bench', phone='12345678901')
+
+    batch = []
+    for client in rows():
+        batch.append(client)
+        if len(batch) == BATCH_SIZE:
+            Client.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Client.objects.bulk_create(batch)
+
+
+async def run_broadcast(broadcast_id: int, args: argparse.Namespace) -> int:
+    """Рассылка с прерыванием и продолжением.
+
+    Returns:
+        Количество отправленных сообщений с учетом повторно отправленных после прерывания.
+    """
+    bot = FakeBot(latency=args.latency)
+    sender = OutboundSender(bot, global_rate=10 ** 6, chat_rate=10 ** 6, chat_burst=10 ** 6, max_retries=0)
+    sent = 0
+
+    async def send_message(chat_id: int, text: str) -> None:
+        nonlocal sent
+        if sent >= args.interrupt:
+            raise asyncio.CancelledError()  # имитация остановки процесса посреди пачки
+        sent += 1
+        await sender.send_message(chat_id, text)
+        bot.calls.clear()  # журнал FakeBot не должен влиять на измерение памяти
+        bot.replies.clear()
+
+    runner = BroadcastRunner(send_message=send_message, concurrency=args.concurrency, chunk_size=args.chunk_size,
+                             lease=60, poll_interval=0, worker_id='benchmark')
+    try:
+        await runner.run_once(broadcast_id)
+    except asyncio.CancelledError:
+        pass
+    args.interrupt = float('inf')
+    await runner.run_once(broadcast_id)
+    await bot.close()
+    return sent
+
+
+def run(args: argparse.Namespace) -> None:
+    with benchmark_database(file_based=True):
+        fill(args.clients)
+        broadcast_id = Broadcast.objects.create(text='Клиника не работает 1 января').id
+
+        tracemalloc.start()
+        started = perf_counter()
+        sent = asyncio.run(run_broadcast(broadcast_id, args))
+        duration = perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report(broadcast_id, sent, duration, peak, args)
+
+
+def report(broadcast_id: int, sent: int, duration: float, peak: int, args: argparse.Namespace) -> None:
+    broadcast = Broadcast.objects.get(id=broadcast_id)
+    delivered = BroadcastDelivery.objects.filter(broadcast_id=broadcast_id).count()
+    print(f'clients: {args.clients}, chunk size: {args.chunk_size}, concurrency: {args.concurrency}')
+    print(f'status: {broadcast.status}, sent: {broadcast.sent}, deliveries: {delivered}, '
+          f'resent after interruption: {sent - args.clients}')
+    print(f'duration: {duration:.2f}s, throughput: {sent / duration:.1f} msg/s, peak memory: {peak / MB:.1f} MB')
+    assert broadcast.status == Broadcast.STATUS_DONE and delivered == args.clients
+    assert sent - args.clients <= args.chunk_size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=100000, help='количество клиентов')
+    parser.add_argument('--chunk-size', type=int, default=500, help='количество получателей между контрольными точками')
+    parser.add_argument('--concurrency', type=int, default=50, help='максимальное количество одновременных отправок')
+    parser.add_argument('--interrupt', type=int, default=None,
+                        help='количество отправок до прерывания, по умолчанию половина клиентов плюс полпачки')
+    parser.add_argument('--latency', type=float, default=0.0, help='имитируемая задержка Bot API в секундах')
+    arguments = parser.parse_args()
+    if arguments.interrupt is None:
+        arguments.interrupt = arguments.clients // 2 + arguments.chunk_size // 2
+    run(arguments)
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+from statistics import median
+from time import perf_counter
+from typing import Callable, Iterator
+
+from django.db import connection
+
+from app.bots.lib.sender import OutboundSender
+
+
+@contextmanager
+def benchmark_database(file_based: bool = False) -> Iterator[None]:
+    """Контекстный менеджер, создающий временную тестовую БД для текущих настроек.
+    Бенчмарки не затрагивают рабочую БД: тестовая база удаляется по завершении.
+
+    Args:
+        file_based: для SQLite создавать базу в файле, а не в памяти. Нужно бенчмаркам, обращающимся к БД
+            из нескольких потоков: общая база в памяти блокирует таблицы целиком.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if file_based and connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'benchmark_{os.getpid()}.db')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func: Callable[[], object], repeat: int = 50) -> float:
+    """Измерение медианного времени выполнения функции.
+
+    Args:
+        func: измеряемая функция без аргументов.
+        repeat: количество повторов.
+
+    Returns:
+        Медианное время одного вызова в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        timings.append((perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def disable_send_limits(bot) -> None:
+    """Снятие лимитов исходящих сообщений бота, чтобы бенчмарк измерял обработку обновлений, а не лимиты Telegram.
+
+    Args:
+        bot: экземпляр BotBase.
+    """
+    bot.sender = OutboundSender(bot.bot, global_rate=10 ** 6, chat_rate=10 ** 6, chat_burst=10 ** 6,
+                                max_retries=bot.sender.max_retries)
+
+
+def cancel_pending_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """Отмена фоновых задач бота (например, рассылки напоминаний), запущенных в цикле событий.
+
+    Args:
+        loop: цикл событий бенчмарка.
+    """
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
@@ -0,0 +1,62 @@
+import asyncio
+import random
+from typing import Dict, List, Optional, Union
+
+from aiogram import Bot
+from aiogram.utils.exceptions import RetryAfter
+
+
+class FakeBot(Bot):
+    """Бот без обращения к Telegram Bot API для бенчмарков и нагрузочных тестов.
+    Все запросы записываются в calls, на sendMessage возвращается правдоподобное сообщение.
+    Задержка ответа API и ответы RetryAfter имитируются по параметрам.
+    """
+
+    TOKEN = '123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi'
+
+    def __init__(
+            self,
+            latency: float = 0.0,
+            retry_after_rate: float = 0.0,
+            retry_after: int = 1,
+            seed: Optional[int] = None,
+            **kwargs,
+    ) -> None:
+        """Инициализация бота.
+
+        Args:
+            latency: имитируемая задержка ответа API в секундах.
+            retry_after_rate: доля запросов sendMessage, на которые API отвечает RetryAfter.
+            retry_after: время ожидания в секундах, сообщаемое в RetryAfter.
+            seed: начальное значение генератора случайных чисел для воспроизводимости.
+            kwargs: дополнительные параметры Bot.
+        """
+        super().__init__(token=self.TOKEN, **kwargs)
+        self.latency = latency
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.calls: List[tuple] = []
+        self.replies: Dict[int, dict] = {}  # идентификатор чата -> параметры последнего отправленного сообщения
+        self.retry_after_count = 0
+        self._random = random.Random(seed)
+
+    async def request(self, method: str, data: Optional[Dict] = None, files: Optional[Dict] = None,
+                      **kwargs) -> Union[List, Dict, bool]:
+        data = dict(data or {})
+        self.calls.append((method, data))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method != 'sendMessage':
+            return True
+
+        if self.retry_after_rate and self._random.random() < self.retry_after_rate:
+            self.retry_after_count += 1
+            raise RetryAfter(self.retry_after)
+        chat_id = int(data['chat_id'])
+        self.replies[chat_id] = data
+        return {
+            'message_id': len(self.calls),
+            'date': 0,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': data.get('text'),
+        }
@@ -0,0 +1,80 @@
+"""Бенчмарк пропускной способности обработчиков при одновременной работе многих чатов.
+
+Каждый обработчик повторяет запросы типичного шага диалога: чтение профиля клиента, обновление поля
+и чтение списка записей. Сравниваются два способа выполнения запросов из асинхронного кода:
+- sync_to_async — прежний способ (и асинхронные методы ORM Django 4.2), все запросы в одном потоке;
+- DatabaseExecutor — пул потоков слоя репозиториев.
+Опция --db-latency добавляет к каждому запросу задержку, имитирующую сетевую БД (например, PostgreSQL).
+
+Запуск: python -m app.bots.benchmarks.handler_throughput --chats 500 --db-latency 0.002
+"""
+import argparse
+import asyncio
+import time
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from asgiref.sync import sync_to_async
+
+from app.bots.benchmarks.common import benchmark_database
+from app.bots.lib.db import DatabaseExecutor
+from app.models import Appointment, Client
+
+
+Runner = Callable[..., Awaitable[Any]]
+
+
+def make_query(func: Callable[..., Any], latency: float) -> Callable[..., Any]:
+    def query(*args, **kwargs) -> Any:
+        if latency:
+            time.sleep(latency)
+        return func(*args, **kwargs)
+    return query
+
+
+async def handler(run: Runner, chat_id: int, latency: float) -> None:
+    await run(make_query(Client.objects.filter(telegram_chat_id=chat_id).first, latency))
+    await run(make_query(Client.objects.filter(telegram_chat_id=chat_id).update, latency), name='Bench')
+    await run(make_query(list, latency), Appointment.objects.filter(client_id=chat_id).order_by('-id'))
+
+
+async def measure_throughput(run: Runner, chats: int, rounds: int, latency: float) -> float:
+    started = perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(handler(run, chat_id, latency) for chat_id in range(1, chats + 1)))
+    return chats * rounds / (perf_counter() - started)
+
+
+async def run_single_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    return await sync_to_async(func)(*args, **kwargs)
+
+
+def run(chats: int, rounds: int, pool_sizes: list[int], latency: float) -> None:
+    with benchmark_database(file_based=True):
+        Client.objects.bulk_create([
+            Client(telegram_chat_id=chat_id, name='Bench', surname='Bench', phone='12345678901')
+            for chat_id in range(1, chats + 1)
+        ])
+        Appointment.objects.bulk_create([
+            Appointment(client_id=chat_id, pet_type='Кошка') for chat_id in range(1, chats + 1) for _ in range(5)
+        ])
+
+        print(f'{"executor":>16} {"handlers/s":>11}')
+        throughput = asyncio.run(measure_throughput(run_single_thread, chats, rounds, latency))
+        print(f'{"sync_to_async":>16} {throughput:>11.1f}')
+        for pool_size in pool_sizes:
+            executor = DatabaseExecutor(max_workers=pool_size)
+            throughput = asyncio.run(measure_throughput(executor.run, chats, rounds, latency))
+            executor.shutdown()
+            print(f'{f"pool({pool_size})":>16} {throughput:>11.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chats', type=int, default=200, help='количество одновременно работающих чатов')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[4, 10, 20])
+    parser.add_argument('--db-latency', type=float, default=0.0, help='имитируемая задержка запроса в секундах')
+    args = parser.parse_args()
+    run(args.chats, args.rounds, args.pool_sizes, args.db_latency)
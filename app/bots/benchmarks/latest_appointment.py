@@ -0,0 +1,50 @@
+"""Бенчмарк получения последней записи клиента на прием.
+
+Сравнивает прежний способ (загрузка всей истории клиента и сортировка в Python)
+с запросом AppointmentRepository.get_last (ORDER BY id DESC LIMIT 1 по частичному индексу (client_id, id)
+оформленных записей).
+
+Запуск: python -m app.bots.benchmarks.latest_appointment
+"""
+import argparse
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from asgiref.sync import async_to_sync
+
+from app.bots.benchmarks.common import benchmark_database, measure
+from app.bots.tail_trust.repository import AppointmentRepository
+from app.models import Appointment, Client
+
+
+def load_all_and_sort(client_id: int) -> Appointment:
+    """Прежний способ: вся история клиента загружается в список и сортируется по id."""
+    appointments = list(Appointment.objects.filter(client_id=client_id))
+    return sorted(appointments, key=lambda x: x.id, reverse=True)[0]
+
+
+def run(history_sizes: list[int], repeat: int) -> None:
+    get_last = async_to_sync(AppointmentRepository.get_last)
+
+    with benchmark_database():
+        print(f'{"history":>8} {"load+sort, ms":>14} {"get_last, ms":>13}')
+        for client_id, size in enumerate(history_sizes, start=1):
+            Client.objects.create(telegram_chat_id=client_id, name='Bench', surname='Bench', phone='12345678901')
+            Appointment.objects.bulk_create(
+                [Appointment(client_id=client_id, pet_type='Кошка', status=Appointment.STATUS_CONFIRMED)
+                 for _ in range(size)], batch_size=1000)
+
+            old = measure(lambda: load_all_and_sort(client_id), repeat)
+            new = measure(lambda: get_last(client_id), repeat)
+            print(f'{size:>8} {old:>14.3f} {new:>13.3f}')
+
+        plan = Appointment.objects.filter(
+            client_id=len(history_sizes), status=Appointment.STATUS_CONFIRMED).order_by('-id')[:1].explain()
+        print(f'\nQuery plan:\n{plan}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
@@ -0,0 +1,203 @@
+"""Нагрузочный тест обработчиков TailTrustBot.
+
+N пользователей одновременно проходят сценарий /register → /appointment → /applist: каждый отвечает на
+вопросы бота и выбирает случайную кнопку из присланной клавиатуры. Запросы к Telegram Bot API заменяются
+FakeBot с имитацией задержки и ответов RetryAfter, БД — временной тестовой базой текущих настроек
+(SQLite по умолчанию, PostgreSQL при заданной переменной окружения PROD).
+
+Результат: перцентили задержки обработки обновления (p50/p95/p99), обновлений в секунду и запросов к БД
+на обновление, максимальная задержка цикла событий и его блокировки со стеком виновника. С опцией --output
+результат сохраняется в JSON для отслеживания регрессий, с опцией --fail-on-block тест завершается ошибкой,
+если обработчик заблокировал цикл событий.
+
+Запуск: python -m app.bots.benchmarks.load_test --users 200 --latency 0.05 --output load_test.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+from collections import defaultdict
+from statistics import quantiles
+from time import perf_counter
+from typing import Optional
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from aiogram import Bot, Dispatcher, types
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from app.bots.benchmarks.common import benchmark_database, cancel_pending_tasks, disable_send_limits
+from app.bots.benchmarks.fake_bot import FakeBot
+from app.bots.lib.watchdog import LoopWatchdog
+from app.bots.tail_trust.tail_trust import TailTrustBot, TextInterfaceBot
+
+
+MAX_DIALOG_STEPS = 10  # ограничение шагов выбора по клавиатуре на случай зацикливания сценария
+
+
+class QueryCounter(object):
+    """Счетчик запросов к БД во всех соединениях, в том числе созданных потоками пула."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs) -> None:
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class LoadTest(object):
+    """Прогон сценария пользователей и сбор статистики."""
+
+    def __init__(self, bot: TailTrustBot, fake_bot: FakeBot, seed: int) -> None:
+        self.bot = bot
+        self.fake_bot = fake_bot
+        self.seed = seed
+        self.latencies: dict = defaultdict(list)  # шаг сценария -> задержки обработки в секундах
+        self.completed = 0
+        self._update_id = 0
+
+    async def send(self, chat_id: int, text: str) -> Optional[dict]:
+        self._update_id += 1
+        message = {
+            'message_id': self._update_id,
+            'date': 0,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Load'},
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+        update = types.Update(update_id=self._update_id, message=message)
+
+        started = perf_counter()
+        # отдельная задача на каждое обновление, как в диспетчере aiogram
+        await asyncio.ensure_future(self.bot.dp.updates_handler.notify(update))
+        self.latencies[text if text.startswith('/') else 'text'].append(perf_counter() - started)
+        return self.fake_bot.replies.get(chat_id)
+
+    async def user(self, chat_id: int) -> None:
+        rnd = random.Random(self.seed + chat_id)
+        for text in ('/register', 'Load', 'User', '+12345678901'):
+            await self.send(chat_id, text)
+
+        reply = await self.send(chat_id, '/appointment')
+        for _ in range(MAX_DIALOG_STEPS):
+            if not reply or not reply.get('reply_markup'):
+                break
+            buttons = [row[0]['text'] for row in json.loads(reply['reply_markup'])['keyboard']]
+            reply = await self.send(chat_id, rnd.choice(buttons))
+        if reply and reply.get('text') == TextInterfaceBot.USER_APPOINTMENT_COMPLETED:
+            self.completed += 1
+
+        await self.send(chat_id, '/applist')
+
+    async def run(self, users: int) -> float:
+        Bot.set_current(self.bot.bot)
+        Dispatcher.set_current(self.bot.dp)
+        started = perf_counter()
+        await asyncio.gather(*(self.user(chat_id) for chat_id in range(1, users + 1)))
+        return perf_counter() - started
+
+
+def percentiles(values: list[float]) -> dict:
+    if len(values) < 2:
+        value = values[0] * 1000 if values else 0.0
+        return {'p50': value, 'p95': value, 'p99': value, 'max': value}
+    cuts = quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49] * 1000, 'p95': cuts[94] * 1000, 'p99': cuts[98] * 1000, 'max': max(values) * 1000}
+
+
+def run(args: argparse.Namespace) -> dict:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    counter = QueryCounter()
+    watchdog = LoopWatchdog(interval=args.block_threshold / 4, threshold=args.block_threshold)
+
+    with benchmark_database(file_based=True):
+        fake_bot = FakeBot(latency=args.latency, retry_after_rate=args.retry_after_rate,
+                           retry_after=args.retry_after, seed=args.seed, loop=loop)
+        bot = TailTrustBot(api_token=FakeBot.TOKEN, bot=fake_bot)
+        cancel_pending_tasks(loop)  # напоминания не участвуют в тесте
+        if not args.real_limits:
+            disable_send_limits(bot)
+        if args.capacity:
+            bot.slots.capacity = args.capacity
+
+        connection_created.connect(counter.install)
+        counter.install(None, connection)
+        watchdog.start(loop)
+        try:
+            test = LoadTest(bot, fake_bot, args.seed)
+            duration = loop.run_until_complete(test.run(args.users))
+        finally:
+            watchdog.stop()
+            connection_created.disconnect(counter.install)
+            connection.execute_wrappers.remove(counter)
+        loop.run_until_complete(fake_bot.close())
+    loop.close()
+
+    all_latencies = [latency for latencies in test.latencies.values() for latency in latencies]
+    updates = len(all_latencies)
+    return {
+        'config': {**vars(args), 'database': connection.vendor},
+        'users': args.users,
+        'completed_appointments': test.completed,
+        'updates': updates,
+        'duration': duration,
+        'updates_per_second': updates / duration,
+        'latency_ms': percentiles(all_latencies),
+        'latency_ms_by_step': {step: percentiles(latencies) for step, latencies in sorted(test.latencies.items())},
+        'db_queries_per_update': counter.count / updates,
+        'bot_api_calls': len(fake_bot.calls),
+        'retry_after': fake_bot.retry_after_count,
+        'sender': bot.sender.stats(),
+        'loop_lag_ms_max': watchdog.lag_max * 1000,
+        'loop_blocks': [{'duration': block.duration, 'stack': block.stack} for block in watchdog.blocks],
+    }
+
+
+def report(result: dict) -> None:
+    latency = result['latency_ms']
+    print(f'database: {result["config"]["database"]}, users: {result["users"]}, '
+          f'completed appointments: {result["completed_appointments"]}')
+    print(f'updates: {result["updates"]}, duration: {result["duration"]:.2f}s, '
+          f'updates/s: {result["updates_per_second"]:.1f}, DB queries/update: {result["db_queries_per_update"]:.2f}')
+    print(f'event loop lag max: {result["loop_lag_ms_max"]:.2f} ms, blocks: {len(result["loop_blocks"])}')
+    for block in result['loop_blocks']:
+        print(f'\nevent loop blocked for {block["duration"] * 1000:.0f} ms at:\n{block["stack"]}')
+    print(f'\n{"step":>14} {"p50, ms":>9} {"p95, ms":>9} {"p99, ms":>9} {"max, ms":>9}')
+    for step, values in [('all', latency), *result['latency_ms_by_step'].items()]:
+        print(f'{step:>14} {values["p50"]:>9.2f} {values["p95"]:>9.2f} {values["p99"]:>9.2f} {values["max"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100, help='количество одновременных пользователей')
+    parser.add_argument('--latency', type=float, default=0.0, help='имитируемая задержка Bot API в секундах')
+    parser.add_argument('--retry-after-rate', type=float, default=0.0, help='доля ответов RetryAfter')
+    parser.add_argument('--retry-after', type=int, default=1, help='время ожидания в RetryAfter, секунды')
+    parser.add_argument('--capacity', type=int, default=10, help='вместимость слота, 0 - из настроек')
+    parser.add_argument('--real-limits', action='store_true', help='не снимать лимиты исходящих сообщений')
+    parser.add_argument('--block-threshold', type=float, default=0.1,
+                        help='длительность блокировки цикла событий в секундах, считающаяся ошибкой')
+    parser.add_argument('--fail-on-block', action='store_true', help='код возврата 1 при блокировке цикла событий')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для сохранения результата в JSON')
+    args = parser.parse_args()
+
+    result = run(args)
+    report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+    if args.fail_on_block and result['loop_blocks']:
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""Бенчмарк чтения записей на прием моделями Django и моделями чтения.
+
+Сравнивает на больших выборках (по умолчанию 1 000 000 строк):
+- models – полные экземпляры Appointment (прежний способ чтения);
+- only – экземпляры Appointment с загрузкой только нужных полей (.only());
+- records – модели чтения AppointmentRecord (.values_list() и кортежи с именованными полями).
+
+Время – лучшее из --repeat прогонов без трассировки памяти. Память измеряется отдельным прогоном
+с tracemalloc: retained – объем полученного списка, peak – пиковый объем во время выборки.
+БД – временная тестовая база текущих настроек.
+
+Запуск: python -m app.bots.benchmarks.read_models --rows 1000000
+"""
+import argparse
+import datetime
+import gc
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Iterator, List
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+
+from app.bots.benchmarks.common import benchmark_database
+from app.bots.tail_trust.read_models import AppointmentRecord, fetch
+from app.models import Appointment, Client
+
+
+CLIENTS = 1000
+BATCH_SIZE = 10000
+MB = 1024 * 1024
+
+
+def fill(rows: int) -> None:
+    """Заполнение БД оформленными записями на прием."""
+    Client.objects.bulk_create(
+        [Client(telegram_chat_id=i, name='Bench', surname='Bench', phone='12345678901') for i in range(1, CLIENTS + 1)])
+    today = datetime.date.today()
+
+    def appointments() -> Iterator[Appointment]:
+        for i in range(rows):
+            yield Appointment(client_id=i % CLIENTS + 1, date=today + datetime.timedelta(days=i % 30),
+                              time=datetime.time(10 + i % 8), pet_type='Кошка', status=Appointment.STATUS_CONFIRMED)
+
+    batch = []
+    for appointment in appointments():
+        batch.append(appointment)
+        if len(batch) == BATCH_SIZE:
+            Appointment.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Appointment.objects.bulk_create(batch)
+
+
+def measure_time(load: Callable[[], List], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = perf_counter()
+        result = load()
+        timings.append(perf_counter() - started)
+        del result
+    return min(timings)
+
+
+def measure_memory(load: Callable[[], List]) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / MB, peak / MB
+
+
+def run(rows: int, repeat: int) -> None:
+    queryset = Appointment.objects.filter(status=Appointment.STATUS_CONFIRMED)
+    fields = ('id', 'client_id', 'date', 'time', 'pet_type')
+    methods = (
+        ('models', lambda: list(queryset.all())),
+        ('only', lambda: list(queryset.only(*fields))),
+        ('records', lambda: fetch(queryset, AppointmentRecord)),
+    )
+
+    with benchmark_database():
+        fill(rows)
+        print(f'rows: {rows}')
+        print(f'{"method":>8} {"seconds":>8} {"retained, MB":>13} {"peak, MB":>9} {"bytes/row":>10}')
+        for name, load in methods:
+            duration = measure_time(load, repeat)
+            retained, peak = measure_memory(load)
+            print(f'{name:>8} {duration:>8.2f} {retained:>13.1f} {peak:>9.1f} {retained * MB / rows:>10.0f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,113 @@
+"""Воспроизведение записи входящих обновлений (UPDATE_RECORD_PATH) для регрессионного тестирования производительности.
+
+Обновления из записи подаются в TailTrustBot с исходными интервалами (--speed 1), ускоренно (--speed N)
+или без пауз (--speed 0), запросы к Telegram Bot API заменяются FakeBot, БД — временной тестовой базой.
+Выводится пропускная способность, ответы бота можно сохранить (--save-responses) и сравнить с ответами
+предыдущего прогона (--compare): расхождения показываются по чатам.
+Записи на прием зависят от текущей даты, поэтому эталон стоит снимать в тот же день, что и сравниваемый прогон.
+
+Запуск: python -m app.bots.benchmarks.replay updates.jsonl.gz --speed 0 --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+from time import perf_counter
+from typing import Optional
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from aiogram import Bot, Dispatcher, types
+
+from app.bots.benchmarks.common import benchmark_database, cancel_pending_tasks, disable_send_limits
+from app.bots.benchmarks.fake_bot import FakeBot
+from app.bots.lib.concurrency import update_chat_id
+from app.bots.lib.recorder import read_recording
+from app.bots.tail_trust.tail_trust import TailTrustBot
+
+
+async def replay(bot: TailTrustBot, recording: list[dict], speed: float) -> float:
+    """Подача обновлений в диспетчер бота.
+
+    Returns:
+        Время воспроизведения в секундах.
+    """
+    Bot.set_current(bot.bot)
+    Dispatcher.set_current(bot.dp)
+    loop = asyncio.get_event_loop()
+    first_ts = recording[0]['ts'] if recording else 0
+    started = perf_counter()
+    tasks = []
+
+    for item in recording:
+        if speed:
+            delay = (item['ts'] - first_ts) / speed - (perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # каждое обновление в отдельной задаче, как при polling; порядок внутри чата сохраняет диспетчер
+        tasks.append(loop.create_task(bot.dp.updates_handler.notify(types.Update(**item['update']))))
+
+    await asyncio.gather(*tasks)
+    return perf_counter() - started
+
+
+def collect_responses(fake_bot: FakeBot) -> dict:
+    """Ответы бота, сгруппированные по чатам в порядке отправки."""
+    responses = defaultdict(list)
+    for method, data in fake_bot.calls:
+        if 'chat_id' in data:
+            responses[str(data['chat_id'])].append([method, data.get('text'), data.get('reply_markup')])
+    return dict(responses)
+
+
+def compare(responses: dict, baseline: dict, limit: int) -> int:
+    """Вывод расхождений ответов с эталонным прогоном.
+
+    Returns:
+        Количество чатов с расхождениями.
+    """
+    diverged = sorted(chat for chat in set(responses) | set(baseline) if responses.get(chat) != baseline.get(chat))
+    for chat in diverged[:limit]:
+        actual, expected = responses.get(chat, []), baseline.get(chat, [])
+        index = next((i for i, (a, e) in enumerate(zip(actual, expected)) if a != e), min(len(actual), len(expected)))
+        print(f'chat {chat}, response #{index}:\n  expected: {expected[index:index + 1]}\n'
+              f'  actual:   {actual[index:index + 1]}')
+    return len(diverged)
+
+
+def run(path: str, speed: float, save_responses: Optional[str], baseline_path: Optional[str], limit: int) -> None:
+    recording = list(read_recording(path))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    with benchmark_database(file_based=True):
+        fake_bot = FakeBot(loop=loop)
+        bot = TailTrustBot(api_token=FakeBot.TOKEN, bot=fake_bot)
+        cancel_pending_tasks(loop)
+        disable_send_limits(bot)
+        duration = loop.run_until_complete(replay(bot, recording, speed))
+        loop.run_until_complete(fake_bot.close())
+    loop.close()
+
+    chats = {update_chat_id(types.Update(**item['update'])) for item in recording}
+    print(f'updates: {len(recording)}, chats: {len(chats)}, duration: {duration:.2f}s, '
+          f'updates/s: {len(recording) / duration if duration else 0:.1f}')
+
+    responses = collect_responses(fake_bot)
+    if save_responses:
+        with open(save_responses, 'w', encoding='utf-8') as file:
+            json.dump(responses, file, ensure_ascii=False)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as file:
+            diverged = compare(responses, json.load(file), limit)
+        print(f'diverged chats: {diverged} of {len(chats)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help='файл записи обновлений (.jsonl.gz)')
+    parser.add_argument('--speed', type=float, default=0, help='ускорение: 1 - исходная скорость, 0 - без пауз')
+    parser.add_argument('--save-responses', help='файл для сохранения ответов бота (JSON)')
+    parser.add_argument('--compare', help='файл ответов эталонного прогона для поиска расхождений')
+    parser.add_argument('--limit', type=int, default=10, help='максимальное количество выводимых расхождений')
+    args = parser.parse_args()
+    run(args.recording, args.speed, args.save_responses, args.compare, args.limit)
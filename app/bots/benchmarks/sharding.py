@@ -0,0 +1,115 @@
+"""Бенчмарк масштабирования обработки обновлений по процессам-обработчикам.
+
+Запускает WorkerSupervisor с заданным количеством процессов, в каждом из которых работает TailTrustBot
+с FakeBot вместо Telegram Bot API, и передает через ShardRouter синтетические обновления (команда /help
+от заданного количества пользователей), как это делает главный процесс Controller при BOT_WORKERS > 1.
+Измеряется время от передачи первого обновления до обработки последнего всеми процессами. Запуск процессов
+(настройка Django, создание бота) в измерение не входит. БД — временная тестовая база в файле, общая для процессов.
+Лимиты исходящих сообщений снимаются, чтобы измерялась обработка обновлений, а не лимиты Telegram.
+
+Пропускная способность растет с числом процессов, пока их не больше ядер процессора и главный процесс
+успевает распределять обновления.
+
+Запуск: python -m app.bots.benchmarks.sharding --workers 1,2,4 --updates 20000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+from functools import partial
+from time import perf_counter
+from typing import Any, List, Tuple
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from aiogram import types
+from django.db import connection
+
+from app.bots.benchmarks.common import benchmark_database, disable_send_limits
+from app.bots.benchmarks.fake_bot import FakeBot
+from app.bots.benchmarks.webhook_load import synthetic_updates
+from app.bots.lib.sharding import ShardRouter, ShardWorker, WorkerSupervisor
+from app.bots.tail_trust.tail_trust import TailTrustBot
+from main.settings import UPDATE_CONCURRENCY
+
+
+RESULT_TIMEOUT = 120  # секунды ожидания ответа процесса-обработчика
+
+
+def run_worker(index: int, updates: Any, db_name: str, latency: float, results: Any) -> None:
+    """Точка входа процесса-обработчика бенчмарка: TailTrustBot с FakeBot на временной БД."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    connection.settings_dict['NAME'] = db_name
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    bot = TailTrustBot(api_token=FakeBot.TOKEN, bot=FakeBot(latency=latency, loop=loop), primary=False, metrics_port=0)
+    disable_send_limits(bot)
+    worker = ShardWorker(updates, [bot.dp], max_pending=UPDATE_CONCURRENCY * 2)
+    results.put(('ready', index, 0))
+    loop.run_until_complete(worker.run())
+    results.put(('done', index, worker.processed))
+    loop.run_until_complete(bot.bot.close())
+    loop.close()
+
+
+async def run_workers(workers: int, updates: List[dict], args: argparse.Namespace) -> Tuple[float, int]:
+    """Обработка обновлений заданным количеством процессов.
+
+    Returns:
+        Время обработки в секундах и количество обработанных обновлений.
+    """
+    loop = asyncio.get_event_loop()
+    results = multiprocessing.get_context('spawn').Queue()
+    supervisor = WorkerSupervisor(
+        partial(run_worker, db_name=connection.settings_dict['NAME'], latency=args.latency, results=results),
+        workers=workers,
+        queue_size=args.queue_size,
+        restart_delay=1,
+        max_restart_delay=1,
+    )
+    router = ShardRouter(supervisor.queues)
+    supervisor.start()
+    try:
+        for _ in range(workers):
+            await loop.run_in_executor(None, partial(results.get, timeout=RESULT_TIMEOUT))
+
+        started = perf_counter()
+        for update in updates:
+            await router.route(0, types.Update(**update))
+        await router.join()
+        for worker_updates in supervisor.queues:
+            worker_updates.put(None)
+        processed = 0
+        for _ in range(workers):
+            _, _, count = await loop.run_in_executor(None, partial(results.get, timeout=RESULT_TIMEOUT))
+            processed += count
+        return perf_counter() - started, processed
+    finally:
+        await supervisor.stop(timeout=RESULT_TIMEOUT)
+
+
+def run(args: argparse.Namespace) -> None:
+    updates = list(synthetic_updates(args.updates, args.chats))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with benchmark_database(file_based=True):
+        print(f'cpu: {os.cpu_count()}')
+        print(f'{"workers":>8} {"updates":>8} {"seconds":>10} {"updates/s":>12} {"speedup":>8}')
+        baseline = None
+        for workers in args.workers:
+            duration, processed = loop.run_until_complete(run_workers(workers, updates, args))
+            throughput = processed / duration
+            baseline = baseline or throughput
+            print(f'{workers:>8} {processed:>8} {duration:>10.2f} {throughput:>12.1f} {throughput / baseline:>8.2f}')
+    loop.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=lambda value: [int(item) for item in value.split(',')], default=[1, 2, 4],
+                        help='количества процессов-обработчиков через запятую')
+    parser.add_argument('--updates', type=int, default=20000, help='количество синтетических обновлений')
+    parser.add_argument('--chats', type=int, default=1000, help='количество пользователей в синтетических обновлениях')
+    parser.add_argument('--queue-size', type=int, default=1000, help='размер очереди процесса-обработчика')
+    parser.add_argument('--latency', type=float, default=0.0, help='имитируемая задержка Bot API в секундах')
+    run(parser.parse_args())
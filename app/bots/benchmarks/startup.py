@@ -0,0 +1,108 @@
+"""Бенчмарк холодного старта бота.
+
+Каждое измерение выполняется в новом процессе интерпретатора, медиана по --repeat запускам:
+- import – время импорта модуля (без запуска интерпретатора) и признак загрузки Django: легкие модули
+  (lib.common, Validator) не должны загружать Django, точка входа bootstrap – тяжелые модули бота;
+- first response – время от запуска процесса до ответа на первое обновление (/start) по этапам старта
+  (настройка Django, импорт модулей бота, создание бота, первое обновление) так же, как при запуске
+  runner.py. Вместо Telegram Bot API используется FakeBot, команда /start не обращается к БД.
+
+Запуск: python -m app.bots.benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+
+ROOT = Path(__file__).resolve().parents[3]
+IMPORT_CODE = ('import sys; from time import perf_counter; started = perf_counter(); import {module}; '
+               'print(perf_counter() - started, "django" in sys.modules)')
+MODULES = (
+    'app.bots.lib.common',
+    'app.bots.tail_trust.validator',
+    'app.bots.bootstrap',
+    'app.bots.tail_trust.tail_trust',
+    'app.bots.controller',
+)
+
+
+def first_response() -> None:
+    """Процесс измерения: старт бота как в bootstrap.main и ответ на первое обновление."""
+    from app.bots.bootstrap import setup, startup
+
+    setup()
+    import asyncio
+    from aiogram import Bot, Dispatcher, types
+    from app.bots.benchmarks.fake_bot import FakeBot
+    from app.bots.tail_trust.tail_trust import TailTrustBot
+
+    startup.mark('imports')
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    fake_bot = FakeBot(loop=loop)
+    bot = TailTrustBot(api_token=FakeBot.TOKEN, bot=fake_bot, primary=False, metrics_port=0)
+    startup.mark('bots')
+
+    async def respond() -> None:
+        update = types.Update(update_id=1, message={
+            'message_id': 1, 'date': 0, 'text': '/start',
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            'chat': {'id': 1, 'type': 'private'}, 'from': {'id': 1, 'is_bot': False, 'first_name': 'Bench'}})
+        Bot.set_current(fake_bot)
+        Dispatcher.set_current(bot.dp)
+        await bot.dp.updates_handler.notify(update)
+        while not fake_bot.calls:
+            await asyncio.sleep(0.001)
+
+    loop.run_until_complete(respond())
+    response = perf_counter() - startup.started
+    loop.run_until_complete(fake_bot.close())
+    print(json.dumps({'phases': startup.phases, 'response': response}))
+
+
+def run_process(args: list) -> tuple:
+    """Запуск процесса интерпретатора.
+
+    Returns:
+        Время работы процесса в секундах и последняя строка его вывода.
+    """
+    started = perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return perf_counter() - started, result.stdout.strip().splitlines()[-1]
+
+
+def run(repeat: int) -> None:
+    print(f'{"module":>32} {"import, ms":>11} {"django":>7}')
+    for module in MODULES:
+        timings, django = [], False
+        for _ in range(repeat):
+            _, output = run_process(['-c', IMPORT_CODE.format(module=module)])
+            duration, loaded = output.split()
+            timings.append(float(duration) * 1000)
+            django = loaded == 'True'
+        print(f'{module:>32} {median(timings):>11.1f} {"yes" if django else "no":>7}')
+
+    runs = []
+    for _ in range(repeat):
+        process, output = run_process(['-m', 'app.bots.benchmarks.startup', '--first-response'])
+        runs.append((process, json.loads(output)))
+    print(f'\nfirst response (median of {repeat}):')
+    for phase in runs[0][1]['phases']:
+        print(f'{phase:>32} {median(result["phases"][phase] for _, result in runs) * 1000:>11.1f} ms')
+    print(f'{"from bootstrap import":>32} {median(result["response"] for _, result in runs) * 1000:>11.1f} ms')
+    print(f'{"process (with interpreter)":>32} {median(process for process, _ in runs) * 1000:>11.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--first-response', action='store_true', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.first_response:
+        first_response()
+    else:
+        run(arguments.repeat)
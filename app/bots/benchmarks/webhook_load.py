@@ -0,0 +1,142 @@
+"""Бенчмарк приема обновлений в режиме webhook.
+
+Поднимает WebhookServer в текущем процессе (или использует уже запущенный бот по --url), отправляет на него
+записанные или синтетические обновления POST-запросами и сравнивает пропускную способность с обработкой
+тех же обновлений пачками, как это делает long polling (Dispatcher.process_updates).
+Запросы к Telegram Bot API заменяются FakeBot, БД — временной тестовой базой. Лимиты исходящих сообщений
+снимаются, чтобы измерялась скорость приема и обработки обновлений, а не лимиты Telegram.
+
+Записанные обновления передаются файлом JSONL: одно обновление Telegram (объект Update) в строке.
+
+Запуск: python -m app.bots.benchmarks.webhook_load --updates 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from typing import Iterator, List
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from aiogram import Bot, Dispatcher, types
+from aiohttp import ClientSession, web
+
+from app.bots.benchmarks.common import benchmark_database, cancel_pending_tasks, disable_send_limits
+from app.bots.benchmarks.fake_bot import FakeBot
+from app.bots.lib.webhook import WebhookServer
+from app.bots.tail_trust.tail_trust import TailTrustBot
+
+
+POLLING_BATCH_SIZE = 100  # максимальное количество обновлений в ответе getUpdates
+
+
+def synthetic_updates(count: int, chats: int) -> Iterator[dict]:
+    """Генерация обновлений с командой /help от заданного количества пользователей."""
+    for update_id in range(1, count + 1):
+        chat_id = update_id % chats + 1
+        yield {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Bench'},
+                'text': '/help',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 5}],
+            },
+        }
+
+
+def load_updates(path: str) -> List[dict]:
+    """Чтение записанных обновлений из файла JSONL."""
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+async def post_updates(url: str, updates: List[dict], concurrency: int) -> float:
+    """Отправка обновлений на webhook.
+
+    Returns:
+        Время отправки всех обновлений в секундах.
+    """
+    queue = iter(updates)
+    rejected = 0
+
+    async def client(session: ClientSession) -> None:
+        nonlocal rejected
+        for update in queue:
+            async with session.post(url, json=update) as response:
+                if response.status != 200:
+                    rejected += 1
+
+    started = perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    duration = perf_counter() - started
+    if rejected:
+        print(f'Rejected updates: {rejected}')
+    return duration
+
+
+async def run_webhook(bot: TailTrustBot, updates: List[dict], args: argparse.Namespace) -> float:
+    server = WebhookServer(bot.dp, path='/webhook', workers=args.workers,
+                           max_body_size=1024 * 1024, queue_size=args.queue_size)
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', args.port)
+    await site.start()
+    try:
+        started = perf_counter()
+        await post_updates(f'http://127.0.0.1:{args.port}/webhook', updates, args.concurrency)
+        await server.queue.join()  # ждем обработки всех принятых обновлений
+        return perf_counter() - started
+    finally:
+        await runner.cleanup()
+
+
+async def run_polling(bot: TailTrustBot, updates: List[dict]) -> float:
+    Bot.set_current(bot.bot)
+    Dispatcher.set_current(bot.dp)
+    started = perf_counter()
+    for i in range(0, len(updates), POLLING_BATCH_SIZE):
+        batch = [types.Update(**update) for update in updates[i:i + POLLING_BATCH_SIZE]]
+        await bot.dp.process_updates(batch)
+    return perf_counter() - started
+
+
+def report(name: str, count: int, duration: float) -> None:
+    print(f'{name:>8} {count:>8} {duration:>10.2f} {count / duration:>12.1f}')
+
+
+def run(args: argparse.Namespace, updates: List[dict]) -> None:
+    if args.url:
+        duration = asyncio.run(post_updates(args.url, updates, args.concurrency))
+        print(f'{"mode":>8} {"updates":>8} {"seconds":>10} {"updates/s":>12}')
+        report('remote', len(updates), duration)
+        return
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with benchmark_database():
+        bot = TailTrustBot(api_token=FakeBot.TOKEN, bot=FakeBot(latency=args.latency, loop=loop))
+        disable_send_limits(bot)
+        print(f'{"mode":>8} {"updates":>8} {"seconds":>10} {"updates/s":>12}')
+        report('polling', len(updates), loop.run_until_complete(run_polling(bot, updates)))
+        report('webhook', len(updates), loop.run_until_complete(run_webhook(bot, updates, args)))
+        cancel_pending_tasks(loop)
+        loop.run_until_complete(bot.bot.close())
+    loop.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', help='файл JSONL с записанными обновлениями')
+    parser.add_argument('--url', help='адрес запущенного webhook, по умолчанию сервер поднимается в процессе')
+    parser.add_argument('--updates', type=int, default=2000, help='количество синтетических обновлений')
+    parser.add_argument('--chats', type=int, default=500, help='количество пользователей в синтетических обновлениях')
+    parser.add_argument('--concurrency', type=int, default=50, help='количество одновременных POST-запросов')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--queue-size', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='имитируемая задержка Bot API в секундах')
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args()
+    run(args, load_updates(args.file) if args.file else list(synthetic_updates(args.updates, args.chats)))
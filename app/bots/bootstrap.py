@@ -0,0 +1,71 @@
+"""Точка входа процессов бота.
+
+Модуль не импортирует Django, aiogram и модели: настройка Django выполняется явно функцией setup()
+(или импортом app.bots.django_setup в модулях, которым нужен ORM), а тяжелые модули загружаются
+только при запуске бота. Поэтому Validator, lib.common и их тесты импортируются без Django.
+
+Время холодного старта отсчитывается от импорта этого модуля (первый импорт точки входа) и записывается
+по этапам: настройка Django, импорт модулей бота, создание ботов и получение первого обновления.
+"""
+import logging
+import os
+from time import perf_counter
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer(object):
+    """Замер холодного старта процесса по этапам."""
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.phases: dict = {}  # этап -> длительность в секундах
+        self.first_update: Optional[float] = None  # секунды от старта до первого обновления
+        self._last = self.started
+
+    def mark(self, phase: str) -> None:
+        """Завершение этапа старта. Повторные отметки этапа игнорируются.
+
+        Args:
+            phase: название этапа.
+        """
+        if phase in self.phases:
+            return
+        now = perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    def update_received(self) -> None:
+        """Отметка получения обновления: при первом вызове фиксирует и записывает в лог время холодного старта."""
+        if self.first_update is not None:
+            return
+        self.mark('first_update')
+        self.first_update = self._last - self.started
+        logger.info('Cold start: first update after %.3fs (%s)', self.first_update,
+                    ', '.join(f'{phase} {duration:.3f}s' for phase, duration in self.phases.items()))
+
+
+startup = StartupTimer()
+
+
+def setup() -> None:
+    """Настройка Django для процесса бота. Повторные вызовы и вызов под manage.py ничего не делают."""
+    import django
+    from django.apps import apps
+
+    if apps.ready:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
+    django.setup()
+    startup.mark('django')
+
+
+def main() -> None:
+    """Запуск бота: настройка Django, импорт модулей бота и прием обновлений."""
+    setup()
+    from app.bots.controller import Controller
+
+    startup.mark('imports')
+    Controller().exec()
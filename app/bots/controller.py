@@ -1,24 +1,241 @@
+import asyncio
+import signal
 from abc import ABC, abstractmethod
+from functools import partial
+from typing import Any, List, Optional, Sequence, Tuple
 
+from aiogram import Bot, Dispatcher
+from aiohttp import web
 
-from app.bots.tail_trust.tail_trust import TailTrustBot
-from main.settings import BOT_TOKEN
+from app.bots.bootstrap import startup
+from app.bots.lib.metrics import MetricsServer, registry
+from app.bots.lib.sharding import ShardRouter, ShardWorker, WorkerSupervisor
+from app.bots.lib.webhook import WebhookServer
+from app.bots.tail_trust.tail_trust import BotMode, TailTrustBot
+from main.settings import (BOT_MODE, BOT_TOKENS, BOT_WORKERS, METRICS_HOST, METRICS_PORT, UPDATE_CONCURRENCY,
+                           WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_MAX_BODY_SIZE, WEBHOOK_PATH, WEBHOOK_QUEUE_SIZE,
+                           WEBHOOK_URL, WEBHOOK_WORKERS, WORKER_MAX_RESTART_DELAY, WORKER_QUEUE_SIZE,
+                           WORKER_RESTART_DELAY, WORKER_SHUTDOWN_TIMEOUT)
+
+
+def create_bots(tokens: Sequence[str], metrics_port: Optional[int] = None,
+                background_jobs: bool = True) -> List[TailTrustBot]:
+    """Создание ботов одного процесса.
+
+    Args:
+        tokens: токены ботов.
+        metrics_port: порт сервера метрик процесса, по умолчанию METRICS_PORT.
+        background_jobs: запускать ли фоновые задачи в этом процессе.
+
+    Returns:
+        Боты в порядке токенов. Первый бот — главный: он запускает сторожа цикла событий, сервер метрик
+        и, если background_jobs, фоновые задачи (напоминания, очистку черновиков), общие для всех ботов процесса.
+    """
+    return [TailTrustBot(api_token=token, primary=index == 0, background_jobs=background_jobs,
+                         metrics_port=metrics_port)
+            for index, token in enumerate(tokens)]
+
+
+async def start_bots(bots: Sequence[TailTrustBot]) -> None:
+    """Запуск служб ботов перед приемом обновлений."""
+    for bot in bots:
+        await bot.on_startup(bot.dp)
+
+
+async def stop_bots(bots: Sequence[TailTrustBot]) -> None:
+    """Остановка служб и фоновых задач ботов, закрытие хранилищ состояний и сессий Bot API."""
+    for bot in bots:
+        await bot.on_shutdown(bot.dp)
+        await bot.dp.storage.close()
+        await bot.dp.storage.wait_closed()
+        await bot.bot.close()
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_worker(index: int, updates: Any, tokens: Sequence[str]) -> None:
+    """Точка входа процесса-обработчика: боты всех токенов обрабатывают обновления чатов своей доли.
+
+    Args:
+        index: номер процесса.
+        updates: очередь обновлений процесса.
+        tokens: токены ботов.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C получает вся группа процессов, завершением управляет главный
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # процесс-обработчик отдает метрики на своем порту, следующем за портом главного процесса;
+    # фоновые задачи выполняет только процесс 0, иначе напоминания и рассылки уходили бы по разу от каждого процесса
+    bots = create_bots(tokens, metrics_port=METRICS_PORT + index + 1 if METRICS_PORT else 0,
+                       background_jobs=index == 0)
+    startup.mark('bots')
+    worker = ShardWorker(updates, [bot.dp for bot in bots], max_pending=UPDATE_CONCURRENCY * 2)
+    loop.add_signal_handler(signal.SIGTERM, worker.stop)
+    try:
+        loop.run_until_complete(start_bots(bots))
+        loop.run_until_complete(worker.run())
+    finally:
+        loop.run_until_complete(stop_bots(bots))
+        loop.close()
 
 
 class ControllerBase(ABC):
     """Базовый класс контроллера."""
 
     @abstractmethod
-    def exec(self) -> None:
-        """Метод для запуска контроллера."""
+    def exec(self, mode: Optional[str] = None) -> None:
+        """Метод для запуска контроллера.
+
+        Args:
+            mode: режим получения обновлений (polling или webhook), по умолчанию из настроек BOT_MODE.
+        """
 
 
 class Controller(ControllerBase):
-    """Класс контроллера. Класс предназначен для котроля запуска ботов."""
+    """Класс контроллера. Класс предназначен для котроля запуска ботов.
+    Один бот запускается в текущем процессе, несколько ботов (токенов) работают в одном цикле событий.
+    При нескольких процессах-обработчиках текущий процесс только принимает обновления и распределяет их
+    по процессам по идентификатору чата, упавшие процессы перезапускаются.
+    """
+
+    def __init__(self, tokens: Optional[Sequence[str]] = None, workers: Optional[int] = None) -> None:
+        """Инициализация контроллера.
 
-    def exec(self) -> None:
-        """Метод для запуска контроллера."""
-        if not BOT_TOKEN:
+        Args:
+            tokens: токены ботов, по умолчанию из настроек BOT_TOKENS.
+            workers: количество процессов-обработчиков, по умолчанию из настроек BOT_WORKERS.
+        """
+        self.tokens = list(tokens) if tokens is not None else BOT_TOKENS
+        self.workers = workers if workers is not None else BOT_WORKERS
+
+    def exec(self, mode: Optional[str] = None) -> None:
+        """Метод для запуска контроллера.
+
+        Args:
+            mode: режим получения обновлений (polling или webhook), по умолчанию из настроек BOT_MODE.
+        """
+        if not self.tokens:
             raise Exception('No token specified')
-        bot = TailTrustBot(api_token=BOT_TOKEN)
-        bot.exec()
+        mode = mode or BOT_MODE
+        if mode not in (BotMode.POLLING, BotMode.WEBHOOK):
+            raise ValueError(f'Unknown bot mode: {mode}')
+
+        if len(self.tokens) == 1 and self.workers <= 1:
+            bot = TailTrustBot(api_token=self.tokens[0])
+            startup.mark('bots')
+            bot.exec(mode)
+            return
+        asyncio.get_event_loop().run_until_complete(self.serve(mode))
+
+    async def serve(self, mode: str) -> None:
+        """Прием обновлений всех ботов до сигнала SIGINT или SIGTERM.
+
+        Args:
+            mode: режим получения обновлений.
+        """
+        loop = asyncio.get_event_loop()
+        stopped = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopped.set)
+
+        bots, supervisor, router, metrics_server = [], None, None, None
+        if self.workers > 1:
+            supervisor = WorkerSupervisor(
+                partial(run_worker, tokens=self.tokens),
+                workers=self.workers,
+                queue_size=WORKER_QUEUE_SIZE,
+                restart_delay=WORKER_RESTART_DELAY,
+                max_restart_delay=WORKER_MAX_RESTART_DELAY,
+            )
+            router = ShardRouter(supervisor.queues)
+            # обработчики ботов работают в процессах-обработчиках, здесь диспетчеры только принимают обновления
+            dispatchers = [Dispatcher(Bot(token=token)) for token in self.tokens]
+            for index, dispatcher in enumerate(dispatchers):
+                router.install(dispatcher, index)
+            self.configure_metrics(router, supervisor)
+            supervisor.start()
+            if METRICS_PORT:
+                metrics_server = MetricsServer(registry, host=METRICS_HOST, port=METRICS_PORT)
+                await metrics_server.start()
+        else:
+            bots = create_bots(self.tokens)
+            startup.mark('bots')
+            dispatchers = [bot.dp for bot in bots]
+            await start_bots(bots)
+
+        receivers = list(zip(self.tokens, dispatchers))
+        try:
+            if mode == BotMode.WEBHOOK:
+                await self.receive_webhook(receivers, stopped)
+            else:
+                await self.receive_polling(receivers, stopped)
+        finally:
+            if supervisor is not None:
+                await router.join()
+                await supervisor.stop(WORKER_SHUTDOWN_TIMEOUT)
+                if metrics_server is not None:
+                    await metrics_server.stop()
+                for dispatcher in dispatchers:
+                    await dispatcher.bot.close()
+            else:
+                await stop_bots(bots)
+
+    @staticmethod
+    def configure_metrics(router: ShardRouter, supervisor: WorkerSupervisor) -> None:
+        """Регистрация метрик распределения обновлений по процессам-обработчикам."""
+        for index, updates in enumerate(supervisor.queues):
+            registry.callback('bot_worker_routed_total', 'Количество обновлений, переданных процессу-обработчику',
+                              lambda index=index: router.routed[index], kind='counter', worker=index)
+            registry.callback('bot_worker_queue_depth', 'Количество обновлений в очереди процесса-обработчика',
+                              updates.qsize, worker=index)
+        registry.callback('bot_worker_restarts_total', 'Количество перезапусков процессов-обработчиков',
+                          lambda: supervisor.restarts, kind='counter')
+
+    @staticmethod
+    async def receive_polling(receivers: Sequence[Tuple[str, Dispatcher]], stopped: asyncio.Event) -> None:
+        """Получение обновлений long polling запросами.
+
+        Args:
+            receivers: пары (токен, диспетчер).
+            stopped: событие остановки.
+        """
+        for _, dispatcher in receivers:
+            await dispatcher.skip_updates()
+        tasks = [asyncio.ensure_future(dispatcher.start_polling()) for _, dispatcher in receivers]
+        await stopped.wait()
+        for task in tasks:
+            task.cancel()  # прерываем текущий запрос getUpdates, не дожидаясь его таймаута
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def receive_webhook(receivers: Sequence[Tuple[str, Dispatcher]], stopped: asyncio.Event) -> None:
+        """Получение обновлений через webhook, общий HTTP-сервер для всех ботов.
+
+        Args:
+            receivers: пары (токен, диспетчер). При нескольких ботах путь каждого дополняется идентификатором бота.
+            stopped: событие остановки.
+        """
+        app = web.Application(client_max_size=WEBHOOK_MAX_BODY_SIZE)
+        servers = []
+        for token, dispatcher in receivers:
+            path = WEBHOOK_PATH if len(receivers) == 1 else f'{WEBHOOK_PATH}/{token.split(":", 1)[0]}'
+            server = WebhookServer(dispatcher, path=path, workers=WEBHOOK_WORKERS,
+                                   max_body_size=WEBHOOK_MAX_BODY_SIZE, queue_size=WEBHOOK_QUEUE_SIZE)
+            server.setup(app)
+            registry.callback('bot_webhook_queue_depth', 'Количество принятых, но не обработанных обновлений',
+                              lambda server=server: server.queue_depth, bot=token.split(':', 1)[0])
+            servers.append(server)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT).start()
+        try:
+            for server in servers:
+                await server.dispatcher.bot.set_webhook(WEBHOOK_URL + server.path)
+            await stopped.wait()
+            for server in servers:
+                await server.dispatcher.bot.delete_webhook()
+        finally:
+            await runner.cleanup()  # дообрабатываем принятые обновления
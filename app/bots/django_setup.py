@@ -0,0 +1,5 @@
+"""Импорт модуля настраивает Django. Его первым импортируют модули бота, которым нужен ORM, и скрипты."""
+from app.bots.bootstrap import setup
+
+
+setup()
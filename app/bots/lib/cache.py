@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from threading import RLock
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
+
+
+# Маркер промаха, позволяющий кэшировать None как значение
+MISSING = object()
+
+
+class TTLCache(object):
+    """LRU-кэш с ограничением по размеру и времени жизни записей.
+    Потокобезопасен: инвалидация может приходить из потоков, в которых выполняются запросы к БД.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = monotonic) -> None:
+        """Инициализация кэша.
+
+        Args:
+            maxsize: максимальное количество записей, при превышении вытесняются самые старые по обращению.
+            ttl: время жизни записи в секундах.
+            timer: функция получения текущего времени.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._timer = timer
+        self._data: OrderedDict = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Метод для получения значения из кэша.
+
+        Args:
+            key: ключ записи.
+            default: значение, возвращаемое при промахе.
+
+        Returns:
+            Закэшированное значение или default.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > self._timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Метод для сохранения значения в кэш.
+
+        Args:
+            key: ключ записи.
+            value: значение.
+            generation: поколение кэша на момент чтения значения из источника. Если с тех пор была
+                инвалидация, значение могло устареть и не сохраняется.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (self._timer() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Метод для удаления записи из кэша.
+
+        Args:
+            key: ключ записи.
+        """
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Метод для очистки кэша и счетчиков."""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Метод для получения статистики кэша.
+
+        Returns:
+            Словарь с количеством попаданий, промахов, долей попаданий и текущим размером.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'size': len(self._data),
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
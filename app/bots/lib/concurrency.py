@@ -0,0 +1,124 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional
+
+from aiogram import Dispatcher, types
+
+
+class KeyedLock(object):
+    """Набор асинхронных блокировок по ключу.
+    Блокировка создается при первом обращении к ключу и удаляется, как только ее никто не держит и не ждет,
+    поэтому память расходуется только на активные ключи. Ожидающие получают блокировку в порядке обращения.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict = {}  # ключ -> [блокировка, количество держащих и ожидающих]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def acquire(self, key: Hashable) -> AsyncIterator[None]:
+        """Захват блокировки по ключу.
+
+        Args:
+            key: ключ блокировки.
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+def update_chat_id(update: types.Update) -> Optional[int]:
+    """Получение идентификатора чата, к которому относится обновление.
+
+    Args:
+        update: обновление Telegram.
+
+    Returns:
+        Идентификатор чата, пользователя (для обновлений вне чата) или None.
+    """
+    for message in (update.message, update.edited_message, update.channel_post, update.edited_channel_post):
+        if message:
+            return message.chat.id
+    if update.callback_query:
+        if update.callback_query.message:
+            return update.callback_query.message.chat.id
+        return update.callback_query.from_user.id
+    for event in (update.inline_query, update.chosen_inline_result, update.shipping_query, update.pre_checkout_query):
+        if event:
+            return event.from_user.id
+    return None
+
+
+class ChatOrderedProcessor(object):
+    """Обработчик обновлений, упорядоченный внутри чата и параллельный между чатами.
+    Обновления одного чата выполняются строго по очереди в порядке поступления, обновления разных чатов —
+    параллельно, но не более concurrency одновременно.
+    """
+
+    def __init__(self, handler: Callable[[types.Update], Awaitable[Any]], concurrency: int) -> None:
+        """Инициализация обработчика.
+
+        Args:
+            handler: корутина обработки одного обновления.
+            concurrency: максимальное количество одновременно обрабатываемых обновлений.
+        """
+        self.handler = handler
+        self.concurrency = concurrency
+        self.locks = KeyedLock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def install(cls, dispatcher: Dispatcher, concurrency: int) -> 'ChatOrderedProcessor':
+        """Замена стандартной обработки обновлений диспетчера на упорядоченную по чатам.
+
+        Args:
+            dispatcher: диспетчер бота.
+            concurrency: максимальное количество одновременно обрабатываемых обновлений.
+
+        Returns:
+            Установленный обработчик.
+        """
+        processor = cls(dispatcher.process_update, concurrency)
+        for handler_obj in dispatcher.updates_handler.handlers:
+            if handler_obj.handler == dispatcher.process_update:
+                dispatcher.updates_handler.unregister(handler_obj.handler)
+                break
+        dispatcher.updates_handler.register(processor.process)
+        return processor
+
+    @property
+    def active_chats(self) -> int:
+        """Количество чатов, обновления которых обрабатываются или ждут обработки."""
+        return len(self.locks)
+
+    async def process(self, update: types.Update) -> Any:
+        """Обработка обновления.
+
+        Args:
+            update: обновление Telegram.
+
+        Returns:
+            Результат обработчика.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        chat_id = update_chat_id(update)
+        if chat_id is None:
+            async with self._semaphore:
+                return await self.handler(update)
+
+        # сначала блокировка чата, затем семафор: ожидающие своей очереди в чате не занимают слоты
+        async with self.locks.acquire(chat_id):
+            async with self._semaphore:
+                return await self.handler(update)
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+class DatabaseExecutor(object):
+    """Выполнение синхронных запросов Django ORM из асинхронного кода в пуле потоков.
+    sync_to_async по умолчанию (и асинхронные методы ORM Django 4.2 — aget, asave и т.п.) выполняет все вызовы
+    в одном общем потоке, из-за чего запросы всех чатов идут строго по одному. Пул позволяет выполнять
+    до max_workers запросов одновременно. Каждый поток держит свое соединение с БД, которое переиспользуется
+    между вызовами в пределах CONN_MAX_AGE.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        """Инициализация пула.
+
+        Args:
+            max_workers: количество потоков (и соединений с БД).
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    @staticmethod
+    def _call(func: Callable[..., Any], *args, **kwargs) -> Any:
+        # закрываем соединения с истекшим CONN_MAX_AGE или ошибкой, как это делает Django на границах запроса
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполнение функции в пуле потоков.
+
+        Args:
+            func: синхронная функция, обращающаяся к БД.
+            args: позиционные аргументы функции.
+            kwargs: именованные аргументы функции.
+
+        Returns:
+            Результат функции.
+        """
+        return await sync_to_async(self._call, thread_sensitive=False, executor=self._executor)(func, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        """Остановка пула после завершения выполняющихся запросов."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,146 @@
+import asyncio
+import copy
+import json
+import pathlib
+import sqlite3
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher.storage import BaseStorage
+
+from app.bots.lib.common import EnumBase
+
+
+class FSMStorageBackend(EnumBase):
+    MEMORY = 'memory'  # Состояния хранятся только в памяти процесса
+    SQLITE = 'sqlite'  # Состояния дублируются в локальный файл SQLite и переживают перезапуск
+
+
+class SQLiteStorage(MemoryStorage):
+    """Хранилище состояний на основе MemoryStorage с фиксацией изменений в локальном файле SQLite.
+    Чтение выполняется из памяти, а каждое изменение записывается в файл в отдельном потоке,
+    поэтому состояния переживают перезапуск бота и не блокируют цикл событий.
+    """
+
+    def __init__(self, path: typing.Union[pathlib.Path, str]) -> None:
+        """Инициализация хранилища и загрузка сохраненных состояний.
+
+        Args:
+            path: путь к файлу базы данных SQLite.
+        """
+        super().__init__()
+        self.path = pathlib.Path(path)
+        # один поток сохраняет порядок записей и соответствует модели потоков sqlite3
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fsm-storage')
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS fsm_state ('
+            'chat TEXT NOT NULL, user TEXT NOT NULL, state TEXT, data TEXT NOT NULL, bucket TEXT NOT NULL, '
+            'PRIMARY KEY (chat, user))'
+        )
+        self._connection.commit()
+        self._load()
+
+    def _load(self) -> None:
+        """Метод для загрузки всех сохраненных состояний в память."""
+        for chat, user, state, data, bucket in self._connection.execute(
+                'SELECT chat, user, state, data, bucket FROM fsm_state'):
+            self.data.setdefault(chat, {})[user] = {
+                'state': state, 'data': json.loads(data), 'bucket': json.loads(bucket)}
+
+    def _write(self, chat: str, user: str, record: dict) -> None:
+        """Метод для записи состояния пользователя в файл. Выполняется в потоке хранилища.
+
+        Args:
+            chat: идентификатор чата.
+            user: идентификатор пользователя.
+            record: состояние, данные и bucket пользователя.
+        """
+        if record['state'] is None and not record['data'] and not record['bucket']:
+            self._connection.execute('DELETE FROM fsm_state WHERE chat = ? AND user = ?', (chat, user))
+        else:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO fsm_state (chat, user, state, data, bucket) VALUES (?, ?, ?, ?, ?)',
+                (chat, user, record['state'], json.dumps(record['data']), json.dumps(record['bucket'])))
+        self._connection.commit()
+
+    async def _persist(self, chat: typing.Union[str, int, None], user: typing.Union[str, int, None]) -> None:
+        """Метод для фиксации текущего состояния пользователя в файле.
+
+        Args:
+            chat: идентификатор чата.
+            user: идентификатор пользователя.
+        """
+        chat, user = self.resolve_address(chat=chat, user=user)
+        record = copy.deepcopy(self.data[chat][user])
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._write, chat, user, record)
+
+    async def set_state(self, *,
+                        chat: typing.Union[str, int, None] = None,
+                        user: typing.Union[str, int, None] = None,
+                        state: typing.AnyStr = None):
+        await super().set_state(chat=chat, user=user, state=state)
+        await self._persist(chat, user)
+
+    async def set_data(self, *,
+                       chat: typing.Union[str, int, None] = None,
+                       user: typing.Union[str, int, None] = None,
+                       data: typing.Dict = None):
+        await super().set_data(chat=chat, user=user, data=data)
+        await self._persist(chat, user)
+
+    async def update_data(self, *,
+                          chat: typing.Union[str, int, None] = None,
+                          user: typing.Union[str, int, None] = None,
+                          data: typing.Dict = None, **kwargs):
+        await super().update_data(chat=chat, user=user, data=data, **kwargs)
+        await self._persist(chat, user)
+
+    async def reset_state(self, *,
+                          chat: typing.Union[str, int, None] = None,
+                          user: typing.Union[str, int, None] = None,
+                          with_data: typing.Optional[bool] = True):
+        chat, user = self.resolve_address(chat=chat, user=user)
+        self.data[chat][user]['state'] = None
+        if with_data:
+            self.data[chat][user]['data'] = {}
+        await self._persist(chat, user)
+
+    async def set_bucket(self, *,
+                         chat: typing.Union[str, int, None] = None,
+                         user: typing.Union[str, int, None] = None,
+                         bucket: typing.Dict = None):
+        await super().set_bucket(chat=chat, user=user, bucket=bucket)
+        await self._persist(chat, user)
+
+    async def update_bucket(self, *,
+                            chat: typing.Union[str, int, None] = None,
+                            user: typing.Union[str, int, None] = None,
+                            bucket: typing.Dict = None, **kwargs):
+        await super().update_bucket(chat=chat, user=user, bucket=bucket, **kwargs)
+        await self._persist(chat, user)
+
+    async def close(self):
+        await super().close()
+        self._executor.shutdown(wait=True)
+        self._connection.close()
+
+
+def create_storage(backend: str, path: typing.Union[pathlib.Path, str, None] = None) -> BaseStorage:
+    """Фабрика хранилищ состояний диалога.
+
+    Args:
+        backend: тип хранилища (см. FSMStorageBackend).
+        path: путь к файлу для хранилищ с сохранением на диск.
+
+    Returns:
+        Экземпляр хранилища.
+    """
+    if backend == FSMStorageBackend.MEMORY:
+        return MemoryStorage()
+    if backend == FSMStorageBackend.SQLITE:
+        return SQLiteStorage(path)
+    raise ValueError(f'Unknown FSM storage backend: {backend}')
@@ -0,0 +1,326 @@
+import functools
+import logging
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiohttp import web
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+# границы корзин гистограмм длительности, секунды
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+
+def _escape_label_value(value: Any) -> str:
+    # экранирование значения метки по текстовому формату Prometheus: обратная косая черта, кавычка и перевод строки
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+class Metric(ABC):
+    """Базовый класс метрики в формате Prometheus."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        """Инициализация метрики.
+
+        Args:
+            name: имя метрики.
+            documentation: описание метрики.
+            labelnames: имена меток.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # значения изменяются из цикла событий и из потоков пула БД (учет запросов)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple]:
+        """Значения метрики: кортежи (имя, метки, значение)."""
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонно возрастающий счетчик."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Увеличение счетчика.
+
+        Args:
+            amount: величина увеличения.
+            labels: значения меток.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[tuple]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: dict = {}  # метки -> [количество по корзинам, сумма, количество]
+
+    def observe(self, value: float, **labels) -> None:
+        """Учет наблюдения.
+
+        Args:
+            value: наблюдаемое значение.
+            labels: значения меток.
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterator[tuple]:
+        with self._lock:
+            # согласованный снимок: количество по корзинам, сумма и количество одного набора меток
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', {**labels, 'le': '+Inf' if bound == float('inf') else bound}, cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class CallbackMetric(Metric):
+    """Метрика, значение которой вычисляется при каждом экспорте (размер очереди, накопленная статистика).
+    Для каждого набора меток задается своя функция, например по одной на каждый бот процесса.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str = 'gauge') -> None:
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.funcs: dict = {}  # кортеж пар (метка, значение) -> функция
+
+    def set_function(self, func: Callable[[], float], labels: dict) -> None:
+        self.funcs[tuple(labels.items())] = func
+
+    def samples(self) -> Iterator[tuple]:
+        for labels, func in list(self.funcs.items()):
+            try:
+                yield self.name, dict(labels), func()
+            except Exception:
+                logger.exception('Cause exception while collecting metric %s', self.name)
+
+
+class MetricsRegistry(object):
+    """Набор метрик процесса с экспортом в текстовом формате Prometheus."""
+
+    def __init__(self) -> None:
+        self._metrics: dict = {}
+
+    def _register(self, metric: Metric) -> Any:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, func: Callable[[], float], kind: str = 'gauge',
+                 **labels) -> None:
+        """Регистрация вычисляемой метрики, повторная регистрация с теми же метками заменяет функцию."""
+        metric = self._metrics.get(name)
+        if not isinstance(metric, CallbackMetric):
+            metric = self._metrics[name] = CallbackMetric(name, documentation, kind)
+        metric.set_function(func, labels)
+
+    def render(self) -> str:
+        """Экспорт всех метрик.
+
+        Returns:
+            Текст в формате Prometheus.
+        """
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+registry = MetricsRegistry()
+
+handler_duration = registry.histogram(
+    'bot_handler_duration_seconds', 'Время выполнения обработчика сообщения', ['handler'])
+handler_errors = registry.counter('bot_handler_errors_total', 'Количество ошибок в обработчиках', ['handler'])
+update_duration = registry.histogram('bot_update_duration_seconds', 'Время обработки обновления')
+update_db_queries = registry.histogram(
+    'bot_update_db_queries', 'Количество запросов к БД на обновление', buckets=QUERY_COUNT_BUCKETS)
+update_db_duration = registry.histogram('bot_update_db_duration_seconds', 'Время запросов к БД на обновление')
+db_queries = registry.counter('bot_db_queries_total', 'Количество запросов к БД')
+db_query_duration = registry.histogram('bot_db_query_duration_seconds', 'Время выполнения запроса к БД')
+
+# статистика запросов к БД текущего обновления: [количество, время]; передается в потоки пула вместе с контекстом
+_update_db_stats: ContextVar[Optional[list]] = ContextVar('update_db_stats', default=None)
+
+
+def _db_query_wrapper(execute, sql, params, many, context):
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - started
+        db_queries.inc()
+        db_query_duration.observe(duration)
+        stats = _update_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += duration
+
+
+def _install_db_wrapper(sender, connection, **kwargs) -> None:
+    if _db_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_query_wrapper)
+
+
+def instrument_db() -> None:
+    """Учет запросов к БД во всех соединениях процесса, включая соединения потоков пула."""
+    connection_created.connect(_install_db_wrapper, dispatch_uid='bot_metrics_db_wrapper')
+
+
+def instrument_handler(handler: Callable) -> Callable:
+    """Обертка обработчика, учитывающая время его выполнения и ошибки.
+
+    Args:
+        handler: корутина-обработчик aiogram.
+
+    Returns:
+        Обертка с той же сигнатурой.
+    """
+    name = getattr(handler, '__name__', repr(handler))
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            handler_errors.inc(handler=name)
+            raise
+        finally:
+            handler_duration.observe(perf_counter() - started, handler=name)
+
+    return wrapper
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Учет времени обработки обновления и запросов к БД, выполненных при его обработке."""
+
+    async def on_pre_process_update(self, update: types.Update, data: dict) -> None:
+        stats = [0, 0.0]
+        _update_db_stats.set(stats)
+        data['_metrics'] = (perf_counter(), stats)
+
+    async def on_post_process_update(self, update: types.Update, results: list, data: dict) -> None:
+        started, stats = data.pop('_metrics', (None, None))
+        if started is None:
+            return
+        update_duration.observe(perf_counter() - started)
+        update_db_queries.observe(stats[0])
+        update_db_duration.observe(stats[1])
+
+
+class StartupMiddleware(BaseMiddleware):
+    """Отметка получения первого обновления процессом для замера холодного старта."""
+
+    def __init__(self, timer: Any) -> None:
+        """Инициализация middleware.
+
+        Args:
+            timer: замер старта процесса (StartupTimer).
+        """
+        super().__init__()
+        self.timer = timer
+
+    async def on_pre_process_update(self, update: types.Update, data: dict) -> None:
+        self.timer.update_received()
+
+
+class MetricsServer(object):
+    """HTTP-сервер, отдающий метрики процесса бота по адресу /metrics."""
+
+    def __init__(self, metrics: MetricsRegistry, host: str, port: int) -> None:
+        """Инициализация сервера.
+
+        Args:
+            metrics: экспортируемые метрики.
+            host: адрес сервера.
+            port: порт сервера.
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.metrics.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+from collections import Counter, deque
+from time import perf_counter, strftime
+from types import FrameType
+from typing import Optional
+
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+
+logger = logging.getLogger(__name__)
+
+_HANDLE_RUN_CODE = asyncio.events.Handle._run.__code__
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _running_stack(frame: Optional[FrameType]) -> tuple:
+    # стек выполняемого шага задачи: кадры потока цикла событий выше Handle._run
+    names = []
+    while frame is not None and frame.f_code is not _HANDLE_RUN_CODE:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+
+def _awaiting_stack(task: asyncio.Task) -> tuple:
+    # стек приостановленной задачи: цепочка корутин, ожидающих друг друга
+    names = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return tuple(names)
+
+
+class _UpdateProfile(object):
+    __slots__ = ('started', 'sampled', 'handler', 'samples')
+
+    def __init__(self, sampled: bool) -> None:
+        self.started = perf_counter()
+        self.sampled = sampled
+        self.handler = 'unhandled'
+        self.samples: Counter = Counter()
+
+
+class UpdateProfiler(BaseMiddleware):
+    """Выборочный профилировщик обработки обновлений.
+    Поток-сэмплер с заданным периодом снимает стек каждого профилируемого обновления: выполняемого в цикле
+    событий — по стеку потока, ожидающего БД или Telegram — по цепочке корутин, поэтому профиль показывает
+    полное время обработки. Профилируется доля обновлений и (или) все обновления, из которых сохраняются
+    только медленные. Профили агрегируются с меткой обработчика и периодически сохраняются в файлы
+    формата folded stacks (flamegraph.pl, speedscope, inferno), старые файлы удаляются.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            sample_rate: float,
+            slow_threshold: float,
+            interval: float,
+            flush_interval: float,
+            max_files: int,
+    ) -> None:
+        """Инициализация профилировщика.
+
+        Args:
+            directory: каталог для файлов профилей.
+            sample_rate: доля профилируемых обновлений от 0 до 1.
+            slow_threshold: длительность обработки в секундах, начиная с которой профиль сохраняется
+                для любого обновления, 0 - выключено.
+            interval: период снятия стеков в секундах.
+            flush_interval: период сохранения агрегированного профиля в файл в секундах.
+            max_files: максимальное количество хранимых файлов профилей, не меньше 1.
+        """
+        if max_files < 1:
+            raise ValueError(f'max_files must be at least 1, got {max_files}')
+        super().__init__()
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.max_files = max_files
+        self.profiled = 0
+        self._active: dict = {}  # задача -> _UpdateProfile, изменяется и читается только в цикле событий
+        self._aggregate: Counter = Counter()
+        self._flushed_at = perf_counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._has_active = threading.Event()
+        self._pending: deque = deque()  # снимки сэмплера (выполняемая задача, ее стек), ожидающие учета
+        self._scheduled = threading.Event()  # учет снимков запланирован в цикле событий
+        self._stopped = threading.Event()
+
+    async def on_pre_process_update(self, update: types.Update, data: dict) -> None:
+        sampled = random.random() < self.sample_rate
+        if not sampled and not self.slow_threshold:
+            return
+        if self._sampler is None:
+            self._start_sampler()
+        self._active[asyncio.current_task()] = _UpdateProfile(sampled)
+        self._has_active.set()
+
+    async def on_process_message(self, message: types.Message, data: dict) -> None:
+        profile = self._active.get(asyncio.current_task())
+        if profile is not None:
+            handler = current_handler.get()
+            profile.handler = getattr(handler, '__name__', repr(handler))
+
+    async def on_post_process_update(self, update: types.Update, results: list, data: dict) -> None:
+        profile = self._active.pop(asyncio.current_task(), None)
+        if not self._active:
+            self._has_active.clear()
+        if profile is None:
+            return
+
+        duration = perf_counter() - profile.started
+        if profile.sampled or duration >= self.slow_threshold:
+            self.profiled += 1
+            for stack, count in profile.samples.items():
+                self._aggregate[';'.join((profile.handler,) + stack)] += count
+
+        if self._aggregate and perf_counter() - self._flushed_at >= self.flush_interval:
+            aggregate, self._aggregate = self._aggregate, Counter()
+            self._flushed_at = perf_counter()
+            self._loop.run_in_executor(None, self._write, aggregate)
+
+    def _start_sampler(self) -> None:
+        self._loop = asyncio.get_event_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._sample, name='update-profiler', daemon=True)
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.is_set():
+            if not self._has_active.wait(1):
+                continue
+            # Стек выполняемого шага снимается в потоке-сэмплере по кадрам потока цикла событий. Профили
+            # обновляются в цикле событий: там же снимаются стеки ожидающих задач — цепочку корутин выполняемой
+            # задачи нельзя читать из другого потока (cr_await выполняющейся корутины читает ее незафиксированный
+            # стек), а счетчики не изменяются во время агрегации.
+            # Пока цикл событий занят, снимки накапливаются и учитываются одним вызовом.
+            running = asyncio.current_task(self._loop)
+            stack = _running_stack(sys._current_frames().get(self._loop_thread_id)) if running is not None else ()
+            self._pending.append((running, stack))
+            if not self._scheduled.is_set():
+                self._scheduled.set()
+                try:
+                    self._loop.call_soon_threadsafe(self._record)
+                except RuntimeError:  # цикл событий закрыт
+                    break
+            self._stopped.wait(self.interval)
+
+    def _record(self) -> None:
+        self._scheduled.clear()
+        while self._pending:
+            running, running_stack = self._pending.popleft()
+            for task, profile in self._active.items():
+                stack = running_stack if task is running else _awaiting_stack(task)
+                if stack:
+                    profile.samples[stack] += 1
+
+    def _write(self, aggregate: Counter) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'profile-{os.getpid()}-{strftime("%Y%m%d-%H%M%S")}.folded')
+        with open(path, 'a', encoding='utf-8') as file:
+            file.writelines(f'{stack} {count}\n' for stack, count in aggregate.most_common())
+
+        files = sorted(
+            (os.path.join(self.directory, name) for name in os.listdir(self.directory)
+             if name.startswith('profile-') and name.endswith('.folded')),
+            key=os.path.getmtime,
+        )
+        for old_path in files[:-self.max_files]:
+            os.remove(old_path)
+        logger.info('Profile of %s updates saved to %s', self.profiled, path)
+
+    def close(self) -> None:
+        """Остановка сэмплера и сохранение накопленного профиля."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._aggregate:
+            self._write(self._aggregate)
+            self._aggregate = Counter()
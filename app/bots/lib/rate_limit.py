@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+from itertools import count
+from time import monotonic
+from typing import Callable, Optional
+
+
+class TokenBucket(object):
+    """Ограничитель частоты по алгоритму token bucket.
+    Токены восполняются со скоростью rate в секунду до capacity. Резервирование допускает
+    отрицательный баланс, что дает ожидающим очередь в порядке обращения.
+    """
+
+    def __init__(self, rate: float, capacity: float, timer: Callable[[], float] = monotonic) -> None:
+        """Инициализация ограничителя.
+
+        Args:
+            rate: скорость восполнения токенов в секунду.
+            capacity: максимальное количество накопленных токенов (допустимый всплеск).
+            timer: функция получения текущего времени.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._tokens = capacity
+        self._updated_at = timer()
+
+    def _refill(self) -> None:
+        now = self._timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def is_idle(self) -> bool:
+        """Признак полностью восполненного ограничителя, который можно удалить без потери состояния."""
+        self._refill()
+        return self._tokens >= self.capacity
+
+    def delay(self) -> float:
+        """Время в секундах до появления свободного токена."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Попытка взять токен без ожидания.
+
+        Returns:
+            True - токен взят, False - токенов нет.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def reserve(self) -> float:
+        """Резервирование токена.
+
+        Returns:
+            Время в секундах, которое нужно подождать перед использованием зарезервированного токена.
+        """
+        self._refill()
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Приостановка выдачи токенов на заданное время (например, по ответу RetryAfter).
+
+        Args:
+            seconds: длительность паузы.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class PriorityLimiter(object):
+    """Ограничитель частоты с приоритетной очередью ожидающих.
+    Освободившийся токен получает ожидающий с наименьшим значением приоритета, при равных — первый пришедший.
+    """
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        """Инициализация ограничителя.
+
+        Args:
+            bucket: ограничитель частоты, из которого выдаются токены.
+        """
+        self.bucket = bucket
+        self._waiters: list = []
+        self._sequence = count()
+        self._pump_task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество ожидающих токен."""
+        return len(self._waiters)
+
+    async def acquire(self, priority: int) -> None:
+        """Получение токена с учетом приоритета.
+
+        Args:
+            priority: приоритет, меньшее значение обслуживается раньше.
+        """
+        if not self._waiters and self.bucket.try_acquire():
+            return
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+        await future
+
+    async def _pump(self) -> None:
+        while self._waiters:
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.bucket.try_acquire()
+                future.set_result(None)
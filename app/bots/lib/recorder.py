@@ -0,0 +1,227 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+
+logger = logging.getLogger(__name__)
+
+# поля с персональными данными, значения которых маскируются
+MASKED_KEYS = frozenset({'first_name', 'last_name', 'username', 'phone_number', 'title', 'bio', 'caption', 'vcard',
+                         'address'})
+# объекты, все строковые значения которых маскируются (отправленные пользователем контакт и место)
+MASKED_OBJECTS = frozenset({'contact', 'venue'})
+# координаты, которые заменяются нулями
+COORDINATE_KEYS = frozenset({'latitude', 'longitude'})
+# объекты, идентификаторы которых заменяются псевдонимами
+PSEUDONYMIZED_OBJECTS = frozenset({'chat', 'from', 'user', 'sender_chat', 'forward_from', 'forward_from_chat'})
+
+
+def mask_text(text: str) -> str:
+    """Маскирование текста с сохранением классов символов: буквы заменяются буквами того же алфавита и регистра,
+    цифры — цифрами, остальные символы сохраняются. Поэтому проверки формата (имя, телефон) дают тот же результат.
+
+    Args:
+        text: исходный текст.
+
+    Returns:
+        Замаскированный текст той же длины.
+    """
+    masked = []
+    for char in text:
+        if char.isdigit():
+            masked.append('0')
+        elif 'а' <= char.lower() <= 'я' or char.lower() == 'ё':
+            masked.append('Ж' if char.isupper() else 'ж')
+        elif char.isalpha():
+            masked.append('X' if char.isupper() else 'x')
+        else:
+            masked.append(char)
+    return ''.join(masked)
+
+
+class UpdateScrubber(object):
+    """Удаление персональных данных из обновлений Telegram.
+    Идентификаторы пользователей и чатов заменяются стабильными псевдонимами (ключевой хэш), имена, телефоны
+    и произвольный текст маскируются. Текст, признанный безопасным (команды, кнопки клавиатур), сохраняется,
+    чтобы запись можно было воспроизвести.
+    """
+
+    def __init__(self, key: bytes, is_safe_text: Callable[[str], bool]) -> None:
+        """Инициализация.
+
+        Args:
+            key: секретный ключ хэширования идентификаторов.
+            is_safe_text: функция, определяющая текст сообщения, который можно сохранить без маскирования.
+        """
+        self.key = key[:64]
+        self.is_safe_text = is_safe_text
+
+    def pseudonym(self, value: int) -> int:
+        """Псевдоним идентификатора: положительное 32-битное число, стабильное для одного ключа."""
+        digest = hashlib.blake2b(str(value).encode(), key=self.key, digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & 0x7FFFFFFF or 1
+
+    def scrub(self, value: Any, key: Optional[str] = None, masked: bool = False) -> Any:
+        """Рекурсивная очистка значения обновления.
+
+        Args:
+            value: значение (словарь, список или скаляр).
+            key: имя поля, в котором находится значение.
+            masked: значение находится внутри объекта, все строки которого маскируются.
+
+        Returns:
+            Очищенная копия значения.
+        """
+        if isinstance(value, dict):
+            masked = masked or key in MASKED_OBJECTS
+            scrubbed = {k: self.scrub(v, k, masked) for k, v in value.items()}
+            if key in PSEUDONYMIZED_OBJECTS and isinstance(value.get('id'), int):
+                scrubbed['id'] = self.pseudonym(value['id'])
+            return scrubbed
+        if isinstance(value, list):
+            return [self.scrub(item, key, masked) for item in value]
+        if isinstance(value, str):
+            if masked or key in MASKED_KEYS:
+                return mask_text(value)
+            if key == 'text':
+                return self.scrub_text(value)
+        if key in COORDINATE_KEYS and isinstance(value, (int, float)):
+            return 0.0
+        if key == 'user_id' and isinstance(value, int):
+            return self.pseudonym(value)
+        return value
+
+    def scrub_text(self, text: str) -> str:
+        """Маскирование текста сообщения. У команды с аргументами сохраняется только сама команда,
+        если она признана безопасной, аргументы (например, телефон или имя) маскируются.
+
+        Args:
+            text: текст сообщения.
+
+        Returns:
+            Очищенный текст той же длины.
+        """
+        if self.is_safe_text(text):
+            return text
+        match = re.match(r'(/\S+)(\s.*)', text, re.DOTALL)
+        if match and self.is_safe_text(match.group(1)):
+            return match.group(1) + mask_text(match.group(2))
+        return mask_text(text)
+
+
+def recording_path(template: str, bot: str, pid: int) -> str:
+    """Путь файла записи, уникальный для бота и процесса.
+    Несколько ботов и процессов-обработчиков, дописывающих один gzip-файл, перемешивают его потоки и портят запись,
+    поэтому отсутствующие в шаблоне {bot} и {pid} добавляются к имени файла перед расширением.
+
+    Args:
+        template: шаблон пути, может содержать {bot} и {pid}.
+        bot: идентификатор бота.
+        pid: идентификатор процесса.
+
+    Returns:
+        Путь к файлу записи.
+    """
+    missing = ''.join(f'-{{{field}}}' for field in ('bot', 'pid') if f'{{{field}}}' not in template)
+    if missing:
+        directory, name = os.path.split(template)
+        stem, dot, extension = name.partition('.')
+        template = os.path.join(directory, stem + missing + dot + extension)
+    return template.format(bot=bot, pid=pid)
+
+
+class UpdateRecorder(BaseMiddleware):
+    """Запись входящих обновлений в сжатый поток JSONL для последующего воспроизведения.
+    Каждая строка — объект с временем получения (ts) и очищенным от персональных данных обновлением (update).
+    Подключается к диспетчеру как middleware: в цикле событий обновление только ставится в очередь,
+    очистка, сжатие и запись на диск выполняются отдельным потоком в порядке поступления.
+    """
+
+    def __init__(self, path: str, scrubber: UpdateScrubber, flush_every: int = 100, queue_size: int = 10000) -> None:
+        """Инициализация.
+
+        Args:
+            path: путь к файлу записи (.jsonl.gz), запись дописывается в конец.
+            scrubber: очистка обновлений от персональных данных.
+            flush_every: количество обновлений, после которого буфер сбрасывается на диск.
+            queue_size: максимальное количество обновлений в очереди записи, при переполнении обновления
+                не записываются.
+        """
+        super().__init__()
+        self.path = path
+        self.scrubber = scrubber
+        self.flush_every = flush_every
+        self.recorded = 0
+        self.dropped = 0
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write, name='update-recorder', daemon=True)
+        self._writer.start()
+
+    async def on_pre_process_update(self, update: types.Update, data: dict) -> None:
+        self.record(update)
+
+    def record(self, update: types.Update) -> None:
+        """Постановка обновления в очередь записи.
+
+        Args:
+            update: входящее обновление.
+        """
+        try:
+            self._queue.put_nowait((time.time(), update.to_python()))
+        except queue.Full:
+            # запись не должна задерживать обработку обновлений, если диск не успевает
+            self.dropped += 1
+
+    def _write(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            ts, update = item
+            try:
+                line = {'ts': ts, 'update': self.scrubber.scrub(update)}
+                self._file.write(json.dumps(line, ensure_ascii=False) + '\n')
+            except Exception:
+                logger.exception('Cause exception while recording update %s', update.get('update_id'))
+                continue
+            self.recorded += 1
+            if not self.recorded % self.flush_every:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Запись обновлений из очереди, сброс буфера и закрытие файла записи."""
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        if self.dropped:
+            logger.warning('Recording %s: %s updates dropped', self.path, self.dropped)
+
+
+def read_recording(path: str) -> Iterator[dict]:
+    """Чтение записи обновлений.
+
+    Args:
+        path: путь к файлу записи.
+
+    Returns:
+        Итератор объектов с полями ts и update.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        try:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, json.JSONDecodeError):
+            # запись оборвана, например, при аварийной остановке бота
+            logger.warning('Recording %s is truncated', path)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from enum import IntEnum
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable
+
+from aiogram import Bot, types
+from aiogram.utils.exceptions import RetryAfter
+
+from app.bots.lib.rate_limit import PriorityLimiter, TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+
+class SendPriority(IntEnum):
+    INTERACTIVE = 0  # Ответы на сообщения пользователей
+    BULK = 10  # Массовые рассылки (напоминания, объявления)
+
+
+class OutboundSender(object):
+    """Слой исходящих сообщений бота.
+    Соблюдает глобальный лимит Telegram и лимит на чат (token bucket), пропускает ответы пользователям
+    раньше массовых рассылок и автоматически повторяет отправку после ответа RetryAfter.
+    """
+
+    # количество чатов, после которого из памяти удаляются ограничители простаивающих чатов
+    CHAT_BUCKETS_PRUNE_THRESHOLD = 10000
+
+    def __init__(
+            self,
+            bot: Bot,
+            global_rate: float,
+            chat_rate: float,
+            chat_burst: float,
+            max_retries: int,
+    ) -> None:
+        """Инициализация слоя исходящих сообщений.
+
+        Args:
+            bot: экземпляр бота.
+            global_rate: максимальное количество сообщений в секунду для всего бота.
+            chat_rate: максимальное количество сообщений в секунду для одного чата.
+            chat_burst: допустимый всплеск сообщений в один чат.
+            max_retries: максимальное количество повторов после RetryAfter.
+        """
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.limiter = PriorityLimiter(TokenBucket(rate=global_rate, capacity=global_rate))
+        self._chat_buckets: dict = {}
+        self._chat_waiting = 0
+        self.sent = 0
+        self.retry_after = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.CHAT_BUCKETS_PRUNE_THRESHOLD:
+                self._chat_buckets = {key: value for key, value in self._chat_buckets.items() if not value.is_idle}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+        return bucket
+
+    async def send(self, chat_id: Hashable, request: Callable[[], Awaitable[Any]], priority: SendPriority) -> Any:
+        """Выполнение запроса к Telegram с соблюдением лимитов.
+
+        Args:
+            chat_id: идентификатор чата получателя.
+            request: функция, создающая корутину запроса.
+            priority: приоритет сообщения.
+
+        Returns:
+            Результат запроса.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = monotonic()
+            delay = self._chat_bucket(chat_id).reserve()
+            if delay:
+                self._chat_waiting += 1
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    self._chat_waiting -= 1
+            await self.limiter.acquire(priority)
+
+            waited = monotonic() - started
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+            try:
+                result = await request()
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retry_after += 1
+                logger.warning('Flood control for chat %s, retry in %s s', chat_id, e.timeout)
+                # ограничение Telegram действует на весь бот: отправка в остальные чаты тоже приостанавливается
+                self._chat_bucket(chat_id).pause(e.timeout)
+                self.limiter.bucket.pause(e.timeout)
+                continue
+            self.sent += 1
+            return result
+
+    async def answer(self, message: types.Message, text: str, **kwargs) -> types.Message:
+        """Ответ на сообщение пользователя с интерактивным приоритетом.
+
+        Args:
+            message: входящее сообщение.
+            text: текст ответа.
+            kwargs: дополнительные параметры Message.answer (например, reply_markup).
+
+        Returns:
+            Отправленное сообщение.
+        """
+        return await self.send(message.chat.id, lambda: message.answer(text, **kwargs), SendPriority.INTERACTIVE)
+
+    async def send_message(
+            self, chat_id: int, text: str, priority: SendPriority = SendPriority.BULK, **kwargs) -> types.Message:
+        """Отправка сообщения в чат, по умолчанию с приоритетом массовой рассылки.
+
+        Args:
+            chat_id: идентификатор чата.
+            text: текст сообщения.
+            priority: приоритет сообщения.
+            kwargs: дополнительные параметры Bot.send_message.
+
+        Returns:
+            Отправленное сообщение.
+        """
+        return await self.send(chat_id, lambda: self.bot.send_message(chat_id, text, **kwargs), priority)
+
+    def stats(self) -> dict:
+        """Метод для получения метрик слоя исходящих сообщений.
+
+        Returns:
+            Словарь с глубиной очереди, количеством отправок и повторов и временем ожидания лимитов.
+        """
+        return {
+            'queue_depth': self.limiter.queue_depth + self._chat_waiting,
+            'sent': self.sent,
+            'retry_after': self.retry_after,
+            'wait_time_avg': self.wait_time_total / self.sent if self.sent else 0.0,
+            'wait_time_max': self.wait_time_max,
+        }
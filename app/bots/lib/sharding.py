@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+from time import monotonic
+from typing import Any, Callable, List, Optional, Sequence
+
+from aiogram import Bot, Dispatcher, types
+
+from app.bots.lib.concurrency import update_chat_id
+
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(update: types.Update, shards: int) -> int:
+    """Номер процесса-обработчика, которому принадлежит обновление.
+
+    Args:
+        update: обновление Telegram.
+        shards: количество процессов-обработчиков.
+
+    Returns:
+        Номер процесса от 0 до shards - 1. Обновления одного чата всегда попадают в один процесс,
+        обновления вне чата распределяются по номеру обновления.
+    """
+    chat_id = update_chat_id(update)
+    return (chat_id if chat_id is not None else update.update_id) % shards
+
+
+class ShardRouter(object):
+    """Распределение обновлений по процессам-обработчикам по идентификатору чата.
+    Чат всегда обслуживает один процесс, поэтому порядок обработки его обновлений и состояние диалога
+    в памяти процесса сохраняются. При переполнении очереди процесса прием обновлений приостанавливается.
+    """
+
+    def __init__(self, queues: Sequence[Any]) -> None:
+        """Инициализация распределителя.
+
+        Args:
+            queues: очереди процессов-обработчиков (multiprocessing.Queue), по одной на процесс.
+        """
+        self.queues = queues
+        self.routed = [0] * len(queues)
+        self._pending = 0
+        self._locks: Optional[list] = None
+
+    def install(self, dispatcher: Dispatcher, bot_index: int) -> None:
+        """Замена обработки обновлений диспетчера на передачу в процессы-обработчики.
+
+        Args:
+            dispatcher: диспетчер, принимающий обновления бота (polling или webhook).
+            bot_index: номер бота, по которому процесс-обработчик выбирает свой диспетчер.
+        """
+        async def route(update: types.Update) -> None:
+            await self.route(bot_index, update)
+
+        for handler_obj in dispatcher.updates_handler.handlers:
+            if handler_obj.handler == dispatcher.process_update:
+                dispatcher.updates_handler.unregister(handler_obj.handler)
+                break
+        dispatcher.updates_handler.register(route)
+
+    async def route(self, bot_index: int, update: types.Update) -> None:
+        """Передача обновления процессу-обработчику его чата.
+
+        Args:
+            bot_index: номер бота, которому адресовано обновление.
+            update: обновление Telegram.
+        """
+        if self._locks is None:
+            self._locks = [asyncio.Lock() for _ in self.queues]
+
+        shard = shard_for(update, len(self.queues))
+        item = (bot_index, update.to_python())
+        self._pending += 1
+        try:
+            # блокировка сохраняет порядок обновлений, ожидающих места в переполненной очереди
+            async with self._locks[shard]:
+                try:
+                    self.queues[shard].put_nowait(item)
+                except queue.Full:
+                    await asyncio.get_event_loop().run_in_executor(None, self.queues[shard].put, item)
+        finally:
+            self._pending -= 1
+        self.routed[shard] += 1
+
+    async def join(self, interval: float = 0.01) -> None:
+        """Ожидание передачи всех принятых обновлений в очереди процессов, например перед остановкой."""
+        while self._pending:
+            await asyncio.sleep(interval)
+
+
+class ShardWorker(object):
+    """Обработка обновлений в процессе-обработчике.
+    Обновления читаются из межпроцессной очереди пачками в потоке пула, каждое обрабатывается в отдельной задаче
+    диспетчером бота, которому оно адресовано. None в очереди — сигнал завершения после обработки прочитанного.
+    """
+
+    POLL_TIMEOUT = 0.5  # секунды, период проверки признака остановки при пустой очереди
+
+    def __init__(self, updates: Any, dispatchers: Sequence[Dispatcher], max_pending: int,
+                 batch_size: int = 100) -> None:
+        """Инициализация обработчика.
+
+        Args:
+            updates: очередь обновлений процесса (multiprocessing.Queue) с элементами (номер бота, обновление).
+            dispatchers: диспетчеры ботов по номерам.
+            max_pending: максимальное количество прочитанных, но не обработанных обновлений.
+            batch_size: максимальное количество обновлений, читаемых из очереди за раз.
+        """
+        self.updates = updates
+        self.dispatchers = dispatchers
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.processed = 0
+        self._stopping = False
+        self._tasks: set = set()
+
+    def stop(self) -> None:
+        """Остановка чтения очереди, уже прочитанные обновления дообрабатываются."""
+        self._stopping = True
+
+    def _read(self) -> list:
+        items = []
+        try:
+            items.append(self.updates.get(timeout=self.POLL_TIMEOUT))
+            while len(items) < self.batch_size:
+                items.append(self.updates.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    async def run(self) -> None:
+        """Чтение и обработка обновлений до сигнала завершения."""
+        loop = asyncio.get_event_loop()
+        while not self._stopping:
+            for item in await loop.run_in_executor(None, self._read):
+                if item is None:
+                    self._stopping = True
+                    break
+                if len(self._tasks) >= self.max_pending:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                bot_index, data = item
+                # отдельная задача на каждое обновление, как при polling
+                task = asyncio.ensure_future(self._process(self.dispatchers[bot_index], types.Update(**data)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def _process(self, dispatcher: Dispatcher, update: types.Update) -> None:
+        Bot.set_current(dispatcher.bot)
+        Dispatcher.set_current(dispatcher)
+        try:
+            await dispatcher.updates_handler.notify(update)
+        except Exception:
+            logger.exception('Cause exception while processing update %s', update.update_id)
+        finally:
+            self.processed += 1
+
+
+class WorkerSupervisor(object):
+    """Запуск процессов-обработчиков и надзор за ними.
+    У каждого процесса своя очередь обновлений. Завершившийся процесс перезапускается с той же очередью,
+    задержка перед перезапуском удваивается при повторных падениях, чтобы не перезапускать процесс в цикле.
+    """
+
+    def __init__(
+            self,
+            target: Callable[[int, Any], None],
+            workers: int,
+            queue_size: int,
+            restart_delay: float,
+            max_restart_delay: float,
+            check_interval: float = 1.0,
+            context: Any = None,
+    ) -> None:
+        """Инициализация надзора.
+
+        Args:
+            target: точка входа процесса, вызывается с номером процесса и его очередью; должна сериализоваться
+                pickle (функция уровня модуля или functools.partial от нее).
+            workers: количество процессов.
+            queue_size: максимальное количество обновлений в очереди процесса.
+            restart_delay: задержка перед первым перезапуском упавшего процесса в секундах.
+            max_restart_delay: максимальная задержка перед перезапуском; процесс, проработавший дольше,
+                считается стабильным, и задержка сбрасывается.
+            check_interval: период проверки процессов в секундах.
+            context: контекст multiprocessing, по умолчанию spawn (процессы не наследуют цикл событий
+                и соединения с БД родителя).
+        """
+        self.target = target
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.check_interval = check_interval
+        self._context = context or multiprocessing.get_context('spawn')
+        self.queues = [self._context.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.processes: List[Any] = [None] * workers
+        self.restarts = 0
+        self._failures = [0] * workers
+        self._started_at = [0.0] * workers
+        self._restart_at: List[Optional[float]] = [None] * workers
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Запуск всех процессов и наблюдения за ними."""
+        for index in range(len(self.queues)):
+            self._spawn(index)
+        self._watch_task = asyncio.ensure_future(self._watch())
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=self.target, args=(index, self.queues[index]), name=f'bot-worker-{index}')
+        process.start()
+        self.processes[index] = process
+        self._started_at[index] = monotonic()
+        logger.info('Worker %s started, pid %s', index, process.pid)
+
+    def check(self) -> None:
+        """Обнаружение завершившихся процессов и перезапуск тех, чья задержка истекла."""
+        now = monotonic()
+        for index, process in enumerate(self.processes):
+            restart_at = self._restart_at[index]
+            if restart_at is not None:
+                if now >= restart_at:
+                    self._restart_at[index] = None
+                    self.restarts += 1
+                    self._spawn(index)
+                continue
+            if process.is_alive():
+                continue
+
+            if now - self._started_at[index] >= self.max_restart_delay:
+                self._failures[index] = 0
+            delay = min(self.restart_delay * 2 ** self._failures[index], self.max_restart_delay)
+            self._failures[index] += 1
+            self._restart_at[index] = now + delay
+            logger.error('Worker %s (pid %s) exited with code %s, restart in %.1f s',
+                         index, process.pid, process.exitcode, delay)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self.check()
+            except Exception:
+                logger.exception('Cause exception while checking workers')
+
+    async def stop(self, timeout: float) -> None:
+        """Завершение процессов: каждый дообрабатывает обновления из своей очереди.
+        Процессы, не завершившиеся за timeout, останавливаются принудительно.
+
+        Args:
+            timeout: время ожидания завершения в секундах.
+        """
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+
+        loop = asyncio.get_event_loop()
+        deadline = monotonic() + timeout
+        alive = [(index, process) for index, process in enumerate(self.processes)
+                 if process is not None and process.is_alive()]
+
+        async def finish(index: int, process: Any) -> None:
+            try:
+                # очередь может быть заполнена: ждем места в потоке пула, не блокируя цикл событий
+                await loop.run_in_executor(None, lambda: self.queues[index].put(None, timeout=timeout))
+            except queue.Full:
+                pass
+            await loop.run_in_executor(None, process.join, max(deadline - monotonic(), 0))
+            if process.is_alive():
+                logger.warning('Worker %s (pid %s) did not stop in %s s, terminating', index, process.pid, timeout)
+                process.terminate()
+                await loop.run_in_executor(None, process.join)
+
+        await asyncio.gather(*(finish(index, process) for index, process in alive))
+        for updates in self.queues:
+            updates.cancel_join_thread()  # необработанные обновления остановленных процессов не ждем
+            updates.close()
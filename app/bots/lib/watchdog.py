@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+from types import FrameType
+from typing import Iterator, Optional
+
+from app.bots.lib.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+_HANDLE_RUN_CODE = asyncio.events.Handle._run.__code__
+
+loop_lag = registry.histogram('bot_event_loop_lag_seconds', 'Задержка срабатывания таймеров цикла событий',
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+loop_blocks = registry.counter('bot_event_loop_blocks_total', 'Количество блокировок цикла событий дольше порога')
+
+
+@dataclass
+class LoopBlock:
+    """Блокировка цикла событий."""
+    duration: float  # секунды (нижняя оценка), уточняется, пока блокировка продолжается
+    stack: str  # стек потока цикла событий в момент обнаружения
+
+
+class LoopBlockedError(AssertionError):
+    """Цикл событий был заблокирован дольше порога."""
+
+
+class LoopWatchdog(object):
+    """Сторож цикла событий.
+    Корутина-пульс в цикле событий измеряет задержку своих таймеров, а отдельный поток следит за пульсом:
+    если пульс запаздывает, а цикл дольше порога выполняет один и тот же обратный вызов (синхронный ввод-вывод,
+    тяжелые вычисления), поток сохраняет стек цикла событий, указывающий на виновника.
+    """
+
+    def __init__(self, interval: float, threshold: float, history: int = 20) -> None:
+        """Инициализация сторожа.
+
+        Args:
+            interval: период пульса в секундах.
+            threshold: длительность блокировки в секундах, после которой сохраняется стек.
+            history: количество последних блокировок, хранимых в памяти.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.blocks: deque = deque(maxlen=history)
+        self.lag_max = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._beat_at: Optional[float] = None
+        self._heartbeat_task: Optional[asyncio.Future] = None
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Запуск сторожа.
+
+        Args:
+            loop: наблюдаемый цикл событий, по умолчанию текущий.
+        """
+        self._loop = loop or asyncio.get_event_loop()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.ensure_future(self._heartbeat(), loop=self._loop)
+        self._monitor_thread = threading.Thread(target=self._monitor, name='loop-watchdog', daemon=True)
+        self._monitor_thread.start()
+
+    def stop(self) -> None:
+        """Остановка сторожа."""
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            if not self._loop.is_running() and not self._loop.is_closed():
+                self._loop.run_until_complete(asyncio.gather(self._heartbeat_task, return_exceptions=True))
+        if self._monitor_thread is not None:
+            self._monitor_thread.join()
+
+    def check(self) -> None:
+        """Проверка отсутствия блокировок.
+
+        Raises:
+            LoopBlockedError: цикл событий блокировался дольше порога.
+        """
+        if self.blocks:
+            block = self.blocks[0]
+            raise LoopBlockedError(f'Event loop was blocked {len(self.blocks)} time(s), '
+                                   f'first for {block.duration:.3f}s at:\n{block.stack}')
+
+    async def _heartbeat(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._beat_at = perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = perf_counter()
+            lag = max(0.0, now - self._beat_at - self.interval)
+            self._beat_at = now
+            loop_lag.observe(lag)
+            self.lag_max = max(self.lag_max, lag)
+
+    def _callback_frame(self, frame) -> Optional[FrameType]:
+        # кадр обратного вызова (шага задачи), который цикл событий выполняет в данный момент
+        while frame is not None and frame.f_back is not None:
+            if frame.f_back.f_code is _HANDLE_RUN_CODE:
+                return frame
+            frame = frame.f_back
+        return None
+
+    def _monitor(self) -> None:
+        tick = min(self.interval, self.threshold) / 4
+        callback, since, block = None, 0.0, None
+        while not self._stopped.wait(tick):
+            if self._beat_at is None:
+                continue
+            if not self._loop.is_running():
+                # остановленный цикл (например, между run_until_complete в тестах) не считается заблокированным
+                self._beat_at = perf_counter()
+                callback = None
+                continue
+
+            now = perf_counter()
+            if now - self._beat_at - self.interval < tick:
+                callback = None  # пульс вовремя
+                continue
+
+            # Пульс запаздывает. Это блокировка, только если все это время выполняется один и тот же обратный
+            # вызов: много коротких вызовов за одну итерацию цикла дают задержку, но не блокировку.
+            top = sys._current_frames().get(self._loop_thread_id)
+            frame = self._callback_frame(top)
+            if frame is None or frame is not callback:
+                callback, since, block = frame, now, None
+                continue
+            if block is not None:
+                block.duration = now - since
+                continue
+            if now - since >= self.threshold:
+                block = LoopBlock(duration=now - since, stack=''.join(traceback.format_stack(top)))
+                self.blocks.append(block)
+                loop_blocks.inc()
+                logger.warning('Event loop is blocked for %.3fs at:\n%s', block.duration, block.stack)
+
+
+@contextmanager
+def assert_loop_not_blocked(
+        loop: Optional[asyncio.AbstractEventLoop] = None, threshold: float = 0.1) -> Iterator[LoopWatchdog]:
+    """Контекстный менеджер для тестов и бенчмарков: ошибка, если цикл событий блокировался дольше порога.
+
+    Args:
+        loop: наблюдаемый цикл событий, по умолчанию текущий.
+        threshold: допустимая длительность блокировки в секундах.
+
+    Raises:
+        LoopBlockedError: цикл событий блокировался дольше порога.
+    """
+    watchdog = LoopWatchdog(interval=threshold / 4, threshold=threshold)
+    watchdog.start(loop)
+    try:
+        yield watchdog
+    finally:
+        watchdog.stop()
+    watchdog.check()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot, Dispatcher, types
+from aiohttp import web
+
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookServer(object):
+    """Прием обновлений Telegram через webhook на aiohttp.
+    Запрос подтверждается сразу после разбора обновления, а само обновление попадает в ограниченную очередь,
+    которую разбирает заданное количество воркеров. При переполнении очереди отвечаем 503,
+    и Telegram повторит доставку позже.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, path: str, workers: int, max_body_size: int, queue_size: int) -> None:
+        """Инициализация сервера.
+
+        Args:
+            dispatcher: диспетчер бота, обрабатывающий обновления.
+            path: путь, на который Telegram отправляет обновления.
+            workers: количество воркеров, одновременно обрабатывающих обновления.
+            max_body_size: максимальный размер тела запроса в байтах.
+            queue_size: максимальное количество принятых, но еще не обработанных обновлений.
+        """
+        self.dispatcher = dispatcher
+        self.path = path
+        self.workers = workers
+        self.max_body_size = max_body_size
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: list = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество принятых, но еще не обработанных обновлений."""
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def create_app(self) -> web.Application:
+        """Создание приложения aiohttp с обработчиком webhook.
+
+        Returns:
+            Приложение aiohttp.
+        """
+        app = web.Application(client_max_size=self.max_body_size)
+        self.setup(app)
+        return app
+
+    def setup(self, app: web.Application) -> None:
+        """Подключение обработчика webhook к существующему приложению, например общему для нескольких ботов.
+
+        Args:
+            app: приложение aiohttp.
+        """
+        app.router.add_post(self.path, self.handle)
+        app.on_startup.append(self._start_workers)
+        app.on_cleanup.append(self._stop_workers)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Обработчик входящего запроса с обновлением.
+
+        Args:
+            request: запрос от Telegram.
+
+        Returns:
+            Пустой ответ с кодом 200, 400 для тела, не являющегося объектом JSON, или 503 при переполнении очереди.
+        """
+        try:
+            # TypeError - корректный JSON, но не объект ([], 1, "x"): повтор запроса Telegram не исправит ошибку
+            update = types.Update(**await request.json())
+        except (ValueError, TypeError):
+            raise web.HTTPBadRequest()
+
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning('Webhook queue is full, update %s rejected', update.update_id)
+            raise web.HTTPServiceUnavailable()
+        return web.Response()
+
+    async def _worker(self) -> None:
+        Bot.set_current(self.dispatcher.bot)
+        Dispatcher.set_current(self.dispatcher)
+        while True:
+            update = await self.queue.get()
+            try:
+                # отдельная задача на каждое обновление, как при polling: фильтры aiogram кэшируют состояние
+                # пользователя в контекстных переменных, которые не должны переходить между обновлениями
+                await asyncio.ensure_future(self.dispatcher.updates_handler.notify(update))
+            except Exception:
+                logger.exception('Cause exception while processing update %s', update.update_id)
+            finally:
+                self.queue.task_done()
+
+    async def _start_workers(self, app: web.Application) -> None:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def _stop_workers(self, app: web.Application) -> None:
+        await self.queue.join()  # дообрабатываем уже принятые обновления
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
@@ -1,6 +1,6 @@
-from app.bots.controller import Controller
+from app.bots.bootstrap import main
 
 
 if __name__ == '__main__':
     """Запуск бота."""
-    Controller().exec()
+    main()
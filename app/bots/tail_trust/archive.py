@@ -0,0 +1,70 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from time import perf_counter
+
+from django.utils import timezone
+
+from app.bots.tail_trust.repository import AppointmentRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchiveStats:
+    """Статистика переноса записей в архив."""
+    archived: int = 0
+    duration: float = 0.0  # секунды
+
+    @property
+    def throughput(self) -> float:
+        """Количество перенесенных записей в секунду."""
+        return self.archived / self.duration if self.duration else 0.0
+
+
+class AppointmentArchiver(object):
+    """Периодический перенос прошедших записей на прием в архив.
+    Рабочая таблица Appointment содержит только будущие и недавние записи, поэтому списки записей, напоминания
+    и админка не зависят от объема истории. Перенос идемпотентен, поэтому может работать в каждой реплике бота.
+    """
+
+    def __init__(self, max_age: datetime.timedelta, batch_size: int, interval: float) -> None:
+        """Инициализация переноса.
+
+        Args:
+            max_age: время, прошедшее с даты приема, после которого запись переносится в архив.
+            batch_size: количество записей, переносимых одной транзакцией.
+            interval: период переноса в секундах.
+        """
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stats = ArchiveStats()
+
+    async def run_forever(self) -> None:
+        """Бесконечный цикл периодического переноса."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception('Appointment archiving failed')
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> ArchiveStats:
+        """Перенос записей с датой приема старше max_age.
+
+        Returns:
+            Количество перенесенных записей и длительность переноса.
+        """
+        started = perf_counter()
+        before = timezone.localdate() - self.max_age
+        archived = await AppointmentRepository.archive(before, self.batch_size)
+        run = ArchiveStats(archived=archived, duration=perf_counter() - started)
+
+        self.stats.archived += run.archived
+        self.stats.duration += run.duration
+        logger.info('Appointments archived: %s, duration: %.2fs, throughput: %.1f rows/s',
+                    run.archived, run.duration, run.throughput)
+        return run
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from app.bots import django_setup  # noqa: F401 (настройка Django до импорта моделей)
+from app.bots.tail_trust.read_models import BroadcastRecord
+from app.bots.tail_trust.repository import BroadcastRepository, ClientRepository
+from app.models import BroadcastDelivery
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 1000
+
+
+@dataclass
+class BroadcastStats:
+    """Статистика рассылки объявлений."""
+    sent: int = 0
+    failed: int = 0
+    duration: float = 0.0  # секунды
+
+    @property
+    def throughput(self) -> float:
+        """Количество отправленных сообщений в секунду."""
+        return self.sent / self.duration if self.duration else 0.0
+
+
+class BroadcastRunner(object):
+    """Исполнитель рассылок объявлений всем зарегистрированным клиентам.
+    Читает идентификаторы чатов из БД пачками по возрастанию, отправляет пачку с ограниченной
+    параллельностью (лимиты Telegram соблюдает отправитель) и сохраняет контрольную точку вместе с результатами
+    доставки. Прерванная рассылка продолжается с контрольной точки, поэтому повторно может быть отправлена
+    не больше одной пачки. Память не зависит от количества получателей.
+    """
+
+    def __init__(
+            self,
+            send_message: Callable[[int, str], Awaitable[None]],
+            concurrency: int,
+            chunk_size: int,
+            lease: int,
+            poll_interval: float,
+            worker_id: Optional[str] = None,
+    ) -> None:
+        """Инициализация исполнителя.
+
+        Args:
+            send_message: корутина отправки текста в чат.
+            concurrency: максимальное количество одновременных отправок.
+            chunk_size: количество получателей между контрольными точками.
+            lease: время аренды рассылки в секундах, продлевается каждой контрольной точкой.
+            poll_interval: период опроса новых рассылок в секундах.
+            worker_id: идентификатор исполнителя, по умолчанию хост и pid процесса.
+        """
+        self.send_message = send_message
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.stats = BroadcastStats()
+
+    async def run_forever(self) -> None:
+        """Бесконечный цикл выполнения рассылок."""
+        while True:
+            try:
+                stats = await self.run_once()
+            except Exception:
+                logger.exception('Broadcast iteration failed')
+                stats = None
+            if stats is None:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self, broadcast_id: Optional[int] = None) -> Optional[BroadcastStats]:
+        """Захват и выполнение одной рассылки.
+
+        Args:
+            broadcast_id: идентификатор рассылки, None - первая доступная.
+
+        Returns:
+            Статистика рассылки или None, если доступных рассылок нет.
+        """
+        broadcast = await BroadcastRepository.claim(self.worker_id, self.lease, broadcast_id)
+        if broadcast is None:
+            return None
+        return await self.run(broadcast)
+
+    async def run(self, broadcast: BroadcastRecord) -> BroadcastStats:
+        """Выполнение захваченной рассылки с ее контрольной точки.
+
+        Args:
+            broadcast: захваченная рассылка.
+
+        Returns:
+            Статистика этого запуска рассылки.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = BroadcastStats()
+        started = perf_counter()
+        completed = False
+
+        async def send(chat_id: int) -> tuple:
+            async with semaphore:
+                try:
+                    await self.send_message(chat_id, broadcast.text)
+                except Exception as e:
+                    return chat_id, BroadcastDelivery.STATUS_FAILED, repr(e)[:MAX_ERROR_LENGTH]
+                return chat_id, BroadcastDelivery.STATUS_SENT, ''
+
+        logger.info('Broadcast %s started after chat %s', broadcast.id, broadcast.last_chat_id)
+        last_chat_id = broadcast.last_chat_id
+        try:
+            while True:
+                chat_ids = await ClientRepository.get_chat_ids(last_chat_id, self.chunk_size)
+                if not chat_ids:
+                    await BroadcastRepository.finish(broadcast)
+                    completed = True
+                    break
+                last_chat_id = chat_ids[-1]
+                deliveries = await asyncio.gather(*(send(chat_id) for chat_id in chat_ids))
+                sent = sum(1 for _, status, _ in deliveries if status == BroadcastDelivery.STATUS_SENT)
+                stats.sent += sent
+                stats.failed += len(deliveries) - sent
+                self.stats.sent += sent
+                self.stats.failed += len(deliveries) - sent
+                if not await BroadcastRepository.checkpoint(broadcast, last_chat_id, deliveries, self.lease):
+                    logger.info('Broadcast %s cancelled or taken over', broadcast.id)
+                    break
+        finally:
+            stats.duration = perf_counter() - started
+            self.stats.duration += stats.duration
+            if not completed:
+                await BroadcastRepository.release(broadcast)
+
+        logger.info('Broadcast %s sent: %s, failed: %s, duration: %.2fs, throughput: %.1f msg/s',
+                    broadcast.id, stats.sent, stats.failed, stats.duration, stats.throughput)
+        return stats
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+
+from app.bots import django_setup  # noqa: F401 (настройка Django до импорта моделей)
+from app.bots.lib.cache import TTLCache
+from app.models import Client
+from main.settings import CLIENT_CACHE_SIZE, CLIENT_CACHE_TTL
+
+
+# Кэш профилей клиентов по telegram_chat_id. Отсутствующие клиенты тоже кэшируются (значением None).
+# Записи из процесса бота инвалидируются сигналами, правки из других процессов (админка) — по истечении TTL.
+client_cache = TTLCache(maxsize=CLIENT_CACHE_SIZE, ttl=CLIENT_CACHE_TTL)
+
+
+def invalidate_client(sender, instance: Client, **kwargs) -> None:
+    """Обработчик сигналов сохранения и удаления клиента, сбрасывающий его запись в кэше.
+
+    Args:
+        sender: класс модели.
+        instance: сохраненный или удаленный клиент.
+    """
+    client_cache.invalidate(instance.telegram_chat_id)
+
+
+post_save.connect(invalidate_client, sender=Client, dispatch_uid='client_cache_post_save')
+post_delete.connect(invalidate_client, sender=Client, dispatch_uid='client_cache_post_delete')
@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from time import perf_counter
+
+from django.utils import timezone
+
+from app.bots.tail_trust.repository import AppointmentRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DraftCleanupStats:
+    """Статистика очистки черновиков записей."""
+    deleted: int = 0
+    duration: float = 0.0  # секунды
+
+
+class DraftCleaner(object):
+    """Периодическая очистка брошенных черновиков записей на прием.
+    Черновик создается командой /appointment и остается в БД, если пользователь не завершил запись.
+    Очистка идемпотентна, поэтому может работать в каждой реплике бота.
+    """
+
+    def __init__(self, max_age: datetime.timedelta, batch_size: int, interval: float) -> None:
+        """Инициализация очистки.
+
+        Args:
+            max_age: возраст черновика, после которого он удаляется.
+            batch_size: количество черновиков, удаляемых одним запросом.
+            interval: период очистки в секундах.
+        """
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stats = DraftCleanupStats()
+
+    async def run_forever(self) -> None:
+        """Бесконечный цикл периодической очистки."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception('Draft cleanup failed')
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> DraftCleanupStats:
+        """Удаление черновиков старше max_age.
+
+        Returns:
+            Количество удаленных черновиков и длительность очистки.
+        """
+        started = perf_counter()
+        deleted = await AppointmentRepository.delete_drafts(timezone.now() - self.max_age, self.batch_size)
+        run = DraftCleanupStats(deleted=deleted, duration=perf_counter() - started)
+
+        self.stats.deleted += run.deleted
+        self.stats.duration += run.duration
+        logger.info('Draft appointments deleted: %s, duration: %.2fs', run.deleted, run.duration)
+        return run
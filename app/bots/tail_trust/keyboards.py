@@ -0,0 +1,63 @@
+import json
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Optional, Sequence
+
+from aiogram import types
+
+
+def serialize_keyboard(buttons: Iterable[str]) -> str:
+    """Сериализация reply-клавиатуры с кнопкой на каждой строке.
+    Строка передается в reply_markup как есть, без повторной сериализации при каждой отправке.
+
+    Args:
+        buttons: надписи кнопок.
+
+    Returns:
+        JSON-представление клавиатуры.
+    """
+    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    for button in buttons:
+        keyboard.add(types.KeyboardButton(button))
+    return json.dumps(keyboard.to_python(), ensure_ascii=False)
+
+
+class KeyboardCache(object):
+    """Кэш сериализованных клавиатур.
+    Клавиатура строится заново только при изменении версии ее ключа (например, занятости слотов),
+    неизменяемые клавиатуры строятся один раз на процесс.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Инициализация кэша.
+
+        Args:
+            maxsize: максимальное количество хранимых клавиатур.
+        """
+        self.maxsize = maxsize
+        self.builds = 0
+        self._keyboards: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, version: Hashable, buttons: Callable[[], Sequence[str]]) -> Optional[str]:
+        """Получение клавиатуры, при отсутствии или смене версии она строится заново.
+
+        Args:
+            key: ключ клавиатуры.
+            version: версия данных, из которых строится клавиатура.
+            buttons: функция получения надписей кнопок.
+
+        Returns:
+            JSON-представление клавиатуры или None, если кнопок нет.
+        """
+        cached = self._keyboards.get(key)
+        if cached is not None and cached[0] == version:
+            self._keyboards.move_to_end(key)
+            return cached[1]
+
+        labels = buttons()
+        keyboard = serialize_keyboard(labels) if labels else None
+        self.builds += 1
+        self._keyboards[key] = (version, keyboard)
+        self._keyboards.move_to_end(key)
+        if len(self._keyboards) > self.maxsize:
+            self._keyboards.popitem(last=False)
+        return keyboard
@@ -0,0 +1,77 @@
+import datetime
+from typing import NamedTuple, Optional, Sequence, Type, TypeVar
+
+from django.db.models import QuerySet
+
+
+# Модели чтения для горячих путей бота: из БД выбираются только нужные столбцы, а строки превращаются
+# в неизменяемые кортежи с именованными полями (без __dict__ и состояния модели Django). Изменения по-прежнему
+# выполняются через модели в репозиториях.
+
+Record = TypeVar('Record', bound=tuple)
+
+
+class ClientProfile(NamedTuple):
+    """Профиль клиента."""
+    telegram_chat_id: int
+    name: str
+    surname: str
+    phone: str
+
+
+class AppointmentRecord(NamedTuple):
+    """Запись на прием."""
+    id: int
+    client_id: int  # идентификатор telegram чата клиента
+    date: Optional[datetime.date]
+    time: Optional[datetime.time]
+    pet_type: str
+
+
+class ReminderJobRecord(NamedTuple):
+    """Захваченное задание на напоминание вместе с записью на прием."""
+    id: int
+    attempts: int
+    locked_by: str
+    appointment: AppointmentRecord
+
+    @property
+    def appointment_id(self) -> int:
+        return self.appointment.id
+
+
+class BroadcastRecord(NamedTuple):
+    """Захваченная рассылка."""
+    id: int
+    text: str
+    last_chat_id: Optional[int]  # контрольная точка, с которой продолжается рассылка
+    locked_by: str
+
+
+def fetch(queryset: QuerySet, record: Type[Record], fields: Optional[Sequence[str]] = None) -> list:
+    """Выборка записей без создания экземпляров моделей.
+
+    Args:
+        queryset: запрос.
+        record: класс записи (NamedTuple).
+        fields: выбираемые поля в порядке полей записи, по умолчанию одноименные полям записи.
+
+    Returns:
+        Список записей.
+    """
+    return list(map(record._make, queryset.values_list(*(fields or record._fields))))
+
+
+def fetch_first(queryset: QuerySet, record: Type[Record], fields: Optional[Sequence[str]] = None) -> Optional[Record]:
+    """Выборка первой записи запроса без создания экземпляра модели.
+
+    Args:
+        queryset: запрос.
+        record: класс записи (NamedTuple).
+        fields: выбираемые поля в порядке полей записи, по умолчанию одноименные полям записи.
+
+    Returns:
+        Запись или None, если запрос пуст.
+    """
+    row = queryset.values_list(*(fields or record._fields)).first()
+    return record._make(row) if row is not None else None
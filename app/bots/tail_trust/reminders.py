@@ -0,0 +1,225 @@
+import asyncio
+import datetime
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from aiogram.utils.exceptions import BadRequest, RetryAfter, Unauthorized
+from django.utils import timezone
+
+from app.bots.tail_trust.read_models import AppointmentRecord, ReminderJobRecord
+from app.bots.tail_trust.repository import AppointmentRepository, ReminderJobRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReminderRunStats:
+    """Статистика рассылки напоминаний."""
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    duration: float = 0.0  # секунды
+
+    @property
+    def throughput(self) -> float:
+        """Количество отправленных напоминаний в секунду."""
+        return self.sent / self.duration if self.duration else 0.0
+
+
+class ReminderScheduler(object):
+    """Планировщик напоминаний о приеме.
+    Ежедневно в заданное время ставит в очередь задания на напоминания о записях на сегодня и завтра.
+    Постановка идемпотентна, поэтому планировщик может работать в каждой реплике бота, а перезапуск
+    не приводит ни к повторным, ни к пропущенным напоминаниям.
+    """
+
+    def __init__(self, send_at: datetime.time, chunk_size: int) -> None:
+        """Инициализация планировщика.
+
+        Args:
+            send_at: время ежедневной рассылки (часовой пояс TIME_ZONE).
+            chunk_size: размер пачки записей, читаемых из БД.
+        """
+        self.send_at = send_at
+        self.chunk_size = chunk_size
+
+    def next_run_at(self, now: datetime.datetime) -> datetime.datetime:
+        """Вычисление ближайшего времени рассылки.
+
+        Args:
+            now: текущее локальное время.
+
+        Returns:
+            Время следующего запуска.
+        """
+        run_at = now.replace(hour=self.send_at.hour, minute=self.send_at.minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += datetime.timedelta(days=1)
+        return run_at
+
+    @staticmethod
+    async def _sleep_until(run_at: datetime.datetime) -> None:
+        # сон короткими отрезками, чтобы переводы системных часов не смещали время запуска
+        while True:
+            remaining = (run_at - timezone.localtime()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 60))
+
+    async def run_forever(self) -> None:
+        """Бесконечный цикл ежедневной постановки заданий."""
+        now = timezone.localtime()
+        if now.time() >= self.send_at:
+            # бот был остановлен во время рассылки или после нее — ставим в очередь пропущенное
+            await self._safe_run()
+
+        while True:
+            await self._sleep_until(self.next_run_at(timezone.localtime()))
+            await self._safe_run()
+
+    async def _safe_run(self) -> None:
+        try:
+            await self.run_once()
+        except Exception:
+            logger.exception('Reminder scheduling failed')
+
+    async def run_once(self) -> int:
+        """Постановка в очередь заданий для всех записей, о которых еще не отправлено напоминание.
+
+        Returns:
+            Количество записей, для которых поставлены задания.
+        """
+        started = perf_counter()
+        now = timezone.localtime()
+        last_id = 0
+        enqueued = 0
+
+        while True:
+            appointment_ids = await AppointmentRepository.get_pending_reminder_ids(now, last_id, self.chunk_size)
+            if not appointment_ids:
+                break
+            last_id = appointment_ids[-1]
+            await ReminderJobRepository.enqueue(appointment_ids, run_at=timezone.now())
+            enqueued += len(appointment_ids)
+
+        logger.info('Reminder jobs enqueued: %s, duration: %.2fs', enqueued, perf_counter() - started)
+        return enqueued
+
+
+class ReminderWorker(object):
+    """Обработчик очереди заданий на напоминания.
+    Захватывает пачки заданий, отправляет напоминания с ограниченной параллельностью, повторяет
+    неудачные отправки с экспоненциальной задержкой и ведет накопительную статистику.
+    """
+
+    def __init__(
+            self,
+            send_reminder: Callable[[AppointmentRecord], Awaitable[None]],
+            batch_size: int,
+            concurrency: int,
+            visibility_timeout: int,
+            max_attempts: int,
+            retry_backoff: int,
+            poll_interval: float,
+            worker_id: Optional[str] = None,
+    ) -> None:
+        """Инициализация обработчика.
+
+        Args:
+            send_reminder: корутина отправки напоминания по записи на прием.
+            batch_size: максимальное количество заданий, захватываемых за раз.
+            concurrency: максимальное количество одновременных отправок.
+            visibility_timeout: время в секундах, на которое захваченные задания скрываются от других обработчиков.
+            max_attempts: максимальное количество попыток выполнения задания.
+            retry_backoff: базовая задержка повтора в секундах, удваивается с каждой попыткой.
+            poll_interval: период опроса очереди в секундах, когда готовых заданий нет.
+            worker_id: идентификатор обработчика, по умолчанию хост и pid процесса.
+        """
+        self.send_reminder = send_reminder
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.stats = ReminderRunStats()
+
+    def retry_at(self, job: ReminderJobRecord, error: Exception) -> Optional[datetime.datetime]:
+        """Вычисление времени повторной попытки.
+
+        Args:
+            job: задание, при выполнении которого возникла ошибка.
+            error: возникшая ошибка.
+
+        Returns:
+            Время повтора или None, если ошибка постоянная или попытки исчерпаны.
+        """
+        if isinstance(error, (Unauthorized, BadRequest)) or job.attempts >= self.max_attempts:
+            return None  # пользователь заблокировал бота, чат не найден и т.п.
+        if isinstance(error, RetryAfter):
+            delay = error.timeout
+        else:
+            delay = self.retry_backoff * 2 ** (job.attempts - 1)
+        return timezone.now() + datetime.timedelta(seconds=delay)
+
+    async def run_forever(self) -> None:
+        """Бесконечный цикл обработки очереди."""
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception('Reminder worker iteration failed')
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """Захват и выполнение одной пачки заданий.
+
+        Returns:
+            Количество обработанных заданий.
+        """
+        jobs = await ReminderJobRepository.claim(self.worker_id, self.batch_size, self.visibility_timeout)
+        if not jobs:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = perf_counter()
+
+        async def send(job: ReminderJobRecord) -> Optional[Exception]:
+            async with semaphore:
+                try:
+                    await self.send_reminder(job.appointment)
+                except Exception as e:
+                    return e
+
+        errors = await asyncio.gather(*(send(job) for job in jobs))
+        await ReminderJobRepository.complete([job for job, error in zip(jobs, errors) if error is None])
+
+        batch = ReminderRunStats()
+        for job, error in zip(jobs, errors):
+            if error is None:
+                batch.sent += 1
+                continue
+            retry_at = self.retry_at(job, error)
+            await ReminderJobRepository.release(job, repr(error), retry_at)
+            if retry_at is None:
+                batch.failed += 1
+                logger.warning('Reminder job %s failed: %r', job.id, error)
+            else:
+                batch.retried += 1
+        batch.duration = perf_counter() - started
+
+        self.stats.sent += batch.sent
+        self.stats.retried += batch.retried
+        self.stats.failed += batch.failed
+        self.stats.duration += batch.duration
+        logger.info('Reminders sent: %s, retried: %s, failed: %s, duration: %.2fs, throughput: %.1f msg/s',
+                    batch.sent, batch.retried, batch.failed, batch.duration, batch.throughput)
+        return len(jobs)
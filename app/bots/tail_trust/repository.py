@@ -0,0 +1,575 @@
+import datetime
+import threading
+from typing import Optional
+from uuid import uuid4
+
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, F, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from app.bots import django_setup  # noqa: F401 (настройка Django до импорта моделей)
+from app.bots.lib.db import DatabaseExecutor
+from app.bots.tail_trust.read_models import (AppointmentRecord, BroadcastRecord, ClientProfile, ReminderJobRecord,
+                                             fetch, fetch_first)
+from app.models import Appointment, ArchivedAppointment, Broadcast, BroadcastDelivery, Client, ReminderJob
+from main.settings import DB_POOL_SIZE
+
+
+# Все запросы бота к БД выполняются в общем пуле потоков
+db = DatabaseExecutor(max_workers=DB_POOL_SIZE)
+
+
+class ClientRepository(object):
+    """Запросы к профилям клиентов.
+    Чтение возвращает модели чтения (read_models), изменения выполняются через модель Client.
+    """
+
+    @staticmethod
+    async def get(personal_chat_id: int) -> Optional[ClientProfile]:
+        """Получение профиля клиента по идентификатору telegram чата.
+
+        Args:
+            personal_chat_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Профиль клиента или None, если клиент не найден.
+        """
+        return await db.run(fetch_first, Client.objects.filter(telegram_chat_id=personal_chat_id), ClientProfile)
+
+    @staticmethod
+    async def get_or_create(personal_chat_id: int) -> Client:
+        """Получение клиента или создание пустого профиля для регистрации.
+
+        Args:
+            personal_chat_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Клиент.
+        """
+        client, _ = await db.run(Client.objects.get_or_create, telegram_chat_id=personal_chat_id)
+        return client
+
+    @staticmethod
+    async def update(personal_chat_id: int, **fields) -> int:
+        """Обновление полей профиля одним запросом UPDATE.
+
+        Args:
+            personal_chat_id: идентификатор telegram чата клиента.
+            fields: обновляемые поля.
+
+        Returns:
+            Количество обновленных записей.
+        """
+        return await db.run(Client.objects.filter(telegram_chat_id=personal_chat_id).update, **fields)
+
+    @staticmethod
+    async def delete(personal_chat_id: int) -> None:
+        """Удаление клиента вместе с его записями на прием.
+
+        Args:
+            personal_chat_id: идентификатор telegram чата клиента.
+        """
+        await db.run(Client.objects.filter(telegram_chat_id=personal_chat_id).delete)
+
+    @staticmethod
+    async def get_chat_ids(after: Optional[int], limit: int) -> list[int]:
+        """Получение очередной пачки идентификаторов чатов зарегистрированных клиентов.
+        Пачки читаются по возрастанию первичного ключа (keyset), поэтому каждая пачка - короткий запрос
+        по индексу, а между пачками не остается открытых курсоров и транзакций.
+
+        Args:
+            after: идентификатор чата, после которого начинается пачка, None - с начала.
+            limit: размер пачки.
+
+        Returns:
+            Список идентификаторов чатов.
+        """
+        queryset = Client.objects.exclude(Q(name='') | Q(surname='') | Q(phone=''))
+        if after is not None:
+            queryset = queryset.filter(telegram_chat_id__gt=after)
+        queryset = queryset.order_by('telegram_chat_id').values_list('telegram_chat_id', flat=True)
+        return await db.run(list, queryset[:limit])
+
+
+class AppointmentRepository(object):
+    """Запросы к записям на прием.
+    Сортировка, ограничение выборки и выбор полей выполняются на стороне БД, чтение возвращает модели чтения.
+    """
+
+    # проверка вместимости и бронирование слота на SQLite выполняются под общей блокировкой потоков процесса
+    _reserve_lock = threading.Lock()
+
+    @staticmethod
+    async def get_last(client_id: int) -> Optional[AppointmentRecord]:
+        """Получение последней оформленной записи клиента (LIMIT 1 по частичному индексу (client_id, id)).
+
+        Args:
+            client_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Последняя оформленная запись на прием или None, если записей нет.
+        """
+        queryset = Appointment.objects.filter(client_id=client_id, status=Appointment.STATUS_CONFIRMED).order_by('-id')
+        return await db.run(fetch_first, queryset, AppointmentRecord)
+
+    @staticmethod
+    async def get_draft(client_id: int) -> Optional[AppointmentRecord]:
+        """Получение черновика записи клиента, оформление которого не завершено.
+
+        Args:
+            client_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Последний черновик записи на прием или None, если черновиков нет.
+        """
+        queryset = Appointment.objects.filter(client_id=client_id, status=Appointment.STATUS_DRAFT).order_by('-id')
+        return await db.run(fetch_first, queryset, AppointmentRecord)
+
+    @staticmethod
+    async def get_client_appointments(client_id: int) -> list[AppointmentRecord]:
+        """Получение оформленных записей клиента, начиная с последней (частичный индекс по оформленным записям).
+
+        Args:
+            client_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Список записей на прием.
+        """
+        queryset = Appointment.objects.filter(client_id=client_id, status=Appointment.STATUS_CONFIRMED).order_by('-id')
+        return await db.run(fetch, queryset, AppointmentRecord)
+
+    @staticmethod
+    def _create_draft(client_id: int) -> Appointment:
+        # Незавершенный черновик клиента (повторная команда /appointment) освобождает забронированный слот.
+        # Без общей транзакции: на SQLite чтение перед записью в одной транзакции приводит к "database is locked".
+        Appointment.objects.filter(client_id=client_id, status=Appointment.STATUS_DRAFT).delete()
+        return Appointment.objects.create(client_id=client_id)
+
+    @staticmethod
+    async def create_draft(client_id: int) -> Appointment:
+        """Создание черновика записи на прием, поля которого заполняются по шагам диалога.
+        Предыдущие черновики клиента удаляются.
+
+        Args:
+            client_id: идентификатор telegram чата клиента.
+
+        Returns:
+            Созданная запись.
+        """
+        return await db.run(AppointmentRepository._create_draft, client_id)
+
+    @staticmethod
+    async def update(appointment_id: int, **fields) -> int:
+        """Обновление полей записи одним запросом UPDATE.
+
+        Args:
+            appointment_id: идентификатор записи.
+            fields: обновляемые поля.
+
+        Returns:
+            Количество обновленных записей.
+        """
+        return await db.run(Appointment.objects.filter(id=appointment_id).update, **fields)
+
+    @staticmethod
+    def _delete_drafts_batch(created_before: datetime.datetime, batch_size: int) -> int:
+        drafts = Appointment.objects.filter(status=Appointment.STATUS_DRAFT)
+        draft_ids = drafts.filter(created_at__lt=created_before).order_by('id').values_list('id', flat=True)
+        # статус повторяется в DELETE: запись могли оформить между выборкой и удалением
+        _, deleted = drafts.filter(id__in=list(draft_ids[:batch_size])).delete()
+        return deleted.get(Appointment._meta.label, 0)
+
+    @staticmethod
+    async def delete_drafts(created_before: datetime.datetime, batch_size: int) -> int:
+        """Удаление черновиков записей, созданных раньше заданного времени.
+        Черновики удаляются пачками, каждая пачка — отдельный короткий запрос DELETE.
+
+        Args:
+            created_before: время, раньше которого созданы удаляемые черновики.
+            batch_size: размер пачки.
+
+        Returns:
+            Количество удаленных записей.
+        """
+        deleted = 0
+        while True:
+            batch = await db.run(AppointmentRepository._delete_drafts_batch, created_before, batch_size)
+            deleted += batch
+            if batch < batch_size:
+                return deleted
+
+    # поля, переносимые в архив
+    ARCHIVE_FIELDS = ('id', 'client_id', 'date', 'time', 'pet_type', 'reminded_at', 'created_at')
+    _archive_partitions: set = set()  # годы, секции архива которых уже созданы этим процессом
+
+    @staticmethod
+    def _ensure_archive_partitions(years: set) -> None:
+        # на PostgreSQL архив секционирован по годам; секция создается до вставки, отдельно от транзакции переноса
+        if connection.vendor != 'postgresql':
+            return
+        table = ArchivedAppointment._meta.db_table
+        with connection.cursor() as cursor:
+            for year in sorted(years - AppointmentRepository._archive_partitions):
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS "{table}_{year}" PARTITION OF "{table}" '
+                               f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+                AppointmentRepository._archive_partitions.add(year)
+
+    @staticmethod
+    def _archive_batch(before: datetime.date, batch_size: int) -> int:
+        appointments = Appointment.objects.filter(status=Appointment.STATUS_CONFIRMED, date__lt=before)
+        # порядок частичного индекса по оформленным записям: пачка читается с начала диапазона индекса
+        fields = AppointmentRepository.ARCHIVE_FIELDS
+        rows = list(appointments.order_by('date', 'time', 'id').values_list(*fields)[:batch_size])
+        if not rows:
+            return 0
+        AppointmentRepository._ensure_archive_partitions({row[2].year for row in rows})
+        archived_at = timezone.now()
+        with transaction.atomic():
+            ArchivedAppointment.objects.bulk_create(
+                [ArchivedAppointment(archived_at=archived_at, **dict(zip(fields, row))) for row in rows],
+                ignore_conflicts=True,  # пачка, перенесенная другой репликой или прерванным запуском
+            )
+            _, deleted = appointments.filter(id__in=[row[0] for row in rows]).delete()
+        return deleted.get(Appointment._meta.label, 0)
+
+    @staticmethod
+    async def archive(before: datetime.date, batch_size: int) -> int:
+        """Перенос оформленных записей с датой приема раньше заданной в архив.
+        Записи переносятся пачками, каждая пачка - отдельная транзакция вставки в архив и удаления
+        из рабочей таблицы (вместе с заданиями на напоминания).
+
+        Args:
+            before: дата, раньше которой записи переносятся.
+            batch_size: размер пачки.
+
+        Returns:
+            Количество перенесенных записей.
+        """
+        archived = 0
+        while True:
+            batch = await db.run(AppointmentRepository._archive_batch, before, batch_size)
+            archived += batch
+            if batch < batch_size:
+                return archived
+
+    @staticmethod
+    async def get_client_history(client_id: int, limit: int) -> list[AppointmentRecord]:
+        """Получение архивных записей клиента, начиная с последней.
+
+        Args:
+            client_id: идентификатор telegram чата клиента.
+            limit: максимальное количество записей.
+
+        Returns:
+            Список записей на прием.
+        """
+        queryset = ArchivedAppointment.objects.filter(client_id=client_id).order_by('-id')[:limit]
+        return await db.run(fetch, queryset, AppointmentRecord)
+
+    @staticmethod
+    def _holds_slot(hold: datetime.timedelta) -> Q:
+        # слот занимают оформленные записи и черновики, созданные не раньше hold назад: брошенный черновик
+        # перестает удерживать слот, не дожидаясь удаления очисткой черновиков
+        return Q(status=Appointment.STATUS_CONFIRMED) | Q(created_at__gte=timezone.now() - hold)
+
+    @staticmethod
+    async def get_occupancy(
+            date_from: datetime.date, date_to: datetime.date, hold: datetime.timedelta) -> list[tuple]:
+        """Получение количества записей на каждый занятый слот за период одним агрегирующим запросом.
+
+        Args:
+            date_from: первая дата периода.
+            date_to: последняя дата периода.
+            hold: время, в течение которого черновик удерживает слот.
+
+        Returns:
+            Список кортежей (дата, время, количество записей).
+        """
+        queryset = (
+            Appointment.objects
+            .filter(date__range=(date_from, date_to), time__isnull=False)
+            .filter(AppointmentRepository._holds_slot(hold))
+            .values_list('date', 'time')
+            .annotate(booked=Count('id'))
+            .order_by()
+        )
+        return await db.run(list, queryset)
+
+    @classmethod
+    def _reserve_slot(cls, appointment_id: int, date: datetime.date, time: datetime.time, capacity: int,
+                      hold: datetime.timedelta, fields: dict) -> bool:
+        if connection.vendor == 'postgresql':
+            with transaction.atomic():
+                # блокировка на время транзакции сериализует бронирование одного слота всеми репликами
+                with connection.cursor() as cursor:
+                    slot_key = [date.toordinal(), time.hour * 60 + time.minute]
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', slot_key)
+                return cls._book(appointment_id, date, time, capacity, hold, fields)
+
+        with cls._reserve_lock, transaction.atomic():
+            return cls._book(appointment_id, date, time, capacity, hold, fields)
+
+    @staticmethod
+    def _book(appointment_id: int, date: datetime.date, time: datetime.time, capacity: int,
+              hold: datetime.timedelta, fields: dict) -> bool:
+        # Сначала запись, затем проверка: на SQLite транзакция сразу получает блокировку записи, и чтение
+        # внутри нее не может привести к взаимоблокировке с другим писателем. Переполнение слота откатывает запись.
+        if not Appointment.objects.filter(id=appointment_id).update(date=date, time=time, **fields):
+            raise Appointment.DoesNotExist(f'Appointment {appointment_id} does not exist')
+        holders = Appointment.objects.filter(AppointmentRepository._holds_slot(hold), date=date, time=time)
+        if holders.exclude(id=appointment_id).count() >= capacity:
+            transaction.set_rollback(True)
+            return False
+        return True
+
+    @classmethod
+    async def reserve_slot(cls, appointment_id: int, date: datetime.date, time: datetime.time, capacity: int,
+                           hold: datetime.timedelta, **fields) -> bool:
+        """Атомарное бронирование слота для записи на прием с проверкой вместимости.
+        Повторное бронирование того же слота той же записью (например, при оформлении) проверяет вместимость заново:
+        удержание слота черновиком могло истечь, и слот заняли другие клиенты.
+
+        Args:
+            appointment_id: идентификатор записи.
+            date: дата приема.
+            time: время приема.
+            capacity: максимальное количество записей на один слот.
+            hold: время, в течение которого черновик удерживает слот.
+            fields: поля записи, обновляемые вместе с бронированием (например, статус при оформлении).
+
+        Returns:
+            True - слот забронирован, False - слот уже заполнен.
+
+        Raises:
+            Appointment.DoesNotExist: запись на прием не найдена.
+        """
+        return await db.run(cls._reserve_slot, appointment_id, date, time, capacity, hold, fields)
+
+    @staticmethod
+    async def get_pending_reminder_ids(now: datetime.datetime, after_id: int, limit: int) -> list[int]:
+        """Получение очередной пачки записей, для которых еще не создано задание на напоминание.
+        В выборку попадают оформленные записи на завтра и еще не наступившие записи на сегодня.
+        Пачки читаются по возрастанию id (keyset), поэтому чтение не зависит от объема уже обработанных записей.
+
+        Args:
+            now: текущее локальное время.
+            after_id: id последней записи предыдущей пачки.
+            limit: размер пачки.
+
+        Returns:
+            Список идентификаторов записей на прием.
+        """
+        today = now.date()
+        queryset = (
+            Appointment.objects
+            .filter(Q(date=today, time__gt=now.time()) | Q(date=today + datetime.timedelta(days=1)))
+            .filter(status=Appointment.STATUS_CONFIRMED, reminded_at__isnull=True, reminder_job__isnull=True,
+                    id__gt=after_id)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        return await db.run(list, queryset[:limit])
+
+
+class ReminderJobRepository(object):
+    """Очередь заданий на напоминания, общая для всех реплик бота.
+    Задания захватываются пачками атомарно: на PostgreSQL через SELECT ... FOR UPDATE SKIP LOCKED,
+    на SQLite — одним UPDATE под блокировкой записи БД. Захваченное задание невидимо для остальных
+    обработчиков до истечения таймаута видимости, после чего может быть взято повторно.
+    """
+
+    # SQLite допускает только одного писателя, блокировка снижает конкуренцию потоков одного процесса
+    _claim_lock = threading.Lock()
+
+    @staticmethod
+    async def enqueue(appointment_ids: list[int], run_at: datetime.datetime) -> None:
+        """Постановка заданий в очередь. Повторная постановка задания для той же записи игнорируется.
+
+        Args:
+            appointment_ids: идентификаторы записей на прием.
+            run_at: время, не раньше которого задания могут быть выполнены.
+        """
+        jobs = [ReminderJob(appointment_id=appointment_id, run_at=run_at) for appointment_id in appointment_ids]
+        await db.run(ReminderJob.objects.bulk_create, jobs, ignore_conflicts=True)
+
+    @classmethod
+    def _claim(cls, worker_id: str, limit: int, visibility_timeout: int) -> list[ReminderJobRecord]:
+        now = timezone.now()
+        token = f'{worker_id[:50]}:{uuid4().hex[:12]}'
+        due = (
+            ReminderJob.objects
+            .filter(status=ReminderJob.STATUS_PENDING, run_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by('run_at')
+        )
+        values = {
+            'locked_by': token,
+            'locked_until': now + datetime.timedelta(seconds=visibility_timeout),
+            'attempts': F('attempts') + 1,
+        }
+
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+                ReminderJob.objects.filter(id__in=ids).update(**values)
+        else:
+            with cls._claim_lock, transaction.atomic():
+                ReminderJob.objects.filter(id__in=Subquery(due.values('id')[:limit])).update(**values)
+
+        rows = ReminderJob.objects.filter(locked_by=token).values_list(
+            'id', 'attempts', 'locked_by', *(f'appointment__{field}' for field in AppointmentRecord._fields))
+        return [ReminderJobRecord(job_id, attempts, locked_by, AppointmentRecord._make(appointment))
+                for job_id, attempts, locked_by, *appointment in rows]
+
+    @classmethod
+    async def claim(cls, worker_id: str, limit: int, visibility_timeout: int) -> list[ReminderJobRecord]:
+        """Захват пачки готовых к выполнению заданий.
+
+        Args:
+            worker_id: идентификатор обработчика.
+            limit: максимальный размер пачки.
+            visibility_timeout: время в секундах, на которое задания скрываются от других обработчиков.
+
+        Returns:
+            Список захваченных заданий вместе с записями на прием.
+        """
+        return await db.run(cls._claim, worker_id, limit, visibility_timeout)
+
+    @staticmethod
+    def _complete(jobs: list[ReminderJobRecord]) -> None:
+        # задания, захват которых истек и перешел к другому обработчику, не изменяются
+        with transaction.atomic():
+            ReminderJob.objects.filter(id__in=[job.id for job in jobs], locked_by=jobs[0].locked_by).update(
+                status=ReminderJob.STATUS_DONE, locked_by='', locked_until=None)
+            Appointment.objects.filter(id__in=[job.appointment_id for job in jobs]).update(reminded_at=timezone.now())
+
+    @classmethod
+    async def complete(cls, jobs: list[ReminderJobRecord]) -> None:
+        """Отметка заданий выполненными, а напоминаний — отправленными.
+
+        Args:
+            jobs: выполненные задания одного захвата.
+        """
+        if jobs:
+            await db.run(cls._complete, jobs)
+
+    @staticmethod
+    async def release(job: ReminderJobRecord, error: str, retry_at: Optional[datetime.datetime]) -> None:
+        """Возврат задания в очередь для повторной попытки или отметка о неудаче.
+
+        Args:
+            job: задание, при выполнении которого возникла ошибка.
+            error: текст ошибки.
+            retry_at: время повторной попытки, None — задание больше не повторяется.
+        """
+        values = {'locked_by': '', 'locked_until': None, 'last_error': error[:1000]}
+        if retry_at is None:
+            values['status'] = ReminderJob.STATUS_FAILED
+        else:
+            values['run_at'] = retry_at
+        queryset = ReminderJob.objects.filter(id=job.id, locked_by=job.locked_by)
+        await db.run(queryset.update, **values)
+
+
+class BroadcastRepository(object):
+    """Рассылки объявлений и результаты доставки.
+    Рассылку выполняет одна реплика бота, захватившая ее на время аренды. Аренда продлевается каждой контрольной
+    точкой; рассылка, аренда которой истекла (процесс остановлен или упал), может быть захвачена повторно
+    и продолжается с последней контрольной точки.
+    """
+
+    @staticmethod
+    def _claim(worker_id: str, lease: int, broadcast_id: Optional[int]) -> Optional[BroadcastRecord]:
+        now = timezone.now()
+        token = f'{worker_id[:50]}:{uuid4().hex[:12]}'
+        available = Broadcast.objects.filter(
+            Q(status=Broadcast.STATUS_PENDING)
+            | Q(status=Broadcast.STATUS_RUNNING, locked_until__isnull=True)
+            | Q(status=Broadcast.STATUS_RUNNING, locked_until__lt=now))
+        if broadcast_id is not None:
+            available = available.filter(id=broadcast_id)
+
+        candidate_id = available.order_by('id').values_list('id', flat=True).first()
+        if candidate_id is None:
+            return None
+        # условия повторяются в UPDATE: рассылку могла захватить другая реплика
+        claimed = available.filter(id=candidate_id).update(
+            status=Broadcast.STATUS_RUNNING,
+            locked_by=token,
+            locked_until=now + datetime.timedelta(seconds=lease),
+            started_at=Coalesce(F('started_at'), Value(now, output_field=DateTimeField())),
+        )
+        if not claimed:
+            return None
+        return fetch_first(Broadcast.objects.filter(id=candidate_id), BroadcastRecord)
+
+    @classmethod
+    async def claim(cls, worker_id: str, lease: int, broadcast_id: Optional[int] = None) -> Optional[BroadcastRecord]:
+        """Захват ожидающей или прерванной рассылки.
+
+        Args:
+            worker_id: идентификатор обработчика.
+            lease: время аренды в секундах.
+            broadcast_id: идентификатор рассылки, None - первая доступная.
+
+        Returns:
+            Захваченная рассылка или None, если доступных рассылок нет.
+        """
+        return await db.run(cls._claim, worker_id, lease, broadcast_id)
+
+    @staticmethod
+    def _checkpoint(broadcast: BroadcastRecord, last_chat_id: int, deliveries: list[tuple], lease: int) -> bool:
+        sent = sum(1 for _, status, _ in deliveries if status == BroadcastDelivery.STATUS_SENT)
+        with transaction.atomic():
+            updated = Broadcast.objects.filter(id=broadcast.id, locked_by=broadcast.locked_by).update(
+                last_chat_id=last_chat_id,
+                sent=F('sent') + sent,
+                failed=F('failed') + len(deliveries) - sent,
+                locked_until=timezone.now() + datetime.timedelta(seconds=lease),
+            )
+            if not updated:
+                return False
+            BroadcastDelivery.objects.bulk_create(
+                [BroadcastDelivery(broadcast_id=broadcast.id, telegram_chat_id=chat_id, status=status, error=error)
+                 for chat_id, status, error in deliveries],
+                ignore_conflicts=True,  # пачка, повторно отправленная после прерывания
+            )
+        return Broadcast.objects.filter(id=broadcast.id, status=Broadcast.STATUS_RUNNING).exists()
+
+    @classmethod
+    async def checkpoint(cls, broadcast: BroadcastRecord, last_chat_id: int, deliveries: list[tuple],
+                         lease: int) -> bool:
+        """Сохранение контрольной точки и результатов доставки пачки одной транзакцией с продлением аренды.
+
+        Args:
+            broadcast: захваченная рассылка.
+            last_chat_id: последний обработанный чат.
+            deliveries: результаты доставки, кортежи (идентификатор чата, статус, текст ошибки).
+            lease: время аренды в секундах.
+
+        Returns:
+            True - рассылку можно продолжать, False - она отменена или захвачена другим обработчиком.
+        """
+        return await db.run(cls._checkpoint, broadcast, last_chat_id, deliveries, lease)
+
+    @staticmethod
+    async def finish(broadcast: BroadcastRecord) -> None:
+        """Отметка рассылки выполненной.
+
+        Args:
+            broadcast: захваченная рассылка.
+        """
+        queryset = Broadcast.objects.filter(
+            id=broadcast.id, locked_by=broadcast.locked_by, status=Broadcast.STATUS_RUNNING)
+        await db.run(queryset.update, status=Broadcast.STATUS_DONE, finished_at=timezone.now(), locked_until=None)
+
+    @staticmethod
+    async def release(broadcast: BroadcastRecord) -> None:
+        """Снятие аренды прерванной рассылки, чтобы ее сразу можно было продолжить.
+
+        Args:
+            broadcast: захваченная рассылка.
+        """
+        await db.run(Broadcast.objects.filter(id=broadcast.id, locked_by=broadcast.locked_by).update,
+                     locked_until=None)
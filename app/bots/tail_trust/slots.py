@@ -0,0 +1,228 @@
+import asyncio
+import datetime
+from time import monotonic
+from typing import Callable, Iterable, Optional
+
+from django.utils import timezone
+
+from app.bots.tail_trust.repository import AppointmentRepository
+from main.settings import TIME_FORMAT
+
+
+class DayOccupancy(object):
+    """Занятость слотов одного дня: количество записей на каждый слот и битовая маска заполненных слотов."""
+
+    __slots__ = ('counts', 'full')
+
+    def __init__(self, slots: int) -> None:
+        self.counts = bytearray(slots)
+        self.full = 0
+
+    def add(self, index: int, booked: int, capacity: int) -> None:
+        """Учет записей на слот.
+
+        Args:
+            index: номер слота в дне.
+            booked: количество добавляемых записей.
+            capacity: максимальное количество записей на слот.
+        """
+        self.counts[index] = min(self.counts[index] + booked, 255)
+        if self.counts[index] >= capacity:
+            self.full |= 1 << index
+
+
+class SlotInventory(object):
+    """Учет свободных слотов записи на прием.
+    Занятость всего окна записи загружается одним агрегирующим запросом и хранится по дням в компактном виде,
+    повторная загрузка выполняется не чаще раза в ttl секунд и только одним обработчиком. Поэтому выбор даты
+    и времени тысячами пользователей не нагружает БД, а окончательная проверка вместимости выполняется
+    атомарно при бронировании. Номер версии меняется при каждом изменении набора заполненных слотов.
+    """
+
+    def __init__(
+            self,
+            hours: Iterable[str],
+            week_days: set,
+            next_days: int,
+            capacity: int,
+            ttl: float,
+            hold: float,
+            timer: Callable[[], float] = monotonic,
+    ) -> None:
+        """Инициализация учета слотов.
+
+        Args:
+            hours: время начала слотов в формате TIME_FORMAT.
+            week_days: рабочие дни недели (0 - понедельник).
+            next_days: количество дней, на которые открыта запись, начиная с текущего.
+            capacity: максимальное количество записей на один слот.
+            ttl: время в секундах, в течение которого загруженная занятость считается актуальной.
+            hold: время в секундах, в течение которого неоформленный черновик удерживает выбранный слот.
+            timer: функция получения текущего времени.
+        """
+        self.hours = tuple(hours)
+        self.times = tuple(datetime.datetime.strptime(hour, TIME_FORMAT).time() for hour in self.hours)
+        self.week_days = week_days
+        self.next_days = next_days
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hold = datetime.timedelta(seconds=hold)
+        self.version = 0
+        self._timer = timer
+        self._all_full = (1 << len(self.hours)) - 1
+        self._index = {hour: index for index, hour in enumerate(self.hours)}
+        self._days: dict = {}  # дата -> DayOccupancy
+        self._loaded_for: Optional[datetime.date] = None
+        self._loaded_at = 0.0
+        self._load_lock: Optional[asyncio.Lock] = None
+
+    def working_days(self, today: datetime.date) -> list[datetime.date]:
+        """Рабочие дни окна записи.
+
+        Args:
+            today: текущая дата.
+
+        Returns:
+            Список дат.
+        """
+        days = (today + datetime.timedelta(days=day) for day in range(self.next_days))
+        return [day for day in days if day.weekday() in self.week_days]
+
+    def invalidate(self) -> None:
+        """Сброс загруженной занятости, следующее обращение загрузит ее из БД."""
+        self._loaded_for = None
+
+    async def refresh(self, today: datetime.date) -> None:
+        """Загрузка занятости окна записи из БД, если загруженная устарела.
+
+        Args:
+            today: текущая дата.
+        """
+        if self._loaded_for == today and self._timer() - self._loaded_at < self.ttl:
+            return
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+
+        async with self._load_lock:
+            if self._loaded_for == today and self._timer() - self._loaded_at < self.ttl:
+                return  # занятость загрузил другой обработчик, пока этот ждал блокировку
+            days = {day: DayOccupancy(len(self.hours)) for day in self.working_days(today)}
+            occupancy = await AppointmentRepository.get_occupancy(
+                today, today + datetime.timedelta(self.next_days), self.hold)
+            for date, time, booked in occupancy:
+                index = self._index.get(time.strftime(TIME_FORMAT))
+                if date in days and index is not None:
+                    days[date].add(index, booked, self.capacity)
+
+            if {day: value.full for day, value in days.items()} != {
+                    day: value.full for day, value in self._days.items()}:
+                self.version += 1
+            self._days = days
+            self._loaded_for = today
+            self._loaded_at = self._timer()
+
+    def passed_slots(self, now: datetime.datetime) -> int:
+        """Количество уже наступивших слотов текущего дня."""
+        return sum(time <= now.time() for time in self.times)
+
+    def free_times(self, date: datetime.date, now: datetime.datetime) -> list[str]:
+        """Свободные слоты дня по загруженной занятости. Для текущего дня прошедшие слоты не предлагаются.
+
+        Args:
+            date: дата приема.
+            now: текущее локальное время.
+
+        Returns:
+            Список времени начала свободных слотов.
+        """
+        day = self._days.get(date)
+        if day is None or day.full == self._all_full:
+            return []
+        return [
+            hour for index, hour in enumerate(self.hours)
+            if not day.full >> index & 1 and (date > now.date() or self.times[index] > now.time())
+        ]
+
+    def free_dates(self, now: datetime.datetime) -> list[datetime.date]:
+        """Даты, на которые есть хотя бы один свободный слот, по загруженной занятости.
+
+        Args:
+            now: текущее локальное время.
+
+        Returns:
+            Список дат по возрастанию.
+        """
+        return [date for date in self._days if self.free_times(date, now)]
+
+    async def available_dates(self, now: Optional[datetime.datetime] = None) -> list[datetime.date]:
+        """Даты, на которые есть хотя бы один свободный слот.
+
+        Args:
+            now: текущее локальное время.
+
+        Returns:
+            Список дат по возрастанию.
+        """
+        now = now or timezone.localtime()
+        await self.refresh(now.date())
+        return self.free_dates(now)
+
+    async def available_times(self, date: datetime.date, now: Optional[datetime.datetime] = None) -> list[str]:
+        """Свободные слоты дня. Для текущего дня прошедшие слоты не предлагаются.
+
+        Args:
+            date: дата приема.
+            now: текущее локальное время.
+
+        Returns:
+            Список времени начала свободных слотов.
+        """
+        now = now or timezone.localtime()
+        await self.refresh(now.date())
+        return self.free_times(date, now)
+
+    def _mark(self, date: datetime.date, index: int, reserved: bool, booked: int) -> None:
+        day = self._days.get(date)
+        if day is not None:
+            full = day.full
+            if reserved:
+                day.add(index, booked, self.capacity)
+            else:
+                day.full |= 1 << index  # слот заполнили другие реплики
+            if day.full != full:
+                self.version += 1
+
+    async def reserve(self, appointment_id: Optional[int], date: datetime.date, hour: str) -> bool:
+        """Бронирование слота для записи на прием.
+
+        Args:
+            appointment_id: идентификатор записи.
+            date: дата приема.
+            hour: время начала слота.
+
+        Returns:
+            True - слот забронирован, False - слот уже заполнен.
+        """
+        index = self._index[hour]
+        reserved = await AppointmentRepository.reserve_slot(
+            appointment_id, date, self.times[index], self.capacity, self.hold)
+        self._mark(date, index, reserved, 1)
+        return reserved
+
+    async def confirm(self, appointment_id: Optional[int], date: datetime.date, hour: str, **fields) -> bool:
+        """Оформление записи на забронированный слот с повторной проверкой вместимости.
+
+        Args:
+            appointment_id: идентификатор записи.
+            date: дата приема.
+            hour: время начала слота.
+            fields: поля оформляемой записи.
+
+        Returns:
+            True - запись оформлена, False - слот заполнили, пока истекало удержание черновиком.
+        """
+        index = self._index[hour]
+        confirmed = await AppointmentRepository.reserve_slot(
+            appointment_id, date, self.times[index], self.capacity, self.hold, **fields)
+        self._mark(date, index, confirmed, 0)  # бронирование уже учтено в занятости
+        return confirmed
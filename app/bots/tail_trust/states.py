@@ -0,0 +1,15 @@
+from aiogram.dispatcher.filters.state import State, StatesGroup
+
+
+class RegistrationStates(StatesGroup):
+    """Шаги регистрации пользователя."""
+    name = State()
+    surname = State()
+    phone = State()
+
+
+class AppointmentStates(StatesGroup):
+    """Шаги записи на прием. Идентификатор черновика записи хранится в данных состояния."""
+    date = State()
+    time = State()
+    pet = State()
@@ -1,17 +1,55 @@
+import asyncio
+import os
+import re
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from typing import Optional, Union, Any
+from typing import Optional
 
 import datetime as datetime
 from aiogram import Bot, Dispatcher, types
 from aiogram import executor
-from asgiref.sync import sync_to_async
-from asyncio import sleep
-
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.storage import BaseStorage
+from aiohttp import web
+from django.utils import timezone
+
+from app.bots import django_setup  # noqa: F401 (настройка Django до импорта моделей)
+from app.bots.bootstrap import startup
+from app.bots.lib.cache import MISSING
 from app.bots.lib.common import EnumBase
+from app.bots.lib.concurrency import ChatOrderedProcessor
+from app.bots.lib.fsm_storage import create_storage
+from app.bots.lib.metrics import (MetricsServer, StartupMiddleware, UpdateMetricsMiddleware, instrument_db,
+                                  instrument_handler, registry)
+from app.bots.lib.profiler import UpdateProfiler
+from app.bots.lib.recorder import UpdateRecorder, UpdateScrubber, recording_path
+from app.bots.lib.sender import OutboundSender, SendPriority
+from app.bots.lib.watchdog import LoopWatchdog
+from app.bots.lib.webhook import WebhookServer
+from app.bots.tail_trust.archive import AppointmentArchiver
+from app.bots.tail_trust.broadcasts import BroadcastRunner
+from app.bots.tail_trust.client_cache import client_cache
+from app.bots.tail_trust.drafts import DraftCleaner
+from app.bots.tail_trust.reminders import ReminderScheduler, ReminderWorker
+from app.bots.tail_trust.keyboards import KeyboardCache
+from app.bots.tail_trust.read_models import AppointmentRecord, ClientProfile
+from app.bots.tail_trust.repository import AppointmentRepository, ClientRepository
+from app.bots.tail_trust.slots import SlotInventory
+from app.bots.tail_trust.states import AppointmentStates, RegistrationStates
 from app.bots.tail_trust.validator import Validator
-from app.models import Client, Appointment
-from main.settings import DATE_FORMAT
+from app.models import Appointment
+from main.settings import (APPOINTMENT_SLOT_CAPACITY, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL,
+                           BOT_MODE, BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, BROADCAST_LEASE,
+                           BROADCAST_POLL_INTERVAL, DATE_FORMAT, DRAFT_CLEANUP_BATCH_SIZE, DRAFT_CLEANUP_INTERVAL,
+                           DRAFT_MAX_AGE, FSM_STORAGE, FSM_STORAGE_PATH, LOOP_WATCHDOG_INTERVAL,
+                           LOOP_WATCHDOG_THRESHOLD, METRICS_HOST, METRICS_PORT, PROFILE_DIR, PROFILE_FLUSH_INTERVAL,
+                           PROFILE_INTERVAL, PROFILE_MAX_FILES, PROFILE_SAMPLE_RATE, PROFILE_SLOW_THRESHOLD,
+                           REMINDER_BATCH_SIZE, REMINDER_CHUNK_SIZE, REMINDER_CONCURRENCY, REMINDER_MAX_ATTEMPTS,
+                           REMINDER_POLL_INTERVAL, REMINDER_RETRY_BACKOFF, REMINDER_TIME, REMINDER_VISIBILITY_TIMEOUT,
+                           SECRET_KEY, SEND_CHAT_BURST, SEND_CHAT_RATE, SEND_GLOBAL_RATE, SEND_MAX_RETRIES,
+                           SLOT_CACHE_TTL, SLOT_HOLD_TTL, TIME_FORMAT, UPDATE_CONCURRENCY, UPDATE_RECORD_PATH,
+                           WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_MAX_BODY_SIZE, WEBHOOK_PATH, WEBHOOK_QUEUE_SIZE,
+                           WEBHOOK_URL, WEBHOOK_WORKERS)
 
 
 class CommandsBot(EnumBase):
@@ -22,6 +60,16 @@ class CommandsBot(EnumBase):
     CMD_PROFILE = 'profile'  # Команда для просмотра информации о пользователе
     CMD_APPOINTMENT = 'appointment'  # Команда для записи зарегистрированного пользователя на прием
     CMD_APPLIST = 'applist'  # Команда для просмотра все записей на прием
+    CMD_HISTORY = 'history'  # Команда для просмотра архива прошедших записей на прием
+
+
+# имена команд, которые сохраняются в записи обновлений без маскирования
+COMMANDS = frozenset(command.value for command in CommandsBot)
+
+
+class BotMode(EnumBase):
+    POLLING = 'polling'  # Получение обновлений long polling запросами
+    WEBHOOK = 'webhook'  # Получение обновлений HTTP-запросами от Telegram
 
 
 # отдельный класс для ускорения быстродействия, иначе инициализировалась бы каждая строка как отдельный объект
@@ -34,7 +82,8 @@ class TextInterfaceBot(EnumBase):
     UNAUTHORIZED_HELP_MSG = ('Список доступных команд:\n/start - Начать работу с ботом\n'
                              '/register - Зарегистрироваться\n/reset - Обнулить регистрацию')
     AUTHORIZED_HELP_MSG = (f'{UNAUTHORIZED_HELP_MSG}\n/profile - Посмотреть профиль\n'
-                           '/appointment - Записаться на прием\n/applist - Список записей на прием')
+                           '/appointment - Записаться на прием\n/applist - Список записей на прием\n'
+                           '/history - История прошедших приемов')
 
     USER_PROFILE_NAME = 'Введите Ваше имя:'
     USER_PROFILE_SURNAME = 'Теперь введите вашу фамилию:'
@@ -48,6 +97,7 @@ class TextInterfaceBot(EnumBase):
     USER_APPOINTMENT_PET = 'Выберите категорию питомца:'
     USER_APPOINTMENT_COMPLETED = 'Регистрация на запись завершена! Проверить все записи можно введя /applist'
     USER_APPOINTMENT_INFO_ALL = 'Ваши записи на прием:\n'
+    USER_APPOINTMENT_HISTORY = 'История прошедших приемов:\n'
     USER_APPOINTMENT_INFO_NOTIFY = 'У Вас назначена запись:\n'
     USER_APPOINTMENT_INFO_LIST = 'Дата: {date}, время {time}, тип питомца {pet}'
 
@@ -63,6 +113,9 @@ class TextInterfaceBot(EnumBase):
     INCORRECT_PHONE_ERROR = ('Некорректный номер телефона.\nНомер телефона должен быть в'
                              ' формате +12345678901 или 12345678901.\nПожалуйста, введите номер телефона заново.')
     NO_APPOINTMENTS_ERROR = 'Не найдена ни одна запись на прием.\nДля записи введите /appointment'
+    NO_HISTORY_ERROR = 'История приемов пуста.\nТекущие записи на прием можно посмотреть, введя /applist'
+    NO_FREE_SLOTS_ERROR = 'К сожалению, свободного времени для записи нет. Попробуйте записаться позже.'
+    SLOT_TAKEN_ERROR = 'К сожалению, это время уже занято. Пожалуйста, выберите другое.'
 
 
 class BotInterface(ABC):
@@ -71,7 +124,7 @@ class BotInterface(ABC):
         pass
 
     @abstractmethod
-    def exec(self):
+    def exec(self, mode: Optional[str] = None):
         pass
 
 
@@ -80,22 +133,119 @@ class BotBase(BotInterface):
     api_token: str
     bot: Bot = None
     dp: Dispatcher = None
+    storage: BaseStorage = None
+    # главный экземпляр процесса запускает сторожа цикла событий, сервер метрик и фоновые задачи
+    primary: bool = True
+    # фоновые задачи (напоминания, рассылки, архив, очистка черновиков) запускает только один процесс
+    background_jobs: bool = True
+    metrics_port: Optional[int] = None  # по умолчанию METRICS_PORT, 0 - сервер метрик выключен
 
     def __post_init__(self):
-        self.bot = Bot(token=self.api_token)
-        self.dp = Dispatcher(self.bot)
+        if self.bot is None:
+            self.bot = Bot(token=self.api_token)
+        if self.storage is None:
+            self.storage = create_storage(FSM_STORAGE, FSM_STORAGE_PATH)
+        self.dp = Dispatcher(self.bot, storage=self.storage)
+        # обновления одного чата обрабатываются по порядку, разных чатов — параллельно
+        self.update_processor = ChatOrderedProcessor.install(self.dp, concurrency=UPDATE_CONCURRENCY)
+        self.metrics = registry
+        self.metrics_server = None
+        if self.metrics_port is None:
+            self.metrics_port = METRICS_PORT
+        self.watchdog = None
+        if self.primary and LOOP_WATCHDOG_THRESHOLD:
+            self.watchdog = LoopWatchdog(interval=LOOP_WATCHDOG_INTERVAL, threshold=LOOP_WATCHDOG_THRESHOLD)
+        instrument_db()
+        self.dp.middleware.setup(UpdateMetricsMiddleware())
+        self.dp.middleware.setup(StartupMiddleware(startup))
+        self.profiler = None
+        if PROFILE_DIR:
+            self.profiler = UpdateProfiler(
+                PROFILE_DIR,
+                sample_rate=PROFILE_SAMPLE_RATE,
+                slow_threshold=PROFILE_SLOW_THRESHOLD,
+                interval=PROFILE_INTERVAL,
+                flush_interval=PROFILE_FLUSH_INTERVAL,
+                max_files=PROFILE_MAX_FILES,
+            )
+            self.dp.middleware.setup(self.profiler)
+        self.recorder = None
+        if UPDATE_RECORD_PATH:
+            scrubber = UpdateScrubber(key=SECRET_KEY.encode(), is_safe_text=self._is_safe_text)
+            # у каждого бота и процесса-обработчика свой файл записи
+            self.recorder = UpdateRecorder(recording_path(UPDATE_RECORD_PATH, self.bot_id, os.getpid()), scrubber)
+            self.dp.middleware.setup(self.recorder)
+        self.sender = OutboundSender(
+            self.bot,
+            global_rate=SEND_GLOBAL_RATE,
+            chat_rate=SEND_CHAT_RATE,
+            chat_burst=SEND_CHAT_BURST,
+            max_retries=SEND_MAX_RETRIES,
+        )
         self.configure_handlers()
+        for handler_obj in self.dp.message_handlers.handlers:
+            handler_obj.handler = instrument_handler(handler_obj.handler)
+        self.configure_metrics()
 
     def configure_handlers(self):
-        self.dp.register_message_handler(self.cmd_help, commands=[CommandsBot.CMD_HELP])
-        self.dp.register_message_handler(self.cmd_start, commands=[CommandsBot.CMD_START])
+        # команды доступны на любом шаге диалога
+        self.dp.register_message_handler(self.cmd_help, commands=[CommandsBot.CMD_HELP], state='*')
+        self.dp.register_message_handler(self.cmd_start, commands=[CommandsBot.CMD_START], state='*')
+
+    @property
+    def bot_id(self) -> str:
+        # открытая часть токена до двоеточия — идентификатор бота в Telegram
+        return self.api_token.split(':', 1)[0]
+
+    @property
+    def metric_labels(self) -> dict:
+        # метки вычисляемых метрик: в одном процессе может работать несколько ботов
+        return {'bot': self.bot_id}
+
+    def configure_metrics(self):
+        # значения вычисляются при каждом запросе метрик, поэтому не стоят ничего между запросами
+        labels = self.metric_labels
+        self.metrics.callback('bot_active_chats', 'Количество чатов с обновлениями в обработке',
+                              lambda: self.update_processor.active_chats, **labels)
+        self.metrics.callback('bot_send_queue_depth', 'Количество сообщений, ожидающих лимитов отправки',
+                              lambda: self.sender.stats()['queue_depth'], **labels)
+        self.metrics.callback('bot_send_wait_seconds_max', 'Максимальное время ожидания лимитов отправки',
+                              lambda: self.sender.wait_time_max, **labels)
+        self.metrics.callback('bot_messages_sent_total', 'Количество отправленных сообщений',
+                              lambda: self.sender.sent, kind='counter', **labels)
+        self.metrics.callback('bot_send_retry_after_total', 'Количество ответов RetryAfter от Telegram',
+                              lambda: self.sender.retry_after, kind='counter', **labels)
+        self.metrics.callback('bot_cold_start_seconds', 'Время от запуска процесса до первого обновления',
+                              lambda: startup.first_update or 0.0, **labels)
+        # кэш клиентов общий для ботов процесса, поэтому его метрики без метки бота
+        for metric, field, kind, documentation in (
+                ('bot_client_cache_hits_total', 'hits', 'counter', 'Количество попаданий в кэш клиентов'),
+                ('bot_client_cache_misses_total', 'misses', 'counter', 'Количество промахов кэша клиентов'),
+                ('bot_client_cache_hit_ratio', 'hit_ratio', 'gauge', 'Доля попаданий в кэш клиентов'),
+                ('bot_client_cache_size', 'size', 'gauge', 'Количество записей в кэше клиентов')):
+            self.metrics.callback(metric, documentation, lambda field=field: client_cache.stats()[field], kind=kind)
 
     @staticmethod
-    async def _get_user_data(personal_chat_id: int) -> Optional[Client]:
-        try:
-            return await sync_to_async(Client.objects.get)(telegram_chat_id=personal_chat_id)
-        except Client.DoesNotExist:
-            return None
+    async def _get_user_data(personal_chat_id: int) -> Optional[ClientProfile]:
+        user_data = client_cache.get(personal_chat_id, MISSING)
+        if user_data is not MISSING:
+            return user_data
+
+        generation = client_cache.generation
+        user_data = await ClientRepository.get(personal_chat_id)
+        client_cache.set(personal_chat_id, user_data, generation=generation)
+        return user_data
+
+    @staticmethod
+    async def _update_user_data(personal_chat_id: int, **fields) -> bool:
+        updated = await ClientRepository.update(personal_chat_id, **fields)
+        client_cache.invalidate(personal_chat_id)  # update() не отправляет сигналы post_save
+        return bool(updated)
+
+    def _is_safe_text(self, text: str) -> bool:
+        # текст сообщения, который сохраняется в записи обновлений без маскирования: только команда бота без аргументов
+        match = re.fullmatch(r'/(\w+)(@\w+)?', text)
+        return match is not None and match.group(1) in COMMANDS
 
     async def _is_user_exists(self, personal_chat_id: int) -> bool:
         return bool(await self._get_user_data(personal_chat_id))
@@ -104,15 +254,68 @@ class BotBase(BotInterface):
         personal_chat_id = message.chat.id
 
         if await self._is_user_exists(personal_chat_id):
-            await message.answer(TextInterfaceBot.AUTHORIZED_HELP_MSG)
+            await self.sender.answer(message, TextInterfaceBot.AUTHORIZED_HELP_MSG)
         else:
-            await message.answer(TextInterfaceBot.UNAUTHORIZED_HELP_MSG)
+            await self.sender.answer(message, TextInterfaceBot.UNAUTHORIZED_HELP_MSG)
 
     async def cmd_start(self, message: types.Message):
-        await message.answer(TextInterfaceBot.WELLCOME_MSG)
-
-    def exec(self):
-        executor.start_polling(self.dp, skip_updates=True)
+        await self.sender.answer(message, TextInterfaceBot.WELLCOME_MSG)
+
+    def exec(self, mode: Optional[str] = None):
+        mode = mode or BOT_MODE
+        if mode == BotMode.POLLING:
+            executor.start_polling(self.dp, skip_updates=True, on_startup=self.on_startup, on_shutdown=self.on_shutdown)
+        elif mode == BotMode.WEBHOOK:
+            self.start_webhook()
+        else:
+            raise ValueError(f'Unknown bot mode: {mode}')
+
+    async def on_startup(self, dp: Dispatcher):
+        if self.watchdog is not None:
+            self.watchdog.start()
+        if self.primary and self.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, host=METRICS_HOST, port=self.metrics_port)
+            await self.metrics_server.start()
+
+    async def on_shutdown(self, dp: Dispatcher):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def start_webhook(self):
+        server = WebhookServer(
+            self.dp,
+            path=WEBHOOK_PATH,
+            workers=WEBHOOK_WORKERS,
+            max_body_size=WEBHOOK_MAX_BODY_SIZE,
+            queue_size=WEBHOOK_QUEUE_SIZE,
+        )
+        app = server.create_app()
+        self.metrics.callback('bot_webhook_queue_depth', 'Количество принятых, но не обработанных обновлений',
+                              lambda: server.queue_depth, **self.metric_labels)
+
+        async def on_startup(_):
+            await self.on_startup(self.dp)
+            await self.bot.set_webhook(WEBHOOK_URL + WEBHOOK_PATH)
+
+        async def on_shutdown(_):
+            await self.bot.delete_webhook()
+
+        async def on_cleanup(_):
+            await self.on_shutdown(self.dp)
+            await self.dp.storage.close()
+            await self.dp.storage.wait_closed()
+            await self.bot.close()
+
+        app.on_startup.append(on_startup)
+        app.on_shutdown.append(on_shutdown)
+        app.on_cleanup.append(on_cleanup)
+        web.run_app(app, host=WEBAPP_HOST, port=WEBAPP_PORT, loop=self.bot.loop)
 
 
 @dataclass
@@ -124,227 +327,405 @@ class TailTrustBot(BotBase):
         self.appointment_week_days: set = set(range(0, 5))  # суббота, воскресенье выходной
         self.appointment_hours: tuple = ('10:00', '11:00', '12:00', '14:00', '15:00', '16:00', '17:00', '18:00')
         self.appointment_pets: tuple = ('Собака', 'Кошка', 'Попугай', 'Рыбка')
+        self.history_limit: int = 50  # последние приемы из архива, список укладывается в одно сообщение
+        self.slots = SlotInventory(
+            hours=self.appointment_hours,
+            week_days=self.appointment_week_days,
+            next_days=self.appointment_next_days,
+            capacity=APPOINTMENT_SLOT_CAPACITY,
+            ttl=SLOT_CACHE_TTL,
+            hold=SLOT_HOLD_TTL,
+        )
+        self.keyboards = KeyboardCache()
+        self.reminder_scheduler = ReminderScheduler(
+            send_at=datetime.datetime.strptime(REMINDER_TIME, TIME_FORMAT).time(),
+            chunk_size=REMINDER_CHUNK_SIZE,
+        )
+        self.reminder_worker = ReminderWorker(
+            send_reminder=self.send_reminder,
+            batch_size=REMINDER_BATCH_SIZE,
+            concurrency=REMINDER_CONCURRENCY,
+            visibility_timeout=REMINDER_VISIBILITY_TIMEOUT,
+            max_attempts=REMINDER_MAX_ATTEMPTS,
+            retry_backoff=REMINDER_RETRY_BACKOFF,
+            poll_interval=REMINDER_POLL_INTERVAL,
+        )
+        self.broadcaster = BroadcastRunner(
+            send_message=self.sender.send_message,  # с приоритетом массовой рассылки
+            concurrency=BROADCAST_CONCURRENCY,
+            chunk_size=BROADCAST_CHUNK_SIZE,
+            lease=BROADCAST_LEASE,
+            poll_interval=BROADCAST_POLL_INTERVAL,
+        )
+        self.archiver = AppointmentArchiver(
+            max_age=datetime.timedelta(days=ARCHIVE_AFTER_DAYS),
+            batch_size=ARCHIVE_BATCH_SIZE,
+            interval=ARCHIVE_INTERVAL,
+        )
+        self.draft_cleaner = DraftCleaner(
+            max_age=datetime.timedelta(seconds=DRAFT_MAX_AGE),
+            batch_size=DRAFT_CLEANUP_BATCH_SIZE,
+            interval=DRAFT_CLEANUP_INTERVAL,
+        )
 
     def configure_handlers(self):
         super().configure_handlers()
 
-        self.dp.register_message_handler(self.cmd_reset, commands=[CommandsBot.CMD_RESET])
-        self.dp.register_message_handler(self.cmd_register, commands=[CommandsBot.CMD_REGISTER])
-        self.dp.register_message_handler(self.cmd_view_profile, commands=[CommandsBot.CMD_PROFILE])
-        self.dp.register_message_handler(self.cmd_appointment, commands=[CommandsBot.CMD_APPOINTMENT])
-        self.dp.register_message_handler(self.cmd_applist, commands=[CommandsBot.CMD_APPLIST])
+        self.dp.register_message_handler(self.cmd_reset, commands=[CommandsBot.CMD_RESET], state='*')
+        self.dp.register_message_handler(self.cmd_register, commands=[CommandsBot.CMD_REGISTER], state='*')
+        self.dp.register_message_handler(self.cmd_view_profile, commands=[CommandsBot.CMD_PROFILE], state='*')
+        self.dp.register_message_handler(self.cmd_appointment, commands=[CommandsBot.CMD_APPOINTMENT], state='*')
+        self.dp.register_message_handler(self.cmd_applist, commands=[CommandsBot.CMD_APPLIST], state='*')
+        self.dp.register_message_handler(self.cmd_history, commands=[CommandsBot.CMD_HISTORY], state='*')
 
+        self.dp.register_message_handler(self.process_registration, state=RegistrationStates)
+        self.dp.register_message_handler(self.process_register_appointment, state=AppointmentStates)
         self.dp.register_message_handler(self.messages_handler)
 
-        self.bot.loop.create_task(self.schedule_task())
-
-    async def messages_handler(self, message):
+        if self.primary and self.background_jobs:
+            self.bot.loop.create_task(self.schedule_task())
+
+    def configure_metrics(self):
+        super().configure_metrics()
+        # обработчик напоминаний создается после вызова этого метода, поэтому обращение к нему отложено
+        for metric, field, documentation in (
+                ('bot_reminders_sent_total', 'sent', 'Количество отправленных напоминаний'),
+                ('bot_reminders_retried_total', 'retried', 'Количество отложенных для повтора напоминаний'),
+                ('bot_reminders_failed_total', 'failed', 'Количество неотправленных напоминаний'),
+                ('bot_reminders_duration_seconds_total', 'duration', 'Суммарное время рассылки напоминаний')):
+            self.metrics.callback(metric, documentation,
+                                  lambda field=field: getattr(self.reminder_worker.stats, field), kind='counter',
+                                  **self.metric_labels)
+        for metric, field, documentation in (
+                ('bot_broadcast_sent_total', 'sent', 'Количество отправленных сообщений рассылок'),
+                ('bot_broadcast_failed_total', 'failed', 'Количество неотправленных сообщений рассылок')):
+            self.metrics.callback(metric, documentation,
+                                  lambda field=field: getattr(self.broadcaster.stats, field), kind='counter',
+                                  **self.metric_labels)
+        for metric, field, documentation in (
+                ('bot_appointments_archived_total', 'archived', 'Количество перенесенных в архив записей'),
+                ('bot_archive_duration_seconds_total', 'duration', 'Суммарное время переноса записей в архив')):
+            self.metrics.callback(metric, documentation,
+                                  lambda field=field: getattr(self.archiver.stats, field), kind='counter',
+                                  **self.metric_labels)
+        self.metrics.callback('bot_drafts_deleted_total', 'Количество удаленных брошенных черновиков записей',
+                              lambda: self.draft_cleaner.stats.deleted, kind='counter', **self.metric_labels)
+
+    def _is_safe_text(self, text: str) -> bool:
+        # кнопки выбора даты, времени и питомца не содержат персональных данных
+        return (super()._is_safe_text(text) or text in self.appointment_pets
+                or Validator.validate_date(text) or Validator.validate_time(text))
+
+    async def messages_handler(self, message: types.Message, state: FSMContext):
+        # Сообщение вне диалога. Шаг восстанавливается по БД, если состояние было потеряно,
+        # например, после перезапуска бота с хранилищем состояний в памяти.
         personal_chat_id = message.chat.id
 
         user_data = await self._get_user_data(personal_chat_id)
-        if not user_data or not user_data.name or not user_data.surname or not user_data.phone:
-            await self.process_registration(message)
+        if not user_data:
+            await self.sender.answer(message, TextInterfaceBot.NO_USER_ID_ERROR)
+            return
+
+        if not user_data.name or not user_data.surname or not user_data.phone:
+            if not user_data.name:
+                await state.set_state(RegistrationStates.name)
+            elif not user_data.surname:
+                await state.set_state(RegistrationStates.surname)
+            else:
+                await state.set_state(RegistrationStates.phone)
+            await self.process_registration(message, state)
             return
 
-        app_data = await self._get_user_appointments_data(
-            data_filter={'client_id': personal_chat_id}, get_last_appointment=True)
-        if not app_data or not app_data.date or not app_data.time or not app_data.pet_type:
-            await self.process_register_appointment(message)
+        # диалог продолжается с неоформленного черновика, оформленные записи не изменяются
+        app_data = await AppointmentRepository.get_draft(personal_chat_id)
+        if not app_data:
+            if not await AppointmentRepository.get_last(personal_chat_id):
+                await self.sender.answer(message, TextInterfaceBot.NO_APPOINTMENT_ID_ERROR)
             return
 
+        if not app_data.date or not app_data.time or not app_data.pet_type:
+            await state.update_data(
+                appointment_id=app_data.id, date=app_data.date.strftime(DATE_FORMAT) if app_data.date else None,
+                time=app_data.time.strftime(TIME_FORMAT) if app_data.time else None)
+            if not app_data.date:
+                await state.set_state(AppointmentStates.date)
+            elif not app_data.time:
+                await state.set_state(AppointmentStates.time)
+            else:
+                await state.set_state(AppointmentStates.pet)
+            await self.process_register_appointment(message, state)
+
     async def schedule_task(self):
-        while True:
-            await sleep(24 * 60 * 60)  # 24 часа в секундах
-            tomorrow_date = (datetime.datetime.now() + datetime.timedelta(days=1)).date()
-            appointments = await self._get_user_appointments_data(data_filter={'date': tomorrow_date})
-
-            for app in appointments:
-                personal_chat_id = int(app.client_id)
-                appointment_text = (TextInterfaceBot.USER_APPOINTMENT_INFO_NOTIFY +
-                                    TextInterfaceBot.USER_APPOINTMENT_INFO_LIST.format(
-                                        date=app.date, time=app.time, pet=app.pet_type)
-                                    )
-                await self.bot.send_message(personal_chat_id, appointment_text)
-
-    async def cmd_reset(self, message: types.Message):
+        await asyncio.gather(
+            self.reminder_scheduler.run_forever(),
+            self.reminder_worker.run_forever(),
+            self.broadcaster.run_forever(),
+            self.archiver.run_forever(),
+            self.draft_cleaner.run_forever(),
+        )
+
+    async def send_reminder(self, app: AppointmentRecord):
+        personal_chat_id = int(app.client_id)
+        appointment_text = (TextInterfaceBot.USER_APPOINTMENT_INFO_NOTIFY +
+                            TextInterfaceBot.USER_APPOINTMENT_INFO_LIST.format(
+                                date=app.date, time=app.time, pet=app.pet_type)
+                            )
+        await self.sender.send_message(personal_chat_id, appointment_text, priority=SendPriority.BULK)
+
+    async def cmd_reset(self, message: types.Message, state: FSMContext):
         personal_chat_id = message.chat.id
 
+        await state.finish()
         user_data = await self._get_user_data(personal_chat_id)
         if user_data:
-            await sync_to_async(user_data.delete)()
-            await message.answer(TextInterfaceBot.RESET_SUCCESS_MSG)
+            await ClientRepository.delete(personal_chat_id)
+            await self.sender.answer(message, TextInterfaceBot.RESET_SUCCESS_MSG)
         else:
-            await message.answer(TextInterfaceBot.NO_REGISTERED_MSG)
+            await self.sender.answer(message, TextInterfaceBot.NO_REGISTERED_MSG)
 
-    async def cmd_register(self, message: types.Message):
+    async def cmd_register(self, message: types.Message, state: FSMContext):
         personal_chat_id = message.chat.id
 
         user_data = await self._get_user_data(personal_chat_id)
 
         if user_data and user_data.name and user_data.surname and user_data.phone:
-            await message.answer(TextInterfaceBot.ALREADY_REGISTERED_MSG)
+            await self.sender.answer(message, TextInterfaceBot.ALREADY_REGISTERED_MSG)
             return
 
         if not user_data or not user_data.telegram_chat_id:
-            client = Client(telegram_chat_id=personal_chat_id)
-            await sync_to_async(client.save)()
-        await self.process_registration(message)
+            await ClientRepository.get_or_create(personal_chat_id)
+        await state.set_state(RegistrationStates.name)
+        await self.sender.answer(message, TextInterfaceBot.USER_PROFILE_NAME)
 
-    async def process_registration(self, message: types.Message):
+    async def process_registration(self, message: types.Message, state: FSMContext):
         personal_chat_id = message.chat.id
+        current_state = await state.get_state()
+
+        if current_state == RegistrationStates.name.state:
+            if not Validator.validate_name(message.text):
+                await self.sender.answer(message, TextInterfaceBot.INCORRECT_NAME_ERROR)
+                return
+            fields, next_state = {'name': message.text}, RegistrationStates.surname
+            answer = TextInterfaceBot.USER_PROFILE_SURNAME
+
+        elif current_state == RegistrationStates.surname.state:
+            if not Validator.validate_surname(message.text):
+                await self.sender.answer(message, TextInterfaceBot.INCORRECT_SURNAME_ERROR)
+                return
+            fields, next_state = {'surname': message.text}, RegistrationStates.phone
+            answer = TextInterfaceBot.USER_PROFILE_PHONE
 
-        user_data = await self._get_user_data(personal_chat_id)
-        if not user_data:
-            await message.answer(TextInterfaceBot.NO_USER_ID_ERROR)  # возникнет, если в БД не прилетит user id
+        else:
+            if not Validator.validate_phone(message.text):
+                await self.sender.answer(message, TextInterfaceBot.INCORRECT_PHONE_ERROR)
+                return
+            fields, next_state = {'phone': message.text}, None
+            answer = TextInterfaceBot.REGISTRATION_COMPLETED
+
+        if not await self._update_user_data(personal_chat_id, **fields):
+            await state.finish()
+            # возникнет, если в БД не прилетит user id
+            await self.sender.answer(message, TextInterfaceBot.NO_USER_ID_ERROR)
             return
 
-        if CommandsBot.CMD_REGISTER in message.text:
-            await message.answer(TextInterfaceBot.USER_PROFILE_NAME)
-
-        elif not user_data.name:
-            name = message.text
-            if Validator.validate_name(name):
-                user_data.name = name
-                await sync_to_async(user_data.save)()
-                await message.answer(TextInterfaceBot.USER_PROFILE_SURNAME)
-            else:
-                await message.answer(TextInterfaceBot.INCORRECT_NAME_ERROR)
-
-        elif not user_data.surname:
-            surname = message.text
-            if Validator.validate_surname(surname):
-                user_data.surname = surname
-                await sync_to_async(user_data.save)()
-                await message.answer(TextInterfaceBot.USER_PROFILE_PHONE)
-            else:
-                await message.answer(TextInterfaceBot.INCORRECT_SURNAME_ERROR)
-
-        elif not user_data.phone:
-            phone = message.text
-            if Validator.validate_phone(phone):
-                user_data.phone = phone
-                await sync_to_async(user_data.save)()
-                await message.answer(TextInterfaceBot.REGISTRATION_COMPLETED)
-            else:
-                await message.answer(TextInterfaceBot.INCORRECT_PHONE_ERROR)
+        if next_state:
+            await state.set_state(next_state)
+        else:
+            await state.finish()
+        await self.sender.answer(message, answer)
 
     async def cmd_view_profile(self, message: types.Message):
         personal_chat_id = message.chat.id
 
         user_data = await self._get_user_data(personal_chat_id)
         if user_data:
-            await message.answer(TextInterfaceBot.USER_PROFILE_INFO.format(
+            await self.sender.answer(message, TextInterfaceBot.USER_PROFILE_INFO.format(
                 name=user_data.name,
                 surname=user_data.surname,
                 phone=user_data.phone))
         else:
-            await message.answer(TextInterfaceBot.NO_REGISTERED_MSG)
+            await self.sender.answer(message, TextInterfaceBot.NO_REGISTERED_MSG)
 
-    async def cmd_appointment(self, message: types.Message):
+    async def cmd_appointment(self, message: types.Message, state: FSMContext):
         personal_chat_id = message.chat.id
 
         user_data = await self._get_user_data(personal_chat_id)
         if not user_data or not user_data.name or not user_data.surname or not user_data.phone:
-            await message.answer(TextInterfaceBot.NO_REGISTERED_MSG)
+            await self.sender.answer(message, TextInterfaceBot.NO_REGISTERED_MSG)
             return
 
-        user_appointment = Appointment(client=user_data)
-        await sync_to_async(user_appointment.save)()
-        await self.process_register_appointment(message)
+        date_keyboard = await self._pick_appointment_date()
+        if date_keyboard is None:
+            await self.sender.answer(message, TextInterfaceBot.NO_FREE_SLOTS_ERROR)
+            return
 
-    @staticmethod
-    def _generate_slots_keyboard(slots):
-        keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
-        for slot in slots:
-            keyboard.add(types.KeyboardButton(slot))
-        return keyboard
-
-    def _pick_appointment_date(self):
-        current_date = datetime.datetime.now()
-
-        available_dates = [
-            (current_date + datetime.timedelta(days=day)).strftime(DATE_FORMAT)
-            for day in range(self.appointment_next_days)
-            if (current_date + datetime.timedelta(days=day)).weekday() in self.appointment_week_days
-        ]
-        return self._generate_slots_keyboard(available_dates)
-
-    def _pick_appointment_time(self):
-        available_times = [
-            time for time in self.appointment_hours
-        ]
-        return self._generate_slots_keyboard(available_times)
+        user_appointment = await AppointmentRepository.create_draft(personal_chat_id)
+        await state.set_state(AppointmentStates.date)
+        await state.update_data(appointment_id=user_appointment.id)
+        await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_DATE, reply_markup=date_keyboard)
+
+    def _pick_appointment_pet(self) -> str:
+        return self.keyboards.get('pets', None, lambda: self.appointment_pets)
+
+    async def _pick_appointment_date(self) -> Optional[str]:
+        # клавиатура дат перестраивается только при смене дня, прошедшем слоте или изменении занятости
+        now = timezone.localtime()
+        await self.slots.refresh(now.date())
+        version = (now.date(), self.slots.passed_slots(now), self.slots.version)
+        return self.keyboards.get('dates', version, lambda: [
+            date.strftime(DATE_FORMAT) for date in self.slots.free_dates(now)])
+
+    async def _pick_appointment_time(self, date: datetime.date) -> Optional[str]:
+        now = timezone.localtime()
+        await self.slots.refresh(now.date())
+        version = (now.date(), self.slots.passed_slots(now), self.slots.version)
+        return self.keyboards.get(('times', date), version, lambda: self.slots.free_times(date, now))
 
     @staticmethod
-    def get_last_appointment(appointments: list[Appointment], get_last_appointment: bool = False):
-        sorted_appointments = sorted(appointments, key=lambda x: x.id, reverse=True)
-        if sorted_appointments:
-            if get_last_appointment:
-                return sorted_appointments[0]
-            return sorted_appointments
-
-    async def _get_user_appointments_data(
-            self,
-            data_filter: dict[str, Any],
-            get_last_appointment: bool = False
-    ) -> Optional[Union[Appointment, list[Appointment]]]:
+    def _parse_date(date_str: Optional[str]) -> Optional[datetime.date]:
+        if not date_str or not Validator.validate_date(date_str):
+            return None
         try:
-            appointments = await sync_to_async(list)(Appointment.objects.filter(**data_filter))
-            if 'client_id' in data_filter.keys():
-                return self.get_last_appointment(appointments, get_last_appointment)
-            return appointments
-        except Appointment.DoesNotExist:
+            return datetime.datetime.strptime(date_str, DATE_FORMAT).date()
+        except ValueError:
             return None
 
-    async def process_register_appointment(self, message):
-        personal_chat_id = message.chat.id
-
-        user_appointment_data = await self._get_user_appointments_data(
-            data_filter={'client_id': personal_chat_id}, get_last_appointment=True)
-        if not user_appointment_data:
-            await message.answer(TextInterfaceBot.NO_APPOINTMENT_ID_ERROR)
+    @staticmethod
+    async def _update_appointment_data(appointment_id: Optional[int], **fields) -> bool:
+        if appointment_id is None:
+            return False
+        return bool(await AppointmentRepository.update(appointment_id, **fields))
+
+    async def _ask_appointment_date(self, message: types.Message, state: FSMContext):
+        date_keyboard = await self._pick_appointment_date()
+        if date_keyboard is None:
+            await state.finish()
+            await self.sender.answer(message, TextInterfaceBot.NO_FREE_SLOTS_ERROR)
+            return
+        await state.set_state(AppointmentStates.date)
+        await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_DATE, reply_markup=date_keyboard)
+
+    async def process_register_appointment(self, message: types.Message, state: FSMContext):
+        current_state = await state.get_state()
+        state_data = await state.get_data()
+
+        if current_state == AppointmentStates.date.state:
+            date = self._parse_date(message.text)
+            time_keyboard = await self._pick_appointment_time(date) if date else None
+            if time_keyboard is None:
+                await self._ask_appointment_date(message, state)
+                return
+            await state.update_data(date=message.text)
+            fields, next_state = {'date': date}, AppointmentStates.time
+            answer, reply_markup = TextInterfaceBot.USER_APPOINTMENT_TIME, time_keyboard
+
+        elif current_state == AppointmentStates.time.state:
+            date = self._parse_date(state_data.get('date'))
+            time_keyboard = await self._pick_appointment_time(date) if date else None
+            if time_keyboard is None:
+                # на выбранную дату не осталось свободного времени
+                await self._ask_appointment_date(message, state)
+                return
+            if not Validator.validate_time(message.text) or message.text not in await self.slots.available_times(date):
+                await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_TIME, reply_markup=time_keyboard)
+                return
+
+            # время бронируется атомарно: проверка вместимости и запись выполняются в одной транзакции
+            try:
+                reserved = await self.slots.reserve(state_data.get('appointment_id'), date, message.text)
+            except Appointment.DoesNotExist:
+                await state.finish()
+                await self.sender.answer(message, TextInterfaceBot.NO_APPOINTMENT_ID_ERROR)
+                return
+            if not reserved:
+                time_keyboard = await self._pick_appointment_time(date)
+                if time_keyboard is None:
+                    await self._ask_appointment_date(message, state)
+                else:
+                    await self.sender.answer(message, TextInterfaceBot.SLOT_TAKEN_ERROR, reply_markup=time_keyboard)
+                return
+
+            await state.update_data(time=message.text)
+            await state.set_state(AppointmentStates.pet)
+            await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_PET,
+                                     reply_markup=self._pick_appointment_pet())
             return
 
-        if CommandsBot.CMD_APPOINTMENT in message.text:
-            await message.answer(TextInterfaceBot.USER_APPOINTMENT_DATE, reply_markup=self._pick_appointment_date())
-
-        elif Validator.validate_date(message.text):
-            user_appointment_data.date = message.text
-            await sync_to_async(user_appointment_data.save)()
-            await message.answer(TextInterfaceBot.USER_APPOINTMENT_TIME, reply_markup=self._pick_appointment_time())
+        else:
+            if message.text not in self.appointment_pets:
+                await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_PET,
+                                         reply_markup=self._pick_appointment_pet())
+                return
+            await self._confirm_appointment(message, state, state_data)
+            return
 
-        elif Validator.validate_time(message.text):
-            user_appointment_data.time = message.text
-            await sync_to_async(user_appointment_data.save)()
-            await message.answer(
-                TextInterfaceBot.USER_APPOINTMENT_PET,
-                reply_markup=self._generate_slots_keyboard(self.appointment_pets)
-            )
+        if not await self._update_appointment_data(state_data.get('appointment_id'), **fields):
+            await state.finish()
+            await self.sender.answer(message, TextInterfaceBot.NO_APPOINTMENT_ID_ERROR)
+            return
 
-        elif message.text in self.appointment_pets:
-            user_appointment_data.pet_type = message.text
-            await sync_to_async(user_appointment_data.save)()
+        if next_state:
+            await state.set_state(next_state)
+            await self.sender.answer(message, answer, reply_markup=reply_markup)
+        else:
+            await state.finish()
+            await self.sender.answer(message, answer)
+
+    async def _confirm_appointment(self, message: types.Message, state: FSMContext, state_data: dict):
+        # вместимость проверяется повторно: удержание слота черновиком могло истечь, пока выбирался питомец
+        date = self._parse_date(state_data.get('date'))
+        hour = state_data.get('time')
+        if date is None or hour not in self.appointment_hours:
+            await self._ask_appointment_date(message, state)
+            return
+        try:
+            confirmed = await self.slots.confirm(state_data.get('appointment_id'), date, hour,
+                                                 pet_type=message.text, status=Appointment.STATUS_CONFIRMED)
+        except Appointment.DoesNotExist:
+            await state.finish()
+            await self.sender.answer(message, TextInterfaceBot.NO_APPOINTMENT_ID_ERROR)
+            return
+        if not confirmed:
+            time_keyboard = await self._pick_appointment_time(date)
+            if time_keyboard is None:
+                await self._ask_appointment_date(message, state)
+            else:
+                await state.set_state(AppointmentStates.time)
+                await self.sender.answer(message, TextInterfaceBot.SLOT_TAKEN_ERROR, reply_markup=time_keyboard)
+            return
 
-            await message.answer(TextInterfaceBot.USER_APPOINTMENT_COMPLETED)
+        await state.finish()
+        await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_COMPLETED)
 
     async def cmd_applist(self, message):
         personal_chat_id = message.chat.id
 
         if not await self._is_user_exists(personal_chat_id):
-            await message.answer(TextInterfaceBot.NO_REGISTERED_MSG)
+            await self.sender.answer(message, TextInterfaceBot.NO_REGISTERED_MSG)
             return
 
-        appointments = await self._get_user_appointments_data(data_filter={'client_id': personal_chat_id})
+        appointments = await AppointmentRepository.get_client_appointments(personal_chat_id)
         if not appointments:
-            await message.answer(TextInterfaceBot.NO_APPOINTMENTS_ERROR)
+            await self.sender.answer(message, TextInterfaceBot.NO_APPOINTMENTS_ERROR)
             return
 
-        applist = []
-        for app in appointments:
-            if not app.date or not app.time or not app.pet_type:
-                await sync_to_async(app.delete)()
-            else:
-                applist.append(
-                    TextInterfaceBot.USER_APPOINTMENT_INFO_LIST.format(date=app.date, time=app.time, pet=app.pet_type))
+        applist = [TextInterfaceBot.USER_APPOINTMENT_INFO_LIST.format(date=app.date, time=app.time, pet=app.pet_type)
+                   for app in appointments]
         applist_text = TextInterfaceBot.USER_APPOINTMENT_INFO_ALL + "\n".join(applist)
-        await message.answer(applist_text)
+        await self.sender.answer(message, applist_text)
+
+    async def cmd_history(self, message):
+        personal_chat_id = message.chat.id
+
+        if not await self._is_user_exists(personal_chat_id):
+            await self.sender.answer(message, TextInterfaceBot.NO_REGISTERED_MSG)
+            return
+
+        appointments = await AppointmentRepository.get_client_history(personal_chat_id, self.history_limit)
+        if not appointments:
+            await self.sender.answer(message, TextInterfaceBot.NO_HISTORY_ERROR)
+            return
+
+        history = [TextInterfaceBot.USER_APPOINTMENT_INFO_LIST.format(date=app.date, time=app.time, pet=app.pet_type)
+                   for app in appointments]
+        await self.sender.answer(message, TextInterfaceBot.USER_APPOINTMENT_HISTORY + "\n".join(history))
@@ -53,7 +53,7 @@ class Validator(object):
         Return:
             True - дата корректна, False - некорректна.
         """
-        return bool(re.match(r'\d{4}-\d{2}-\d{2}', date_str))
+        return bool(re.fullmatch(r'\d{4}-\d{2}-\d{2}', date_str))
 
     @staticmethod
     def validate_time(time_str: str) -> bool:
@@ -65,4 +65,4 @@ class Validator(object):
         Return:
             True - формат времени корректен, False - некорректен.
         """
-        return bool(re.match(r'^\d{2}:\d{2}$', time_str))
+        return bool(re.fullmatch(r'\d{2}:\d{2}', time_str))
@@ -0,0 +1,26 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from app.admin_pagination import EstimatedCountPaginator
+
+
+class TestEstimatedCountPaginator(TestCase):
+    def queryset(self, count: int) -> MagicMock:
+        queryset = MagicMock(db='default')
+        queryset.__getitem__.side_effect = lambda item: MagicMock(count=lambda: min(count, item.stop))
+        return queryset
+
+    def test_capped_count(self):
+        paginator = EstimatedCountPaginator(self.queryset(10 ** 6), 100)
+        self.assertEqual(paginator.count, EstimatedCountPaginator.COUNT_LIMIT)
+        self.assertTrue(paginator.estimated)
+
+        paginator = EstimatedCountPaginator(self.queryset(250), 100)
+        self.assertEqual((paginator.count, paginator.num_pages), (250, 3))
+        self.assertFalse(paginator.estimated)
+
+    def test_planner_estimate(self):
+        paginator = EstimatedCountPaginator(self.queryset(10 ** 6), 100)
+        with patch.object(EstimatedCountPaginator, '_planner_estimate', return_value=3 * 10 ** 6):
+            self.assertEqual(paginator.count, 3 * 10 ** 6)
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.bots.bootstrap import StartupTimer
+
+
+ROOT = Path(__file__).resolve().parents[4]
+
+
+class TestStartupTimer(TestCase):
+    @patch('app.bots.bootstrap.perf_counter')
+    def test_phases_and_first_update(self, perf_counter):
+        perf_counter.side_effect = [10.0, 10.4, 10.9, 12.5]
+        timer = StartupTimer()
+
+        timer.mark('django')
+        timer.mark('imports')
+        timer.mark('django')  # повторная отметка не меняет этапы
+        timer.update_received()
+        timer.update_received()  # учитывается только первое обновление
+
+        self.assertEqual(list(timer.phases), ['django', 'imports', 'first_update'])
+        self.assertAlmostEqual(timer.phases['first_update'], 1.6)
+        self.assertAlmostEqual(timer.first_update, 2.5)
+
+
+class TestLazyImports(TestCase):
+    def test_light_modules_import_without_django(self):
+        code = ('import sys, app.bots, app.bots.bootstrap, app.bots.lib.common, app.bots.tail_trust.validator; '
+                'print(sorted(name for name in ("django", "aiogram") if name in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
@@ -0,0 +1,30 @@
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from app.bots import controller
+
+
+@patch('app.bots.controller.TailTrustBot')
+class TestCreateBots(TestCase):
+    def test_first_bot_is_primary(self, mock_bot):
+        controller.create_bots(['1:a', '2:b'], metrics_port=0, background_jobs=False)
+
+        self.assertEqual([(call.kwargs['primary'], call.kwargs['background_jobs']) for call in mock_bot.call_args_list],
+                         [(True, False), (False, False)])
+
+
+@patch('app.bots.controller.stop_bots', new_callable=AsyncMock)
+@patch('app.bots.controller.start_bots', new_callable=AsyncMock)
+@patch('app.bots.controller.ShardWorker')
+@patch('app.bots.controller.create_bots', return_value=[])
+@patch('app.bots.controller.signal.signal')
+@patch('app.bots.controller.asyncio.set_event_loop')
+class TestRunWorker(TestCase):
+    def test_background_jobs_run_only_in_first_worker(self, _, __, mock_create_bots, mock_worker, *mocks):
+        mock_worker.return_value.run = AsyncMock()
+
+        for index in range(3):
+            controller.run_worker(index, updates=None, tokens=['1:a', '2:b'])
+
+        self.assertEqual([call.kwargs['background_jobs'] for call in mock_create_bots.call_args_list],
+                         [True, False, False])
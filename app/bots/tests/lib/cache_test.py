@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from app.bots.lib.cache import MISSING, TTLCache
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = TTLCache(maxsize=2, ttl=10, timer=self.timer)
+
+    def test_hit_and_miss(self):
+        self.assertIs(self.cache.get(1, MISSING), MISSING)
+        self.cache.set(1, None)  # кэширование отсутствующего значения
+        self.assertIsNone(self.cache.get(1, MISSING))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_ttl_expiration(self):
+        self.cache.set(1, 'client')
+        self.timer.now = 9
+        self.assertEqual(self.cache.get(1), 'client')
+        self.timer.now = 10
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.set(1, 'a')
+        self.cache.set(2, 'b')
+        self.cache.get(1)  # 1 становится самым свежим по обращению
+        self.cache.set(3, 'c')
+        self.assertEqual(self.cache.get(1), 'a')
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(3), 'c')
+
+    def test_invalidate(self):
+        self.cache.set(1, 'a')
+        self.cache.invalidate(1)
+        self.assertIs(self.cache.get(1, MISSING), MISSING)
+
+    def test_stale_set_is_skipped(self):
+        generation = self.cache.generation
+        self.cache.invalidate(1)  # запись произошла, пока значение читалось из БД
+        self.cache.set(1, 'stale', generation=generation)
+        self.assertIs(self.cache.get(1, MISSING), MISSING)
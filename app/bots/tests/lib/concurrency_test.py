@@ -0,0 +1,78 @@
+import asyncio
+from unittest import TestCase
+
+from aiogram import types
+
+from app.bots.lib.concurrency import ChatOrderedProcessor, KeyedLock, update_chat_id
+
+
+def make_update(update_id: int, chat_id: int) -> types.Update:
+    return types.Update(update_id=update_id, message={
+        'message_id': update_id, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': str(update_id)})
+
+
+class TestKeyedLock(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_idle_locks_are_released(self):
+        locks = KeyedLock()
+
+        async def hold(key):
+            async with locks.acquire(key):
+                await asyncio.sleep(0)
+
+        async def run():
+            tasks = [asyncio.ensure_future(hold(key)) for key in (1, 1, 2)]
+            await asyncio.sleep(0)
+            self.assertEqual(len(locks), 2)
+            await asyncio.gather(*tasks)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual(len(locks), 0)
+
+
+class TestChatOrderedProcessor(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_update_chat_id(self):
+        self.assertEqual(update_chat_id(make_update(1, 42)), 42)
+        callback = types.Update(update_id=2, callback_query={'id': '1', 'from': {'id': 7, 'is_bot': False}})
+        self.assertEqual(update_chat_id(callback), 7)
+        self.assertIsNone(update_chat_id(types.Update(update_id=3)))
+
+    def test_ordered_within_chat_parallel_across_chats(self):
+        running = set()
+        max_running = 0
+        processed = []
+
+        async def handler(update):
+            nonlocal max_running
+            chat_id = update.message.chat.id
+            self.assertNotIn(chat_id, running)  # обновления одного чата не пересекаются
+            running.add(chat_id)
+            max_running = max(max_running, len(running))
+            await asyncio.sleep(0.01 if update.update_id % 2 else 0)
+            running.discard(chat_id)
+            processed.append((chat_id, update.update_id))
+
+        processor = ChatOrderedProcessor(handler, concurrency=3)
+        updates = [make_update(update_id, update_id % 4) for update_id in range(20)]
+
+        async def run():
+            await asyncio.gather(*(processor.process(update) for update in updates))
+
+        self.loop.run_until_complete(run())
+
+        self.assertEqual(max_running, 3)
+        for chat_id in range(4):
+            chat_updates = [update_id for chat, update_id in processed if chat == chat_id]
+            self.assertEqual(chat_updates, sorted(chat_updates))
+        self.assertEqual(processor.active_chats, 0)
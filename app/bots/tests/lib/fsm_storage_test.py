@@ -0,0 +1,44 @@
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from app.bots.lib.fsm_storage import FSMStorageBackend, SQLiteStorage, create_storage
+
+
+class TestSQLiteStorage(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'fsm.db')
+
+    def tearDown(self):
+        self.loop.close()
+        self.directory.cleanup()
+
+    def test_state_survives_restart(self):
+        storage = SQLiteStorage(self.path)
+        self.loop.run_until_complete(storage.set_state(chat=1, user=1, state='AppointmentStates:time'))
+        self.loop.run_until_complete(storage.update_data(chat=1, user=1, data={'appointment_id': 10}))
+        self.loop.run_until_complete(storage.close())
+
+        storage = SQLiteStorage(self.path)
+        self.assertEqual(self.loop.run_until_complete(storage.get_state(chat=1, user=1)), 'AppointmentStates:time')
+        self.assertEqual(self.loop.run_until_complete(storage.get_data(chat=1, user=1)), {'appointment_id': 10})
+        self.loop.run_until_complete(storage.close())
+
+    def test_finished_state_is_removed(self):
+        storage = SQLiteStorage(self.path)
+        self.loop.run_until_complete(storage.set_state(chat=1, user=1, state='RegistrationStates:name'))
+        self.loop.run_until_complete(storage.finish(chat=1, user=1))
+        rows = storage._connection.execute('SELECT COUNT(*) FROM fsm_state').fetchone()[0]
+        self.loop.run_until_complete(storage.close())
+
+        self.assertEqual(rows, 0)
+
+    def test_create_storage(self):
+        self.assertIsInstance(create_storage(FSMStorageBackend.MEMORY), MemoryStorage)
+        with self.assertRaises(ValueError):
+            create_storage('redis')
@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from app.bots.lib.metrics import (Metric, MetricsRegistry, UpdateMetricsMiddleware, _db_query_wrapper, handler_duration,
+                                  handler_errors, instrument_handler, update_db_queries)
+
+
+class TestMetricsRegistry(TestCase):
+    def test_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('errors_total', 'Ошибки', ['handler'])
+        histogram = registry.histogram('latency_seconds', 'Задержка', buckets=(0.1, 1.0))
+        registry.callback('queue_depth', 'Очередь', lambda: 7)
+        registry.callback('sent_total', 'Отправлено', lambda: 1, kind='counter', bot='1')
+        registry.callback('sent_total', 'Отправлено', lambda: 2, kind='counter', bot='2')
+        registry.callback('sent_total', 'Отправлено', lambda: 3, kind='counter', bot='2')
+
+        counter.inc(handler='cmd_"help"')
+        counter.inc(2, handler='cmd_"help"')
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE errors_total counter', lines)
+        self.assertIn('errors_total{handler="cmd_\\"help\\""} 3', lines)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count 3', lines)
+        self.assertIn('queue_depth 7', lines)
+        self.assertIn('sent_total{bot="1"} 1', lines)
+        self.assertIn('sent_total{bot="2"} 3', lines)
+        self.assertEqual(lines.count('# TYPE sent_total counter'), 1)
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('errors_total', 'Ошибки', ['handler'])
+        counter.inc(handler='a\\b"c\nd')
+
+        self.assertIn('errors_total{handler="a\\\\b\\"c\\nd"} 1', registry.render().splitlines())
+
+    def test_metric_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Metric('name', 'Описание')
+
+    def test_concurrent_updates(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('queries_total', 'Запросы')
+        histogram = registry.histogram('duration_seconds', 'Время', buckets=(0.1,))
+
+        def update(_):
+            for _ in range(10000):
+                counter.inc()
+                histogram.observe(0.05)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(update, range(4)))
+
+        self.assertEqual(counter.value(), 40000)
+        self.assertEqual(histogram.count(), 40000)
+        self.assertIn('duration_seconds_bucket{le="0.1"} 40000', registry.render().splitlines())
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_instrument_handler(self):
+        async def cmd_broken(message):
+            raise RuntimeError()
+
+        handler = instrument_handler(cmd_broken)
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(handler(MagicMock()))
+        self.assertEqual(handler.__wrapped__, cmd_broken)  # сигнатура для aiogram берется у исходной функции
+        self.assertEqual(handler_errors.value(handler='cmd_broken'), 1)
+        self.assertEqual(handler_duration.count(handler='cmd_broken'), 1)
+
+    def test_update_db_queries(self):
+        middleware = UpdateMetricsMiddleware()
+        execute = MagicMock()
+        count = update_db_queries.count()
+
+        async def process_update():
+            data = {}
+            await middleware.on_pre_process_update(MagicMock(), data)
+            for _ in range(3):
+                _db_query_wrapper(execute, 'SELECT 1', None, False, {})
+            return data
+
+        data = self.loop.run_until_complete(process_update())
+        self.assertEqual(data['_metrics'][1][0], 3)
+        self.loop.run_until_complete(middleware.on_post_process_update(MagicMock(), [], data))
+        self.assertEqual(update_db_queries.count(), count + 1)
@@ -0,0 +1,104 @@
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+from collections import Counter
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from aiogram.dispatcher.handler import current_handler
+
+from app.bots.lib.profiler import UpdateProfiler
+
+
+class TestUpdateProfiler(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.loop.close()
+        self.directory.cleanup()
+
+    def test_slow_updates_profiled(self):
+        profiler = UpdateProfiler(self.directory.name, sample_rate=0, slow_threshold=0.05, interval=0.001,
+                                  flush_interval=60, max_files=2)
+
+        async def cmd_slow(message):
+            await asyncio.sleep(0.1)
+
+        async def cmd_fast(message):
+            pass
+
+        async def process_update(handler):
+            data = {}
+            await profiler.on_pre_process_update(MagicMock(), data)
+            token = current_handler.set(handler)
+            try:
+                await profiler.on_process_message(MagicMock(), data)
+                await handler(MagicMock())
+            finally:
+                current_handler.reset(token)
+            await profiler.on_post_process_update(MagicMock(), [], data)
+
+        async def process_updates():
+            await asyncio.gather(process_update(cmd_slow), process_update(cmd_fast))
+
+        self.loop.run_until_complete(process_updates())
+        profiler.close()
+
+        self.assertEqual(profiler.profiled, 1)
+        [path] = glob.glob(os.path.join(self.directory.name, 'profile-*.folded'))
+        with open(path, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('cmd_slow;'))
+            self.assertIn('cmd_slow (profiler_test.py:', stack)
+            self.assertGreater(int(count), 0)
+
+    def test_concurrent_sampling(self):
+        profiler = UpdateProfiler(self.directory.name, sample_rate=1, slow_threshold=0, interval=0,
+                                  flush_interval=60, max_files=1)
+
+        async def process_update(index):
+            data = {}
+            await profiler.on_pre_process_update(MagicMock(), data)
+            for _ in range(index % 5):
+                await asyncio.sleep(0)
+            await profiler.on_post_process_update(MagicMock(), [], data)
+
+        async def process_updates():
+            for _ in range(20):
+                await asyncio.gather(*(process_update(index) for index in range(50)))
+
+        # сэмплер изменяет счетчики профилей, пока цикл событий их агрегирует; частое переключение потоков
+        # повышает вероятность гонки
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            self.loop.run_until_complete(process_updates())
+        finally:
+            sys.setswitchinterval(switch_interval)
+        profiler.close()
+
+        self.assertEqual(profiler.profiled, 1000)
+
+    def test_max_files(self):
+        with self.assertRaises(ValueError):
+            UpdateProfiler(self.directory.name, sample_rate=1, slow_threshold=0, interval=0.001,
+                           flush_interval=60, max_files=0)
+
+        profiler = UpdateProfiler(self.directory.name, sample_rate=1, slow_threshold=0, interval=0.001,
+                                  flush_interval=60, max_files=1)
+        for name in ('profile-1-old.folded', 'profile-2-old.folded'):
+            path = os.path.join(self.directory.name, name)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('stack 1\n')
+            os.utime(path, (0, 0))
+        profiler._write(Counter({'handler;stack': 1}))
+
+        [path] = glob.glob(os.path.join(self.directory.name, 'profile-*.folded'))
+        self.assertTrue(os.path.basename(path).startswith(f'profile-{os.getpid()}-'))
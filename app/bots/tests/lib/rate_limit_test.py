@@ -0,0 +1,54 @@
+import asyncio
+from unittest import TestCase
+
+from app.bots.lib.rate_limit import PriorityLimiter, TokenBucket
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.bucket = TokenBucket(rate=2, capacity=2, timer=self.timer)
+
+    def test_burst_and_refill(self):
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertTrue(self.bucket.try_acquire())
+        self.assertFalse(self.bucket.try_acquire())
+        self.assertEqual(self.bucket.delay(), 0.5)
+        self.timer.now = 0.5
+        self.assertTrue(self.bucket.try_acquire())
+
+    def test_reserve_queues_in_order(self):
+        self.assertEqual([self.bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+    def test_pause(self):
+        self.bucket.pause(3)
+        self.assertEqual(self.bucket.reserve(), 3.5)
+        self.assertFalse(self.bucket.is_idle)
+
+
+class TestPriorityLimiter(TestCase):
+    def test_priority_order(self):
+        loop = asyncio.new_event_loop()
+        limiter = PriorityLimiter(TokenBucket(rate=100, capacity=1))
+        served = []
+
+        async def acquire(name, priority):
+            await limiter.acquire(priority)
+            served.append(name)
+
+        async def scenario():
+            await limiter.acquire(0)  # забираем единственный токен, остальные встают в очередь
+            await asyncio.gather(acquire('bulk-1', 10), acquire('bulk-2', 10), acquire('reply', 0))
+
+        loop.run_until_complete(scenario())
+        loop.close()
+
+        self.assertEqual(served, ['reply', 'bulk-1', 'bulk-2'])
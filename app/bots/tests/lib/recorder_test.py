@@ -0,0 +1,108 @@
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from aiogram import types
+
+from app.bots.lib.recorder import UpdateRecorder, UpdateScrubber, mask_text, read_recording, recording_path
+
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1, 'date': 0, 'chat': {'id': 42, 'type': 'private', 'first_name': 'Иван'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Иван', 'username': 'ivan_1'},
+        'contact': {'phone_number': '+79161234567', 'first_name': 'Иван', 'user_id': 42},
+        'text': 'Иван Petrov 1',
+    },
+}
+
+
+class TestUpdateScrubber(TestCase):
+    def setUp(self):
+        self.scrubber = UpdateScrubber(key=b'secret', is_safe_text=lambda text: text.startswith('/'))
+
+    def test_mask_text(self):
+        self.assertEqual(mask_text('Иван Petrov +7 (916)'), 'Жжжж Xxxxxx +0 (000)')
+
+    def test_scrub(self):
+        message = self.scrubber.scrub(UPDATE)['message']
+
+        self.assertEqual(message['text'], 'Жжжж Xxxxxx 0')
+        self.assertEqual(message['from']['username'], 'xxxx_0')
+        self.assertEqual(message['contact']['phone_number'], '+00000000000')
+        self.assertNotEqual(message['chat']['id'], 42)
+        self.assertEqual(message['chat']['id'], message['from']['id'])
+        self.assertEqual(message['chat']['id'], message['contact']['user_id'])
+        self.assertEqual(message['message_id'], 1)
+
+        command = self.scrubber.scrub({'message': {'text': '/start'}})
+        self.assertEqual(command['message']['text'], '/start')
+
+    def test_scrub_command_arguments(self):
+        scrubber = UpdateScrubber(key=b'secret', is_safe_text=lambda text: text in ('/start', '/help'))
+
+        self.assertEqual(scrubber.scrub_text('/start +79991234567 Иван'), '/start +00000000000 Жжжж')
+        self.assertEqual(scrubber.scrub_text('/help\nИван'), '/help\nЖжжж')
+        self.assertEqual(scrubber.scrub_text('/unknown Иван'), '/xxxxxxx Жжжж')
+
+    def test_scrub_location_venue_contact(self):
+        location = {'latitude': 55.7558, 'longitude': 37.6173}
+        message = self.scrubber.scrub({'message': {
+            'location': location,
+            'venue': {'location': location, 'title': 'Дом', 'address': 'ул. Ленина, 1', 'google_place_id': 'ChIJ1'},
+            'contact': {'phone_number': '+79161234567', 'first_name': 'Иван', 'user_id': 42,
+                        'vcard': 'BEGIN:VCARD', 'extra': 'Иванов'},
+        }})['message']
+
+        self.assertEqual(message['location'], {'latitude': 0.0, 'longitude': 0.0})
+        self.assertEqual(message['venue'], {'location': {'latitude': 0.0, 'longitude': 0.0}, 'title': 'Жжж',
+                                            'address': 'жж. Жжжжжж, 0', 'google_place_id': 'XxXX0'})
+        self.assertEqual(message['contact']['extra'], 'Жжжжжж')
+        self.assertEqual(message['contact']['vcard'], 'XXXXX:XXXXX')
+        self.assertNotEqual(message['contact']['user_id'], 42)
+
+
+class TestUpdateRecorder(TestCase):
+    def test_record_and_read(self):
+        scrubber = UpdateScrubber(key=b'secret', is_safe_text=lambda text: False)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'updates.jsonl.gz')
+            recorder = UpdateRecorder(path, scrubber)
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(recorder.on_pre_process_update(types.Update(**UPDATE), {}))
+            loop.close()
+            recorder.close()
+
+            recording = list(read_recording(path))
+
+        self.assertEqual(len(recording), 1)
+        self.assertEqual(recording[0]['update']['update_id'], 1)
+        self.assertEqual(recording[0]['update']['message']['text'], 'Жжжж Xxxxxx 0')
+
+    def test_record_in_writer_thread(self):
+        scrubbed_in = []
+        scrubber = UpdateScrubber(key=b'secret', is_safe_text=lambda text: False)
+        scrub = scrubber.scrub
+        scrubber.scrub = lambda *args: scrubbed_in.append(threading.get_ident()) or scrub(*args)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'updates.jsonl.gz')
+            recorder = UpdateRecorder(path, scrubber, queue_size=2)
+            recorder._queue.put((0, {'update_id': 0}))  # очередь заполняется быстрее, чем поток успевает записать
+            for update_id in range(1, 10):
+                recorder.record(types.Update(**{**UPDATE, 'update_id': update_id}))
+            recorder.close()
+
+            recording = list(read_recording(path))
+
+        self.assertNotIn(threading.get_ident(), scrubbed_in)
+        self.assertEqual(len(recording) + recorder.dropped, 10)
+        self.assertEqual([line['update']['update_id'] for line in recording],
+                         sorted(line['update']['update_id'] for line in recording))
+
+    def test_recording_path(self):
+        self.assertEqual(recording_path('/var/updates-{bot}-{pid}.jsonl.gz', '123', 7), '/var/updates-123-7.jsonl.gz')
+        self.assertEqual(recording_path('/var/updates.jsonl.gz', '123', 7), '/var/updates-123-7.jsonl.gz')
+        self.assertEqual(recording_path('updates-{pid}.jsonl.gz', '123', 7), 'updates-7-123.jsonl.gz')
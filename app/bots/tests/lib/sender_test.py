@@ -0,0 +1,67 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock, Mock
+
+from aiogram.utils.exceptions import RetryAfter
+
+from app.bots.lib.sender import OutboundSender, SendPriority
+
+
+class TestOutboundSender(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.bot = Mock()
+        self.bot.send_message = AsyncMock()
+        self.sender = OutboundSender(self.bot, global_rate=1000, chat_rate=1000, chat_burst=10, max_retries=2)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_retry_after_is_honoured(self):
+        self.bot.send_message.side_effect = [RetryAfter(0), 'sent']
+
+        result = self.loop.run_until_complete(self.sender.send_message(1, 'text'))
+
+        self.assertEqual(result, 'sent')
+        self.assertEqual(self.bot.send_message.await_count, 2)
+        self.assertEqual(self.sender.stats()['retry_after'], 1)
+
+    def test_retry_after_gives_up(self):
+        self.bot.send_message.side_effect = RetryAfter(0)
+
+        with self.assertRaises(RetryAfter):
+            self.loop.run_until_complete(self.sender.send_message(1, 'text', priority=SendPriority.INTERACTIVE))
+        self.assertEqual(self.bot.send_message.await_count, 3)
+
+    def test_retry_after_pauses_other_chats(self):
+        sent_at = {}
+
+        async def send_message(chat_id, text):
+            if chat_id == 1 and chat_id not in sent_at:
+                sent_at[chat_id] = None
+                raise RetryAfter(1)
+            sent_at[chat_id] = self.loop.time()
+
+        self.bot.send_message.side_effect = send_message
+
+        async def send():
+            started = self.loop.time()
+            first = asyncio.ensure_future(self.sender.send_message(1, 'text'))
+            await asyncio.sleep(0.01)  # ответ RetryAfter получен до отправки во второй чат
+            await self.sender.send_message(2, 'text')
+            await first
+            return started
+
+        started = self.loop.run_until_complete(send())
+
+        self.assertGreaterEqual(sent_at[2] - started, 0.9)
+        self.assertGreaterEqual(sent_at[1] - started, 0.9)
+
+    def test_answer(self):
+        message = Mock()
+        message.answer = AsyncMock()
+
+        self.loop.run_until_complete(self.sender.answer(message, 'text', reply_markup='markup'))
+
+        message.answer.assert_awaited_once_with('text', reply_markup='markup')
+        self.assertEqual(self.sender.stats()['sent'], 1)
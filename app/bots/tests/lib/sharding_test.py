@@ -0,0 +1,123 @@
+import asyncio
+import queue
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram import Bot, Dispatcher, types
+
+from app.bots.lib.sharding import ShardRouter, ShardWorker, WorkerSupervisor, shard_for
+
+
+def make_update(update_id: int, chat_id: int) -> types.Update:
+    return types.Update(update_id=update_id, message={
+        'message_id': update_id, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'text': str(update_id)})
+
+
+class TestShardFor(TestCase):
+    def test_shard_for(self):
+        self.assertEqual({shard_for(make_update(i, 42), 4) for i in range(10)}, {42 % 4})
+        self.assertIn(shard_for(make_update(1, -100123), 4), range(4))  # группы с отрицательным идентификатором
+        self.assertEqual(shard_for(types.Update(update_id=7), 4), 3)  # обновление вне чата
+
+
+class TestShardRouter(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_route_preserves_chat_order_when_queue_is_full(self):
+        queues = [queue.Queue(maxsize=1), queue.Queue(maxsize=1)]
+        router = ShardRouter(queues)
+        received = []
+
+        async def consume():
+            # освобождаем место в очереди только после того, как маршрутизация упрется в ее размер
+            await asyncio.sleep(0.05)
+            for _ in range(3):
+                received.append(await self.loop.run_in_executor(None, queues[0].get))
+
+        async def scenario():
+            consumer = asyncio.ensure_future(consume())
+            await asyncio.gather(*(router.route(0, make_update(i, 2)) for i in range(1, 4)))
+            await router.join()
+            await consumer
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual([data['update_id'] for _, data in received], [1, 2, 3])
+        self.assertEqual(router.routed, [3, 0])
+        self.assertTrue(queues[1].empty())
+
+
+class TestShardWorker(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_run_until_sentinel(self):
+        updates = queue.Queue()
+        for bot_index, update_id in ((0, 1), (1, 2), (0, 3)):
+            updates.put((bot_index, make_update(update_id, update_id).to_python()))
+        updates.put(None)
+        dispatchers = [MagicMock(spec=Dispatcher), MagicMock(spec=Dispatcher)]
+        for dispatcher in dispatchers:
+            dispatcher.bot = MagicMock(spec=Bot)
+            dispatcher.updates_handler = MagicMock()
+            dispatcher.updates_handler.notify = AsyncMock(side_effect=[None, RuntimeError()])
+        worker = ShardWorker(updates, dispatchers, max_pending=1, batch_size=2)
+
+        self.loop.run_until_complete(worker.run())
+
+        self.assertEqual(worker.processed, 3)
+        self.assertEqual([call.args[0].update_id for call in dispatchers[0].updates_handler.notify.await_args_list],
+                         [1, 3])
+        self.assertEqual(dispatchers[1].updates_handler.notify.await_args.args[0].update_id, 2)
+
+
+class TestWorkerSupervisor(TestCase):
+    def setUp(self):
+        self.processes = []
+
+        def create_process(**kwargs):
+            process = SimpleNamespace(pid=len(self.processes), exitcode=None, kwargs=kwargs, start=MagicMock())
+            process.is_alive = lambda: process.exitcode is None
+            self.processes.append(process)
+            return process
+
+        context = SimpleNamespace(Queue=MagicMock(), Process=create_process)
+        self.supervisor = WorkerSupervisor(
+            target=print, workers=2, queue_size=10, restart_delay=1, max_restart_delay=4, context=context)
+
+    @patch('app.bots.lib.sharding.monotonic')
+    def test_check_restarts_with_backoff(self, monotonic):
+        monotonic.return_value = 100.0
+        for index in range(2):
+            self.supervisor._spawn(index)
+
+        self.processes[1].exitcode = 1
+        self.supervisor.check()
+        monotonic.return_value = 100.5
+        self.supervisor.check()
+        self.assertEqual(len(self.processes), 2)  # задержка перед перезапуском еще не истекла
+
+        monotonic.return_value = 101.0
+        self.supervisor.check()
+        self.assertEqual(len(self.processes), 3)
+        self.assertEqual(self.processes[2].kwargs['args'][0], 1)
+        self.assertIs(self.supervisor.processes[1], self.processes[2])
+
+        # повторное падение сразу после перезапуска удваивает задержку
+        self.processes[2].exitcode = 1
+        self.supervisor.check()
+        monotonic.return_value = 102.5
+        self.supervisor.check()
+        self.assertEqual(len(self.processes), 3)
+        monotonic.return_value = 103.0
+        self.supervisor.check()
+        self.assertEqual(len(self.processes), 4)
+        self.assertEqual(self.supervisor.restarts, 2)
@@ -0,0 +1,34 @@
+import asyncio
+import time
+from unittest import TestCase
+
+from app.bots.lib.watchdog import LoopBlockedError, assert_loop_not_blocked
+
+
+class TestLoopWatchdog(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_blocking_handler(self):
+        async def blocking_handler():
+            await asyncio.sleep(0.05)
+            time.sleep(0.3)  # синхронный ввод-вывод в цикле событий
+
+        with self.assertRaises(LoopBlockedError) as context:
+            with assert_loop_not_blocked(self.loop, threshold=0.1):
+                self.loop.run_until_complete(blocking_handler())
+        self.assertIn('blocking_handler', str(context.exception))
+
+    def test_non_blocking_handler(self):
+        async def handler():
+            for _ in range(10):
+                await asyncio.sleep(0.02)
+
+        with assert_loop_not_blocked(self.loop, threshold=0.1) as watchdog:
+            self.loop.run_until_complete(handler())
+            time.sleep(0.3)  # остановленный цикл событий не считается заблокированным
+            self.loop.run_until_complete(handler())
+        self.assertFalse(watchdog.blocks)
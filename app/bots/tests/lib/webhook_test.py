@@ -0,0 +1,100 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock
+
+from aiogram import Bot, Dispatcher
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.bots.lib.webhook import WebhookServer
+
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1, 'date': 0, 'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Test'}, 'text': '/help',
+    },
+}
+
+
+class TestWebhookServer(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.dispatcher = Dispatcher(Bot(token='123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi', loop=self.loop))
+        self.dispatcher.updates_handler.notify = AsyncMock()
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.dispatcher.bot.close())
+        self.loop.close()
+
+    def request(self, server: WebhookServer, **kwargs) -> int:
+        async def post() -> int:
+            client = TestClient(TestServer(server.create_app()))
+            await client.start_server()
+            try:
+                response = await client.post('/webhook', **kwargs)
+                await server.queue.join()
+                return response.status
+            finally:
+                await client.close()
+
+        return self.loop.run_until_complete(post())
+
+    def test_update_is_processed(self):
+        server = WebhookServer(self.dispatcher, '/webhook', workers=2, max_body_size=1024, queue_size=10)
+        self.assertEqual(self.request(server, json=UPDATE), 200)
+        update = self.dispatcher.updates_handler.notify.await_args.args[0]
+        self.assertEqual(update.message.chat.id, 42)
+
+    def test_invalid_requests(self):
+        server = WebhookServer(self.dispatcher, '/webhook', workers=2, max_body_size=1024, queue_size=10)
+        self.assertEqual(self.request(server, data='not json'), 400)
+        for body in ([], 1, 'x', None):
+            with self.subTest(body=body):
+                self.assertEqual(self.request(server, json=body), 400)
+        self.assertEqual(self.request(server, json={'text': 'x' * 2048}), 413)
+        self.dispatcher.updates_handler.notify.assert_not_awaited()
+
+    def test_full_queue_rejected(self):
+        server = WebhookServer(self.dispatcher, '/webhook', workers=0, max_body_size=1024, queue_size=1)
+
+        async def post_twice() -> list:
+            client = TestClient(TestServer(server.create_app()))
+            await client.start_server()
+            try:
+                return [(await client.post('/webhook', json=UPDATE)).status for _ in range(2)]
+            finally:
+                server.queue.get_nowait()
+                server.queue.task_done()
+                await client.close()
+
+        self.assertEqual(self.loop.run_until_complete(post_twice()), [200, 503])
+
+    def test_state_is_not_shared_between_updates(self):
+        self.dispatcher = Dispatcher(self.dispatcher.bot, storage=MemoryStorage())
+        handled = []
+
+        async def start(message, state):
+            handled.append('start')
+            await state.set_state('next')
+
+        async def next_step(message):
+            handled.append('next')
+
+        self.dispatcher.register_message_handler(next_step, state='next')
+        self.dispatcher.register_message_handler(start)
+        server = WebhookServer(self.dispatcher, '/webhook', workers=1, max_body_size=1024, queue_size=10)
+
+        async def post_twice() -> None:
+            client = TestClient(TestServer(server.create_app()))
+            await client.start_server()
+            try:
+                for update_id in (1, 2):
+                    await client.post('/webhook', json={**UPDATE, 'update_id': update_id})
+                await server.queue.join()
+            finally:
+                await client.close()
+
+        self.loop.run_until_complete(post_twice())
+        self.assertEqual(handled, ['start', 'next'])
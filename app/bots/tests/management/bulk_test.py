@@ -0,0 +1,44 @@
+import datetime
+import io
+from unittest import TestCase
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from app.management.bulk import (APPOINTMENT_FIELDS, Progress, detect_format, format_row, parse_appointment,
+                                 parse_client, read_rows, write_rows)
+
+
+class TestBulk(TestCase):
+    def test_detect_format(self):
+        self.assertEqual(detect_format('clients.csv.gz', None), 'csv')
+        self.assertEqual(detect_format('clients.jsonl', None), 'jsonl')
+        self.assertEqual(detect_format('-', 'jsonl'), 'jsonl')
+        with self.assertRaises(ValueError):
+            detect_format('clients.txt', None)
+
+    def test_parse_client(self):
+        client = parse_client({'telegram_chat_id': '42', 'name': 'Иван', 'surname': 'Петров', 'phone': '+79990001122'})
+        self.assertEqual((client.telegram_chat_id, client.name, client.phone), (42, 'Иван', '+79990001122'))
+        for row in (
+                {'telegram_chat_id': 'x', 'name': 'Иван', 'surname': 'Петров', 'phone': '+79990001122'},
+                {'telegram_chat_id': '42', 'name': 'Иван1', 'surname': 'Петров', 'phone': '+79990001122'},
+                {'telegram_chat_id': '42', 'name': 'Иван', 'surname': 'Петров', 'phone': '123'},
+        ):
+            with self.subTest(row=row), self.assertRaises(ValueError):
+                parse_client(row)
+
+    def test_appointment_round_trip(self):
+        # строка, выгруженная export_data, загружается import_data без изменений
+        row = (42, datetime.date(2024, 3, 18), datetime.time(10, 0), 'Кошка', 'confirmed',
+               datetime.datetime(2024, 3, 16, 9, 0, tzinfo=datetime.timezone.utc))
+        for file_format in ('csv', 'jsonl'):
+            with self.subTest(file_format=file_format):
+                file = io.StringIO()
+                write_rows(file, file_format, APPOINTMENT_FIELDS, [format_row(row)], Progress(io.StringIO(), 'test'))
+                file.seek(0)
+                [parsed] = read_rows(file, file_format)
+                appointment = parse_appointment(parsed)
+                self.assertEqual((appointment.client_id, appointment.date, appointment.time, appointment.pet_type,
+                                  appointment.created_at), (row[0], row[1], row[2], row[3], row[5]))
+
+        with self.assertRaises(ValueError):
+            parse_appointment({'client_id': '42', 'date': '2024-03-18', 'time': '', 'pet_type': 'Кошка'})
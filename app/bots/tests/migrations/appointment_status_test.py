@@ -0,0 +1,59 @@
+import datetime
+import os
+import tempfile
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+# Миграции применяются к временной БД в файле, рабочая БД не изменяется
+old_database_name = None
+
+
+def setUpModule():
+    global old_database_name
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite':
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'migrations_test_{os.getpid()}.db')
+    old_database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+
+
+def tearDownModule():
+    connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+
+class TestAppointmentStatusMigration(TransactionTestCase):
+    migrate_from = [('app', '0005_appointment_created_at')]
+    migrate_to = [('app', '0006_appointment_status')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes('app')
+        executor.migrate(self.migrate_from)
+        self.apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_completed_appointments_are_confirmed(self):
+        Client = self.apps.get_model('app', 'Client')
+        Appointment = self.apps.get_model('app', 'Appointment')
+        client = Client.objects.create(telegram_chat_id=1, name='Иван', surname='Петров', phone='+79990001122')
+        date, time = datetime.date(2030, 3, 18), datetime.time(10, 0)
+        completed = Appointment.objects.create(client=client, date=date, time=time, pet_type='Кошка').id
+        no_pet = Appointment.objects.create(client=client, date=date, time=time).id
+        no_time = Appointment.objects.create(client=client, date=date, pet_type='Кошка').id
+        empty = Appointment.objects.create(client=client).id
+
+        Appointment = self.migrate().get_model('app', 'Appointment')
+
+        statuses = dict(Appointment.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {completed: 'confirmed', no_pet: 'draft', no_time: 'draft', empty: 'draft'})
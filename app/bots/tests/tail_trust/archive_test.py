@@ -0,0 +1,29 @@
+import asyncio
+import datetime
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from app.bots.tail_trust.archive import AppointmentArchiver
+
+
+class TestAppointmentArchiver(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.archiver = AppointmentArchiver(max_age=datetime.timedelta(days=180), batch_size=1000, interval=3600)
+
+    def tearDown(self):
+        self.loop.close()
+
+    @patch('app.bots.tail_trust.archive.timezone')
+    @patch('app.bots.tail_trust.archive.AppointmentRepository')
+    def test_run_once(self, repository, timezone):
+        timezone.localdate.return_value = datetime.date(2024, 9, 1)
+        repository.archive = AsyncMock(side_effect=[25000, 0])
+
+        first = self.loop.run_until_complete(self.archiver.run_once())
+        second = self.loop.run_until_complete(self.archiver.run_once())
+
+        repository.archive.assert_awaited_with(datetime.date(2024, 3, 5), 1000)
+        self.assertEqual((first.archived, second.archived), (25000, 0))
+        self.assertEqual(self.archiver.stats.archived, 25000)
+        self.assertGreater(first.throughput, 0)
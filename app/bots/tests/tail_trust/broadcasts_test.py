@@ -0,0 +1,63 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from aiogram.utils.exceptions import BotBlocked
+
+from app.bots.tail_trust.broadcasts import BroadcastRunner
+from app.bots.tail_trust.read_models import BroadcastRecord
+
+
+@patch('app.bots.tail_trust.broadcasts.ClientRepository')
+@patch('app.bots.tail_trust.broadcasts.BroadcastRepository')
+class TestBroadcastRunner(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.send_message = AsyncMock()
+        self.runner = BroadcastRunner(
+            send_message=self.send_message, concurrency=2, chunk_size=2, lease=60, poll_interval=1, worker_id='test')
+        self.broadcast = BroadcastRecord(1, 'Клиника закрыта 1 января', 10, 'test:token')
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_run_checkpoints_each_chunk(self, broadcasts, clients):
+        clients.get_chat_ids = AsyncMock(side_effect=[[11, 12], [13], []])
+        broadcasts.checkpoint = AsyncMock(return_value=True)
+        broadcasts.finish = AsyncMock()
+        broadcasts.release = AsyncMock()
+        self.send_message.side_effect = [None, BotBlocked('Forbidden: bot was blocked by the user'), None]
+
+        stats = self.loop.run_until_complete(self.runner.run(self.broadcast))
+
+        self.assertEqual((stats.sent, stats.failed), (2, 1))
+        self.assertEqual([call.args[1] for call in broadcasts.checkpoint.await_args_list], [12, 13])
+        self.assertEqual([call.args[0] for call in clients.get_chat_ids.await_args_list], [10, 12, 13])  # keyset
+        first_chunk = broadcasts.checkpoint.await_args_list[0].args[2]
+        self.assertEqual([(chat_id, status) for chat_id, status, _ in first_chunk], [(11, 'sent'), (12, 'failed')])
+        self.assertIn('BotBlocked', first_chunk[1][2])
+        broadcasts.finish.assert_awaited_once_with(self.broadcast)
+        broadcasts.release.assert_not_awaited()
+
+    def test_run_stops_when_cancelled(self, broadcasts, clients):
+        clients.get_chat_ids = AsyncMock(side_effect=[[11, 12], [13], []])
+        broadcasts.checkpoint = AsyncMock(return_value=False)
+        broadcasts.finish = AsyncMock()
+        broadcasts.release = AsyncMock()
+
+        stats = self.loop.run_until_complete(self.runner.run(self.broadcast))
+
+        self.assertEqual(stats.sent, 2)  # вторая пачка не отправляется
+        broadcasts.finish.assert_not_awaited()
+        broadcasts.release.assert_awaited_once_with(self.broadcast)
+
+    def test_run_releases_on_error(self, broadcasts, clients):
+        clients.get_chat_ids = AsyncMock(side_effect=[[11, 12], []])
+        broadcasts.checkpoint = AsyncMock(side_effect=RuntimeError('database is locked'))
+        broadcasts.finish = AsyncMock()
+        broadcasts.release = AsyncMock()
+
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(self.runner.run(self.broadcast))
+
+        broadcasts.release.assert_awaited_once_with(self.broadcast)
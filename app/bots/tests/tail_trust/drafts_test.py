@@ -0,0 +1,28 @@
+import asyncio
+import datetime
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from app.bots.tail_trust.drafts import DraftCleaner
+
+
+class TestDraftCleaner(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.cleaner = DraftCleaner(max_age=datetime.timedelta(hours=24), batch_size=500, interval=3600)
+
+    def tearDown(self):
+        self.loop.close()
+
+    @patch('app.bots.tail_trust.drafts.timezone')
+    @patch('app.bots.tail_trust.drafts.AppointmentRepository')
+    def test_run_once(self, repository, timezone):
+        timezone.now.return_value = datetime.datetime(2024, 3, 16, 9, 0)
+        repository.delete_drafts = AsyncMock(side_effect=[1203, 0])
+
+        first = self.loop.run_until_complete(self.cleaner.run_once())
+        second = self.loop.run_until_complete(self.cleaner.run_once())
+
+        repository.delete_drafts.assert_awaited_with(datetime.datetime(2024, 3, 15, 9, 0), 500)
+        self.assertEqual((first.deleted, second.deleted), (1203, 0))
+        self.assertEqual(self.cleaner.stats.deleted, 1203)
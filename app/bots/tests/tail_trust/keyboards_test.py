@@ -0,0 +1,30 @@
+import json
+from unittest import TestCase
+
+from app.bots.tail_trust.keyboards import KeyboardCache, serialize_keyboard
+
+
+class TestKeyboardCache(TestCase):
+    def test_serialize_keyboard(self):
+        keyboard = json.loads(serialize_keyboard(['Собака', 'Кошка']))
+        self.assertEqual(keyboard['keyboard'], [[{'text': 'Собака'}], [{'text': 'Кошка'}]])
+        self.assertTrue(keyboard['resize_keyboard'])
+
+    def test_rebuild_on_version_change(self):
+        cache = KeyboardCache()
+        buttons = ['10:00']
+
+        first = cache.get('times', 1, lambda: buttons)
+        self.assertIs(cache.get('times', 1, lambda: ['11:00']), first)
+        self.assertEqual(cache.builds, 1)
+
+        self.assertIn('11:00', cache.get('times', 2, lambda: ['11:00']))
+        self.assertIsNone(cache.get('dates', 1, lambda: []))
+        self.assertEqual(cache.builds, 3)
+
+    def test_maxsize(self):
+        cache = KeyboardCache(maxsize=2)
+        for key in range(3):
+            cache.get(key, None, lambda: ['button'])
+        cache.get(0, None, lambda: ['button'])
+        self.assertEqual(cache.builds, 4)
@@ -0,0 +1,28 @@
+import datetime
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from app.bots.tail_trust.read_models import AppointmentRecord, ClientProfile, ReminderJobRecord, fetch, fetch_first
+
+
+class TestReadModels(TestCase):
+    def test_fetch(self):
+        queryset = MagicMock()
+        queryset.values_list.return_value = [(1, 5, datetime.date(2024, 3, 18), datetime.time(10, 0), 'Кошка')]
+
+        records = fetch(queryset, AppointmentRecord)
+
+        queryset.values_list.assert_called_once_with('id', 'client_id', 'date', 'time', 'pet_type')
+        self.assertEqual(records[0].pet_type, 'Кошка')
+        self.assertFalse(hasattr(records[0], '__dict__'))  # без словаря атрибутов на каждый экземпляр
+
+    def test_fetch_first(self):
+        queryset = MagicMock()
+        queryset.values_list.return_value.first.side_effect = [(5, 'Иван', 'Иванов', '12345678901'), None]
+
+        self.assertEqual(fetch_first(queryset, ClientProfile), ClientProfile(5, 'Иван', 'Иванов', '12345678901'))
+        self.assertIsNone(fetch_first(queryset, ClientProfile))
+
+    def test_reminder_job_appointment_id(self):
+        job = ReminderJobRecord(1, 1, 'worker', AppointmentRecord(7, 5, None, None, ''))
+        self.assertEqual(job.appointment_id, 7)
@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from aiogram.utils.exceptions import BotBlocked, NetworkError, RetryAfter
+
+from app.bots.tail_trust.reminders import ReminderScheduler, ReminderWorker
+
+
+class TestReminderScheduler(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.scheduler = ReminderScheduler(send_at=datetime.time(9, 0), chunk_size=2)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_next_run_at(self):
+        before = datetime.datetime(2024, 3, 16, 8, 30)
+        after = datetime.datetime(2024, 3, 16, 9, 0)
+        self.assertEqual(self.scheduler.next_run_at(before), datetime.datetime(2024, 3, 16, 9, 0))
+        self.assertEqual(self.scheduler.next_run_at(after), datetime.datetime(2024, 3, 17, 9, 0))
+
+    @patch('app.bots.tail_trust.reminders.ReminderJobRepository')
+    @patch('app.bots.tail_trust.reminders.AppointmentRepository')
+    def test_run_once_enqueues_in_chunks(self, appointments, jobs):
+        appointments.get_pending_reminder_ids = AsyncMock(side_effect=[[1, 2], [3], []])
+        jobs.enqueue = AsyncMock()
+
+        enqueued = self.loop.run_until_complete(self.scheduler.run_once())
+
+        self.assertEqual(enqueued, 3)
+        self.assertEqual(appointments.get_pending_reminder_ids.await_args_list[1].args[1], 2)  # keyset: после id=2
+        self.assertEqual([call.args[0] for call in jobs.enqueue.await_args_list], [[1, 2], [3]])
+
+
+class TestReminderWorker(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.send_reminder = AsyncMock()
+        self.worker = ReminderWorker(
+            send_reminder=self.send_reminder, batch_size=10, concurrency=2, visibility_timeout=60,
+            max_attempts=3, retry_backoff=10, poll_interval=1, worker_id='test')
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_retry_at(self):
+        job = SimpleNamespace(attempts=2)
+        self.assertIsNone(self.worker.retry_at(job, BotBlocked('Forbidden: bot was blocked by the user')))
+        self.assertIsNone(self.worker.retry_at(SimpleNamespace(attempts=3), NetworkError('timeout')))
+
+        with patch('app.bots.tail_trust.reminders.timezone') as timezone:
+            timezone.now.return_value = datetime.datetime(2024, 3, 16, 9, 0)
+            self.assertEqual(self.worker.retry_at(job, NetworkError('timeout')),
+                             datetime.datetime(2024, 3, 16, 9, 0, 20))
+            self.assertEqual(self.worker.retry_at(job, RetryAfter(5)), datetime.datetime(2024, 3, 16, 9, 0, 5))
+
+    @patch('app.bots.tail_trust.reminders.ReminderJobRepository')
+    def test_run_once_acks_and_releases(self, repository):
+        jobs = [SimpleNamespace(id=i, attempts=1, appointment=SimpleNamespace(id=i)) for i in range(1, 4)]
+        repository.claim = AsyncMock(return_value=jobs)
+        repository.complete = AsyncMock()
+        repository.release = AsyncMock()
+        self.send_reminder.side_effect = [None, NetworkError('timeout'), BotBlocked('Forbidden')]
+
+        processed = self.loop.run_until_complete(self.worker.run_once())
+
+        self.assertEqual(processed, 3)
+        repository.complete.assert_awaited_once_with([jobs[0]])
+        released = {call.args[0].id: call.args[2] for call in repository.release.await_args_list}
+        self.assertIsNotNone(released[2])
+        self.assertIsNone(released[3])
+        self.assertEqual((self.worker.stats.sent, self.worker.stats.retried, self.worker.stats.failed), (1, 1, 1))
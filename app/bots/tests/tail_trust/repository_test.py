@@ -0,0 +1,187 @@
+import asyncio
+import datetime
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+from app.bots import django_setup  # noqa: F401 (настройка Django)
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from app.bots.lib.db import DatabaseExecutor
+from app.bots.tail_trust.reminders import ReminderWorker
+from app.bots.tail_trust.repository import AppointmentRepository, ReminderJobRepository
+from app.models import Appointment, Client, ReminderJob
+
+
+# Тесты выполняются на временной БД в файле: захват заданий проверяется из нескольких потоков
+old_database_name = None
+
+
+def setUpModule():
+    global old_database_name
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite':
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'repository_test_{os.getpid()}.db')
+    old_database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+
+
+def tearDownModule():
+    connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+
+def in_thread(func, *args):
+    # соединение потока закрывается, чтобы временную БД можно было удалить
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+class RepositoryTestCase(TransactionTestCase):
+    """Тесты запросов репозитория к временной БД через отдельный пул потоков."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.db = DatabaseExecutor(max_workers=1)
+        patcher = patch('app.bots.tail_trust.repository.db', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.db.run(connections.close_all))
+        self.db.shutdown()
+        self.loop.close()
+
+
+class TestReminderJobRepository(RepositoryTestCase):
+    def setUp(self):
+        super().setUp()
+        client = Client.objects.create(telegram_chat_id=1, name='Иван', surname='Петров', phone='+79990001122')
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        appointments = Appointment.objects.bulk_create(
+            [Appointment(client=client, date=tomorrow, time=datetime.time(10 + i % 8), pet_type='Кошка',
+                         status=Appointment.STATUS_CONFIRMED) for i in range(20)])
+        self.loop.run_until_complete(ReminderJobRepository.enqueue(
+            [appointment.id for appointment in appointments], timezone.now() - datetime.timedelta(minutes=1)))
+
+    def test_concurrent_claims_are_exclusive(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            batches = list(executor.map(
+                lambda worker: in_thread(ReminderJobRepository._claim, worker, 8, 60), ('w1', 'w2', 'w3', 'w4')))
+
+        claimed = [job.id for batch in batches for job in batch]
+        self.assertEqual(len(claimed), 20)
+        self.assertEqual(len(set(claimed)), 20)
+        self.assertEqual(ReminderJob.objects.filter(attempts=1).count(), 20)
+
+    def test_expired_lease_is_reclaimed(self):
+        first = ReminderJobRepository._claim('w1', 100, 60)
+        self.assertEqual(len(first), 20)
+        self.assertEqual(ReminderJobRepository._claim('w2', 100, 60), [])  # задания скрыты таймаутом видимости
+
+        ReminderJob.objects.update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        second = ReminderJobRepository._claim('w2', 100, 60)
+
+        self.assertEqual(sorted(job.id for job in second), sorted(job.id for job in first))
+        self.assertEqual({job.attempts for job in second}, {2})
+        # первый обработчик больше не владеет заданиями и не может их завершить
+        ReminderJobRepository._complete(first)
+        self.assertEqual(ReminderJob.objects.filter(status=ReminderJob.STATUS_DONE).count(), 0)
+        ReminderJobRepository._complete(second)
+        self.assertEqual(ReminderJob.objects.filter(status=ReminderJob.STATUS_DONE).count(), 20)
+        self.assertFalse(Appointment.objects.filter(reminded_at__isnull=True).exists())
+
+    def test_max_attempts_marks_job_failed(self):
+        worker = ReminderWorker(
+            send_reminder=AsyncMock(side_effect=RuntimeError('timeout')), batch_size=100, concurrency=4,
+            visibility_timeout=60, max_attempts=2, retry_backoff=0, poll_interval=1, worker_id='test')
+
+        self.assertEqual(self.loop.run_until_complete(worker.run_once()), 20)
+        self.assertEqual(ReminderJob.objects.filter(status=ReminderJob.STATUS_PENDING, locked_by='').count(), 20)
+        self.assertEqual(self.loop.run_until_complete(worker.run_once()), 20)
+
+        self.assertEqual(ReminderJob.objects.filter(status=ReminderJob.STATUS_FAILED, attempts=2).count(), 20)
+        self.assertIn('timeout', ReminderJob.objects.first().last_error)
+        self.assertEqual((worker.stats.retried, worker.stats.failed), (20, 20))
+        self.assertEqual(self.loop.run_until_complete(worker.run_once()), 0)
+
+
+class TestAppointmentRepository(RepositoryTestCase):
+    DATE = datetime.date(2030, 3, 18)
+    TIME = datetime.time(10, 0)
+    HOLD = datetime.timedelta(minutes=15)
+
+    def setUp(self):
+        super().setUp()
+        Client.objects.bulk_create(
+            [Client(telegram_chat_id=i, name='Иван', surname='Петров', phone='+79990001122') for i in range(1, 11)])
+        self.drafts = [Appointment.objects.create(client_id=i).id for i in range(1, 11)]
+
+    def reserve(self, appointment_id: int, capacity: int, **fields) -> bool:
+        return self.loop.run_until_complete(AppointmentRepository.reserve_slot(
+            appointment_id, self.DATE, self.TIME, capacity, self.HOLD, **fields))
+
+    def test_concurrent_booking_respects_capacity(self):
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            reserved = list(executor.map(lambda appointment_id: in_thread(
+                AppointmentRepository._reserve_slot, appointment_id, self.DATE, self.TIME, 3, self.HOLD, {}),
+                self.drafts))
+
+        self.assertEqual(sum(reserved), 3)
+        # отклоненное бронирование откатывается: у записи не остается даты и времени
+        self.assertEqual(Appointment.objects.filter(date=self.DATE, time=self.TIME).count(), 3)
+        self.assertEqual(Appointment.objects.filter(date__isnull=True, time__isnull=True).count(), 7)
+
+    def test_rejected_booking_is_rolled_back(self):
+        self.assertTrue(self.reserve(self.drafts[0], capacity=1))
+        self.assertFalse(self.reserve(self.drafts[1], capacity=1, pet_type='Кошка'))
+
+        rejected = Appointment.objects.get(id=self.drafts[1])
+        self.assertEqual((rejected.date, rejected.time, rejected.pet_type), (None, None, ''))
+        with self.assertRaises(Appointment.DoesNotExist):
+            self.reserve(0, capacity=1)
+
+    def test_rebooking_same_appointment(self):
+        self.assertTrue(self.reserve(self.drafts[0], capacity=1))
+        # повторное бронирование (оформление) той же записи не считает ее саму занявшей слот
+        self.assertTrue(self.reserve(self.drafts[0], capacity=1, pet_type='Кошка',
+                                     status=Appointment.STATUS_CONFIRMED))
+
+        appointment = Appointment.objects.get(id=self.drafts[0])
+        self.assertEqual((appointment.status, appointment.pet_type), (Appointment.STATUS_CONFIRMED, 'Кошка'))
+        self.assertEqual(Appointment.objects.filter(date=self.DATE, time=self.TIME).count(), 1)
+
+    def test_expired_draft_releases_slot(self):
+        self.assertTrue(self.reserve(self.drafts[0], capacity=1))
+        Appointment.objects.filter(id=self.drafts[0]).update(created_at=timezone.now() - self.HOLD * 2)
+        occupancy = self.loop.run_until_complete(AppointmentRepository.get_occupancy(self.DATE, self.DATE, self.HOLD))
+        self.assertEqual(occupancy, [])
+
+        self.assertTrue(self.reserve(self.drafts[1], capacity=1, status=Appointment.STATUS_CONFIRMED))
+        # истекший черновик не может оформить запись на заполненный слот
+        self.assertFalse(self.reserve(self.drafts[0], capacity=1, status=Appointment.STATUS_CONFIRMED))
+        occupancy = self.loop.run_until_complete(AppointmentRepository.get_occupancy(self.DATE, self.DATE, self.HOLD))
+        self.assertEqual(occupancy, [(self.DATE, self.TIME, 1)])
+
+    def test_new_draft_releases_previous(self):
+        self.assertTrue(self.reserve(self.drafts[0], capacity=1))
+
+        draft = self.loop.run_until_complete(AppointmentRepository.create_draft(1))
+
+        self.assertEqual(list(Appointment.objects.filter(client_id=1).values_list('id', flat=True)), [draft.id])
+        self.assertTrue(self.reserve(self.drafts[1], capacity=1))
+
+    def test_drafts_are_excluded_from_history(self):
+        self.assertTrue(self.reserve(self.drafts[0], capacity=2, pet_type='Кошка', status=Appointment.STATUS_CONFIRMED))
+        draft = self.loop.run_until_complete(AppointmentRepository.create_draft(1))
+
+        history = self.loop.run_until_complete(AppointmentRepository.get_client_appointments(1))
+        self.assertEqual([appointment.id for appointment in history], [self.drafts[0]])
+        last = self.loop.run_until_complete(AppointmentRepository.get_last(1))
+        self.assertEqual(last.id, self.drafts[0])
+        self.assertEqual(self.loop.run_until_complete(AppointmentRepository.get_draft(1)).id, draft.id)
+        # у клиента без оформленных записей нет последней записи, даже если есть черновик
+        self.assertIsNone(self.loop.run_until_complete(AppointmentRepository.get_last(2)))
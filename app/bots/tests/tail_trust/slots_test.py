@@ -0,0 +1,67 @@
+import asyncio
+import datetime
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+from app.bots.tail_trust.slots import SlotInventory
+
+
+NOW = datetime.datetime(2024, 3, 15, 11, 30)  # пятница
+
+
+@patch('app.bots.tail_trust.slots.AppointmentRepository')
+class TestSlotInventory(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.clock = 0.0
+        self.slots = SlotInventory(
+            hours=('10:00', '11:00', '12:00'), week_days={0, 1, 2, 3, 4}, next_days=4, capacity=2, ttl=5, hold=600,
+            timer=lambda: self.clock)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_available_slots(self, repository):
+        monday = datetime.date(2024, 3, 18)
+        repository.get_occupancy = AsyncMock(return_value=[
+            (monday, datetime.time(10, 0), 2),
+            (monday, datetime.time(11, 0), 1),
+            (monday, datetime.time(12, 0), 5),
+        ])
+
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_dates(NOW)), [NOW.date(), monday])
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_times(NOW.date(), NOW)), ['12:00'])
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_times(monday, NOW)), ['11:00'])
+        repository.get_occupancy.assert_awaited_once()  # занятость загружается один раз на ttl
+
+        self.clock = 10
+        self.loop.run_until_complete(self.slots.available_times(monday, NOW))
+        self.assertEqual(repository.get_occupancy.await_count, 2)
+
+    def test_reserve_updates_occupancy(self, repository):
+        monday = datetime.date(2024, 3, 18)
+        repository.get_occupancy = AsyncMock(return_value=[(monday, datetime.time(11, 0), 1)])
+        repository.reserve_slot = AsyncMock(side_effect=[True, False])
+        self.loop.run_until_complete(self.slots.available_dates(NOW))
+        version = self.slots.version
+
+        self.assertTrue(self.loop.run_until_complete(self.slots.reserve(1, monday, '11:00')))
+        repository.reserve_slot.assert_awaited_once_with(1, monday, datetime.time(11, 0), 2, self.slots.hold)
+        self.assertFalse(self.loop.run_until_complete(self.slots.reserve(2, monday, '12:00')))
+
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_times(monday, NOW)), ['10:00'])
+        self.assertEqual(self.slots.version, version + 2)
+
+    def test_confirm_rechecks_capacity(self, repository):
+        monday = datetime.date(2024, 3, 18)
+        repository.get_occupancy = AsyncMock(return_value=[(monday, datetime.time(11, 0), 1)])
+        repository.reserve_slot = AsyncMock(side_effect=[True, False])
+        self.loop.run_until_complete(self.slots.available_dates(NOW))
+
+        self.assertTrue(self.loop.run_until_complete(self.slots.confirm(1, monday, '10:00', pet_type='Кошка')))
+        repository.reserve_slot.assert_awaited_once_with(
+            1, monday, datetime.time(10, 0), 2, self.slots.hold, pet_type='Кошка')
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_times(monday, NOW)),
+                         ['10:00', '11:00', '12:00'])  # бронирование уже учтено, подтверждение не занимает слот
+        self.assertFalse(self.loop.run_until_complete(self.slots.confirm(2, monday, '11:00', pet_type='Кошка')))
+        self.assertEqual(self.loop.run_until_complete(self.slots.available_times(monday, NOW)), ['10:00', '12:00'])
@@ -2,6 +2,7 @@ from unittest import TestCase
 from unittest.mock import Mock, patch
 
 from aiogram import types
+from app.bots.tail_trust.client_cache import client_cache
 from app.bots.tail_trust.tail_trust import BotBase, TextInterfaceBot
 import asyncio
 
@@ -21,3 +22,31 @@ class TestBotBase(TestCase):
         message.answer.assert_called_once_with(TextInterfaceBot.WELLCOME_MSG)
 
         # TODO Добавить юнит-тесты на все команды + добавть интеграциональные тестны на бизнес логику
+
+    def test_client_cache_metrics(self, mock_bot):
+        mock_bot.return_value.loop = asyncio.new_event_loop()
+        bot = BotBase(api_token='')
+        client_cache.clear()
+        client_cache.set(1, None)
+        client_cache.get(1)
+        client_cache.get(2)
+
+        lines = bot.metrics.render().splitlines()
+
+        self.assertIn('bot_client_cache_hits_total 1', lines)
+        self.assertIn('bot_client_cache_misses_total 1', lines)
+        self.assertIn('bot_client_cache_hit_ratio 0.5', lines)
+        self.assertIn('bot_client_cache_size 1', lines)
+        client_cache.clear()
+        mock_bot.return_value.loop.close()
+
+    def test_is_safe_text(self, mock_bot):
+        mock_bot.return_value.loop = asyncio.new_event_loop()
+        bot = BotBase(api_token='')
+
+        self.assertTrue(bot._is_safe_text('/start'))
+        self.assertTrue(bot._is_safe_text('/help@tail_trust_bot'))
+        self.assertFalse(bot._is_safe_text('/start +79991234567 Иван'))
+        self.assertFalse(bot._is_safe_text('/unknown'))
+        self.assertFalse(bot._is_safe_text('Иван'))
+        mock_bot.return_value.loop.close()
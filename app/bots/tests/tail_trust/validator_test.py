@@ -37,3 +37,25 @@ class TestValidator(TestCase):
         for phone, expected_result in test_cases:
             with self.subTest(phone=phone):
                 self.assertEqual(Validator.validate_phone(phone), expected_result)
+
+    def test_validate_date(self):
+        test_cases = [
+            ("2024-05-01", True),  # Корректная дата
+            ("2024-05-01 Иван Петров +79991234567", False),  # Дата в начале произвольного текста
+            ("2024-05-01\n", False),  # Дата с переводом строки
+            ("01.05.2024", False)  # Некорректный формат даты
+        ]
+        for date, expected_result in test_cases:
+            with self.subTest(date=date):
+                self.assertEqual(Validator.validate_date(date), expected_result)
+
+    def test_validate_time(self):
+        test_cases = [
+            ("10:00", True),  # Корректное время
+            ("10:00 Иван", False),  # Время в начале произвольного текста
+            ("10:00\n", False),  # Время с переводом строки
+            ("10-00", False)  # Некорректный формат времени
+        ]
+        for time, expected_result in test_cases:
+            with self.subTest(time=time):
+                self.assertEqual(Validator.validate_time(time), expected_result)
@@ -0,0 +1,249 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import sys
+from itertools import islice
+from time import perf_counter
+from typing import IO, Callable, Iterable, Iterator, Optional
+
+from django.db.models import Model, QuerySet
+from django.utils import timezone
+
+from app.bots.tail_trust.validator import Validator
+from app.models import Appointment, Client
+from main.settings import DATE_FORMAT, TIME_FORMAT
+
+
+FORMATS = ('csv', 'jsonl')
+
+CLIENT_FIELDS = ('telegram_chat_id', 'name', 'surname', 'phone')
+APPOINTMENT_FIELDS = ('client_id', 'date', 'time', 'pet_type', 'status', 'created_at')
+
+
+def detect_format(path: str, file_format: Optional[str]) -> str:
+    """Определение формата файла по явному значению или расширению (в том числе .csv.gz, .jsonl.gz).
+
+    Args:
+        path: путь к файлу, '-' - стандартный ввод или вывод.
+        file_format: явно заданный формат или None.
+
+    Returns:
+        Формат из FORMATS.
+
+    Raises:
+        ValueError: формат не удалось определить.
+    """
+    if file_format:
+        return file_format
+    name = path[:-3] if path.endswith('.gz') else path
+    for candidate in FORMATS:
+        if name.endswith(f'.{candidate}'):
+            return candidate
+    raise ValueError(f'Cannot detect file format of {path}, use --format')
+
+
+def open_file(path: str, mode: str) -> IO:
+    """Открытие текстового файла, сжатого gzip по расширению .gz; '-' - стандартный ввод или вывод.
+
+    Args:
+        path: путь к файлу.
+        mode: 'r' или 'w'.
+
+    Returns:
+        Текстовый поток.
+    """
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return io.TextIOWrapper(stream.buffer, encoding='utf-8', newline='')
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_rows(file: IO, file_format: str) -> Iterator[dict]:
+    """Потоковое чтение строк файла.
+
+    Args:
+        file: текстовый поток.
+        file_format: формат файла.
+
+    Returns:
+        Итератор словарей с полями строк.
+    """
+    if file_format == 'csv':
+        return csv.DictReader(file)
+    return (json.loads(line) for line in file if line.strip())
+
+
+def write_rows(file: IO, file_format: str, fields: tuple, rows: Iterable[tuple], progress: 'Progress') -> None:
+    """Потоковая запись строк в файл.
+
+    Args:
+        file: текстовый поток.
+        file_format: формат файла.
+        fields: имена полей.
+        rows: кортежи значений полей.
+        progress: индикатор прогресса.
+    """
+    if file_format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(row)
+            progress.update()
+    else:
+        for row in rows:
+            file.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n')
+            progress.update()
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Разбиение итератора на списки заданного размера без чтения всего итератора в память."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Progress(object):
+    """Вывод прогресса обработки строк в поток ошибок, не чаще раза в заданный период."""
+
+    def __init__(self, stream: IO, label: str, period: float = 5.0) -> None:
+        """Инициализация индикатора.
+
+        Args:
+            stream: поток вывода.
+            label: название операции.
+            period: минимальный период вывода в секундах.
+        """
+        self.stream = stream
+        self.label = label
+        self.period = period
+        self.rows = 0
+        self.started = perf_counter()
+        self._reported_at = self.started
+
+    @property
+    def rate(self) -> float:
+        """Строк в секунду."""
+        elapsed = perf_counter() - self.started
+        return self.rows / elapsed if elapsed else 0.0
+
+    def update(self, rows: int = 1) -> None:
+        self.rows += rows
+        if perf_counter() - self._reported_at >= self.period:
+            self._reported_at = perf_counter()
+            self.stream.write(f'{self.label}: {self.rows} rows, {self.rate:.0f} rows/s\n')
+
+    def summary(self) -> str:
+        return f'{self.label}: {self.rows} rows in {perf_counter() - self.started:.1f}s ({self.rate:.0f} rows/s)'
+
+
+def _format_value(value) -> object:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, datetime.time):
+        return value.strftime(TIME_FORMAT)
+    return '' if value is None else value
+
+
+def format_row(row: tuple) -> tuple:
+    """Подготовка значений полей для записи в файл в форматах, которые принимает импорт."""
+    return tuple(_format_value(value) for value in row)
+
+
+def export_queryset(queryset: QuerySet, fields: tuple, chunk_size: int) -> Iterator[tuple]:
+    """Потоковая выборка значений полей. На PostgreSQL используется серверный курсор, поэтому память
+    не зависит от размера таблицы.
+
+    Args:
+        queryset: выборка.
+        fields: имена полей.
+        chunk_size: количество строк, читаемых из курсора за раз.
+
+    Returns:
+        Итератор кортежей значений, подготовленных для записи в файл.
+    """
+    for row in queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size):
+        yield format_row(row)
+
+
+def parse_client(row: dict) -> Client:
+    """Преобразование строки файла в клиента с проверками Validator.
+
+    Args:
+        row: поля строки.
+
+    Returns:
+        Несохраненный клиент.
+
+    Raises:
+        ValueError: строка содержит некорректные данные.
+    """
+    try:
+        telegram_chat_id = int(row['telegram_chat_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('incorrect telegram_chat_id')
+    name, surname, phone = (str(row.get(field) or '') for field in ('name', 'surname', 'phone'))
+    if not Validator.validate_name(name):
+        raise ValueError('incorrect name')
+    if not Validator.validate_surname(surname):
+        raise ValueError('incorrect surname')
+    if not Validator.validate_phone(phone):
+        raise ValueError('incorrect phone')
+    return Client(telegram_chat_id=telegram_chat_id, name=name, surname=surname, phone=phone)
+
+
+def parse_appointment(row: dict) -> Appointment:
+    """Преобразование строки файла в запись на прием с проверками Validator.
+    Импортируются только оформленные записи: дата, время и питомец обязательны.
+
+    Args:
+        row: поля строки.
+
+    Returns:
+        Несохраненная запись на прием.
+
+    Raises:
+        ValueError: строка содержит некорректные данные.
+    """
+    try:
+        client_id = int(row['client_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('incorrect client_id')
+    date, time, pet_type = (str(row.get(field) or '') for field in ('date', 'time', 'pet_type'))
+    if not Validator.validate_date(date):
+        raise ValueError('incorrect date')
+    if not Validator.validate_time(time):
+        raise ValueError('incorrect time')
+    if not pet_type:
+        raise ValueError('empty pet_type')
+    status = row.get('status') or Appointment.STATUS_CONFIRMED
+    if status != Appointment.STATUS_CONFIRMED:
+        raise ValueError(f'status {status} is not importable')
+
+    # форматы уже проверены Validator, fromisoformat на порядок быстрее strptime
+    appointment = Appointment(
+        client_id=client_id,
+        date=datetime.date.fromisoformat(date),
+        time=datetime.time.fromisoformat(time),
+        pet_type=pet_type,
+        status=status,
+    )
+    if row.get('created_at'):
+        created_at = datetime.datetime.fromisoformat(row['created_at'])
+        appointment.created_at = created_at if timezone.is_aware(created_at) else timezone.make_aware(created_at)
+    return appointment
+
+
+# модель -> (класс, экспортируемые поля, разбор строки импорта)
+MODELS: dict[str, tuple[type[Model], tuple, Callable[[dict], Model]]] = {
+    'clients': (Client, CLIENT_FIELDS, parse_client),
+    'appointments': (Appointment, APPOINTMENT_FIELDS, parse_appointment),
+}
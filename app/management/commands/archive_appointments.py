@@ -0,0 +1,27 @@
+import asyncio
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from app.bots.tail_trust.archive import AppointmentArchiver
+from main.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Перенос прошедших записей на прием в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-days', type=int, default=ARCHIVE_AFTER_DAYS,
+                            help='количество дней после даты приема, после которого запись переносится')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help='количество записей, переносимых одной транзакцией')
+
+    def handle(self, *args, **options):
+        archiver = AppointmentArchiver(
+            max_age=datetime.timedelta(days=options['after_days']),
+            batch_size=options['batch_size'],
+            interval=0,
+        )
+        stats = asyncio.run(archiver.run_once())
+        self.stdout.write(f'Archived appointments: {stats.archived}, duration: {stats.duration:.2f}s, '
+                          f'throughput: {stats.throughput:.1f} rows/s')
@@ -0,0 +1,72 @@
+import asyncio
+
+from aiogram import Bot
+from django.core.management.base import BaseCommand, CommandError
+
+from app.bots.lib.sender import OutboundSender
+from app.bots.tail_trust.broadcasts import BroadcastRunner, BroadcastStats
+from app.models import Broadcast
+from main.settings import (BOT_TOKEN, BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, BROADCAST_LEASE, SEND_CHAT_BURST,
+                           SEND_CHAT_RATE, SEND_GLOBAL_RATE, SEND_MAX_RETRIES)
+
+
+class Command(BaseCommand):
+    help = ('Рассылка объявления всем зарегистрированным клиентам. По умолчанию рассылка ставится в очередь '
+            'и выполняется работающим ботом; с --run выполняется этой командой')
+
+    def add_arguments(self, parser):
+        parser.add_argument('text', nargs='?', help='текст объявления')
+        parser.add_argument('--resume', type=int, metavar='ID',
+                            help='продолжение прерванной рассылки этой командой с контрольной точки')
+        parser.add_argument('--run', action='store_true',
+                            help='выполнение рассылки этой командой (бот с тем же токеном не должен рассылать '
+                                 'одновременно: лимиты Telegram считаются в каждом процессе отдельно)')
+        parser.add_argument('--concurrency', type=int, default=BROADCAST_CONCURRENCY,
+                            help='максимальное количество одновременных отправок')
+        parser.add_argument('--chunk-size', type=int, default=BROADCAST_CHUNK_SIZE,
+                            help='количество получателей между контрольными точками')
+
+    def handle(self, *args, **options):
+        if (options['text'] is None) == (options['resume'] is None):
+            raise CommandError('Укажите текст объявления или --resume ID')
+
+        if options['resume'] is not None:
+            broadcast_id = options['resume']
+        else:
+            text = options['text'].strip()
+            if not text or len(text) > Broadcast._meta.get_field('text').max_length:
+                raise CommandError('Текст объявления пуст или длиннее 4096 символов')
+            broadcast_id = Broadcast.objects.create(text=text).id
+            self.stdout.write(f'Broadcast {broadcast_id} created')
+            if not options['run']:
+                return
+
+        if not BOT_TOKEN:
+            raise CommandError('BOT_TOKEN не задан')
+        stats = asyncio.run(self.run(broadcast_id, options['concurrency'], options['chunk_size']))
+        if stats is None:
+            raise CommandError(f'Рассылка {broadcast_id} не найдена, завершена или выполняется другим процессом')
+        self.stdout.write(f'Broadcast {broadcast_id} sent: {stats.sent}, failed: {stats.failed}, '
+                          f'duration: {stats.duration:.2f}s, throughput: {stats.throughput:.1f} msg/s')
+
+    @staticmethod
+    async def run(broadcast_id: int, concurrency: int, chunk_size: int) -> BroadcastStats:
+        bot = Bot(token=BOT_TOKEN)
+        sender = OutboundSender(
+            bot,
+            global_rate=SEND_GLOBAL_RATE,
+            chat_rate=SEND_CHAT_RATE,
+            chat_burst=SEND_CHAT_BURST,
+            max_retries=SEND_MAX_RETRIES,
+        )
+        runner = BroadcastRunner(
+            send_message=sender.send_message,
+            concurrency=concurrency,
+            chunk_size=chunk_size,
+            lease=BROADCAST_LEASE,
+            poll_interval=0,
+        )
+        try:
+            return await runner.run_once(broadcast_id)
+        finally:
+            await bot.close()
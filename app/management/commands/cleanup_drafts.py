@@ -0,0 +1,26 @@
+import asyncio
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from app.bots.tail_trust.drafts import DraftCleaner
+from main.settings import DRAFT_CLEANUP_BATCH_SIZE, DRAFT_MAX_AGE
+
+
+class Command(BaseCommand):
+    help = 'Удаление брошенных черновиков записей на прием'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=DRAFT_MAX_AGE,
+                            help='возраст черновика в секундах, после которого он удаляется')
+        parser.add_argument('--batch-size', type=int, default=DRAFT_CLEANUP_BATCH_SIZE,
+                            help='количество черновиков, удаляемых одним запросом')
+
+    def handle(self, *args, **options):
+        cleaner = DraftCleaner(
+            max_age=datetime.timedelta(seconds=options['max_age']),
+            batch_size=options['batch_size'],
+            interval=0,
+        )
+        stats = asyncio.run(cleaner.run_once())
+        self.stdout.write(f'Deleted draft appointments: {stats.deleted}, duration: {stats.duration:.2f}s')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.management.bulk import FORMATS, MODELS, Progress, detect_format, export_queryset, open_file, write_rows
+from app.models import Appointment
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка клиентов или записей на прием в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MODELS), help='выгружаемые данные')
+        parser.add_argument('path', help='файл (.csv, .jsonl, в том числе .gz), "-" - стандартный вывод')
+        parser.add_argument('--format', choices=FORMATS, help='формат файла, по умолчанию по расширению')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='количество строк, читаемых из курсора БД за раз')
+
+    def handle(self, *args, **options):
+        try:
+            file_format = detect_format(options['path'], options['format'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        model, fields, _ = MODELS[options['model']]
+        queryset = model.objects.all()
+        if model is Appointment:
+            queryset = queryset.filter(status=model.STATUS_CONFIRMED)  # черновики не выгружаются
+
+        progress = Progress(self.stderr, f'Export {options["model"]}')
+        with open_file(options['path'], 'w') as file:
+            write_rows(file, file_format, fields, export_queryset(queryset, fields, options['chunk_size']), progress)
+        self.stderr.write(progress.summary())
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.management.bulk import FORMATS, MODELS, Progress, batched, detect_format, open_file, read_rows
+from app.models import Appointment, Client
+
+
+class Command(BaseCommand):
+    help = ('Потоковая загрузка клиентов или записей на прием из CSV или JSONL. Клиенты загружаются с обновлением '
+            'существующих по telegram_chat_id, записи на прием добавляются.')
+
+    # количество выводимых ошибок в строках, остальные только подсчитываются
+    MAX_REPORTED_ERRORS = 20
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MODELS), help='загружаемые данные')
+        parser.add_argument('path', help='файл (.csv, .jsonl, в том числе .gz), "-" - стандартный ввод')
+        parser.add_argument('--format', choices=FORMATS, help='формат файла, по умолчанию по расширению')
+        parser.add_argument('--batch-size', type=int, default=2000, help='количество строк в одном запросе INSERT')
+
+    def handle(self, *args, **options):
+        try:
+            file_format = detect_format(options['path'], options['format'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        model, _, parse_row = MODELS[options['model']]
+        progress = Progress(self.stderr, f'Import {options["model"]}')
+        self.errors = 0
+        with open_file(options['path'], 'r') as file:
+            # номер строки файла считается с заголовком CSV
+            rows = enumerate(read_rows(file, file_format), start=2 if file_format == 'csv' else 1)
+            for batch in batched(rows, options['batch_size']):
+                objects = self._parse(batch, parse_row)
+                if model is Client:
+                    self._upsert_clients(objects, options['batch_size'])
+                else:
+                    self._insert_appointments(objects, options['batch_size'])
+                progress.update(len(batch))
+
+        self.stderr.write(f'{progress.summary()}, rejected: {self.errors}')
+
+    def _reject(self, line: int, error: str) -> None:
+        self.errors += 1
+        if self.errors <= self.MAX_REPORTED_ERRORS:
+            self.stderr.write(f'line {line}: {error}')
+
+    def _parse(self, batch: list, parse_row) -> list:
+        # пары (номер строки, объект) для строк, прошедших проверку
+        objects = []
+        for line, row in batch:
+            try:
+                objects.append((line, parse_row(row)))
+            except ValueError as e:
+                self._reject(line, str(e))
+        return objects
+
+    @staticmethod
+    def _upsert_clients(clients: list, batch_size: int) -> None:
+        with transaction.atomic():
+            Client.objects.bulk_create(
+                [client for _, client in clients], batch_size=batch_size, update_conflicts=True,
+                unique_fields=['telegram_chat_id'], update_fields=['name', 'surname', 'phone'],
+            )
+
+    def _insert_appointments(self, appointments: list, batch_size: int) -> None:
+        # клиенты пачки проверяются одним запросом, иначе вставка пачки упадет на внешнем ключе
+        client_ids = {appointment.client_id for _, appointment in appointments}
+        existing = set(Client.objects.filter(telegram_chat_id__in=client_ids)
+                       .values_list('telegram_chat_id', flat=True))
+        valid = []
+        for line, appointment in appointments:
+            if appointment.client_id in existing:
+                valid.append(appointment)
+            else:
+                self._reject(line, f'unknown client {appointment.client_id}')
+
+        with transaction.atomic():
+            Appointment.objects.bulk_create(valid, batch_size=batch_size)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_appointment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='reminded_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
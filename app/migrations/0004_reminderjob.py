@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 08:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_appointment_reminded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('run_at', models.DateTimeField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('locked_by', models.CharField(blank=True, db_index=True, default='', max_length=64)),
+                ('locked_until', models.DateTimeField(default=None, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_job', to='app.appointment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_at'], name='app_reminderjob_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_reminderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['created_at'], name='app_appointment_created_idx'),
+        ),
+    ]
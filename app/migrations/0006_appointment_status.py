@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def confirm_completed_appointments(apps, schema_editor):
+    # записи, прошедшие все шаги диалога, становятся оформленными, остальные остаются черновиками
+    Appointment = apps.get_model('app', 'Appointment')
+    (Appointment.objects
+     .filter(date__isnull=False, time__isnull=False)
+     .exclude(pet_type='')
+     .update(status='confirmed'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_appointment_created_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='app_appointment_created_idx',
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('confirmed', 'Confirmed')], default='draft', max_length=16),
+        ),
+        migrations.RunPython(confirm_completed_appointments, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['date', 'time'], name='app_appt_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['client', 'id'], name='app_appt_client_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'draft')), fields=['created_at'], name='app_appt_draft_created_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def partition_archive(apps, schema_editor):
+    # На PostgreSQL архив пересоздается секционированным по дате приема (пустая таблица только что создана).
+    # Первичный ключ секционированной таблицы должен включать ключ секционирования.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    model = apps.get_model('app', 'ArchivedAppointment')
+    schema_editor.delete_model(model)
+    sql, params = schema_editor.table_sql(model)
+    sql = sql.replace(' PRIMARY KEY', '', 1)
+    schema_editor.execute(f'{sql[:-1]}, PRIMARY KEY ("id", "date")) PARTITION BY RANGE ("date")', params or None)
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_broadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField(default=None, null=True)),
+                ('pet_type', models.CharField(max_length=255)),
+                ('reminded_at', models.DateTimeField(default=None, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('client', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, to='app.client', to_field='telegram_chat_id')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', 'id'], name='app_archappt_client_id_idx')],
+            },
+        ),
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
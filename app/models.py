@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class Client(models.Model):
@@ -9,7 +10,122 @@ class Client(models.Model):
 
 
 class Appointment(models.Model):
+    STATUS_DRAFT = 'draft'  # запись в процессе оформления
+    STATUS_CONFIRMED = 'confirmed'  # оформленная запись
+    STATUS_CHOICES = (
+        (STATUS_DRAFT, 'Draft'),
+        (STATUS_CONFIRMED, 'Confirmed'),
+    )
+
     client = models.ForeignKey(Client, on_delete=models.CASCADE, to_field='telegram_chat_id')
     date = models.DateField(default=None, null=True)
     time = models.TimeField(default=None, null=True)
     pet_type = models.CharField(max_length=255)
+    reminded_at = models.DateTimeField(default=None, null=True)  # время отправки напоминания о приеме
+    created_at = models.DateTimeField(default=timezone.now)  # время создания черновика записи
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_DRAFT)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client', 'id'], name='app_appointment_client_id_idx'),
+            # занятость слотов: учитываются и черновики, уже забронировавшие время
+            models.Index(fields=['date', 'time'], name='app_appointment_date_time_idx'),
+            # частичные индексы: запросы напоминаний и списков записей не просматривают черновики
+            models.Index(fields=['date', 'time'], name='app_appt_confirmed_idx',
+                         condition=models.Q(status='confirmed')),
+            models.Index(fields=['client', 'id'], name='app_appt_client_confirmed_idx',
+                         condition=models.Q(status='confirmed')),
+            models.Index(fields=['created_at'], name='app_appt_draft_created_idx', condition=models.Q(status='draft')),
+        ]
+
+
+class ArchivedAppointment(models.Model):
+    """Прошедшая запись на прием, перенесенная из Appointment, чтобы рабочая таблица оставалась небольшой.
+    На PostgreSQL таблица секционирована по годам даты приема (секции создаются при переносе), поэтому первичный
+    ключ в БД - (id, date); id совпадает с id исходной записи.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    # без ограничения внешнего ключа в БД (секционированная таблица), удаление вместе с клиентом выполняет Django
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, to_field='telegram_chat_id', db_constraint=False,
+                               db_index=False)
+    date = models.DateField()
+    time = models.TimeField(default=None, null=True)
+    pet_type = models.CharField(max_length=255)
+    reminded_at = models.DateTimeField(default=None, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client', 'id'], name='app_archappt_client_id_idx'),
+        ]
+
+
+class ReminderJob(models.Model):
+    """Задание на отправку напоминания о приеме. Очередь разделяется между репликами бота."""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    appointment = models.OneToOneField(Appointment, on_delete=models.CASCADE, related_name='reminder_job')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    run_at = models.DateTimeField()  # время, не раньше которого задание может быть взято в работу
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=64, blank=True, default='', db_index=True)  # токен захвата задания
+    locked_until = models.DateTimeField(default=None, null=True)  # окончание таймаута видимости
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='app_reminderjob_due_idx'),
+        ]
+
+
+class Broadcast(models.Model):
+    """Рассылка объявления всем зарегистрированным клиентам (закрытие на праздники, вакцинация и т.п.)."""
+    STATUS_PENDING = 'pending'  # ожидает запуска
+    STATUS_RUNNING = 'running'  # выполняется или прервана и будет продолжена с контрольной точки
+    STATUS_DONE = 'done'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    )
+
+    text = models.TextField(max_length=4096)  # максимальная длина сообщения Telegram
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(default=None, null=True)
+    finished_at = models.DateTimeField(default=None, null=True)
+    last_chat_id = models.IntegerField(default=None, null=True)  # контрольная точка: последний обработанный чат
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    locked_by = models.CharField(max_length=64, blank=True, default='')  # токен захвата рассылки
+    locked_until = models.DateTimeField(default=None, null=True)  # окончание аренды, продлевается контрольными точками
+
+
+class BroadcastDelivery(models.Model):
+    """Результат доставки рассылки одному клиенту."""
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='deliveries')
+    telegram_chat_id = models.IntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'telegram_chat_id'], name='app_broadcastdelivery_uniq'),
+        ]
@@ -6,9 +6,99 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-8y9$^29&9k_4_16*u%$z@!@tpg%@mby*fa**jkw6evt2wva353'
 BOT_TOKEN = os.environ.get('BOT_TOKEN')
+# Токены ботов, работающих в одном процессе, через запятую; по умолчанию только BOT_TOKEN
+BOT_TOKENS = [token.strip() for token in os.environ.get('BOT_TOKENS', BOT_TOKEN or '').split(',') if token.strip()]
 DATE_FORMAT = '%Y-%m-%d'
 TIME_FORMAT = '%H:%M'
 
+# Режим получения обновлений ботом: polling или webhook
+BOT_MODE = os.environ.get('BOT_MODE', 'polling')
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL', '')  # внешний адрес, например https://example.com
+WEBHOOK_PATH = os.environ.get('WEBHOOK_PATH', '/webhook')
+WEBAPP_HOST = os.environ.get('WEBAPP_HOST', '0.0.0.0')
+WEBAPP_PORT = int(os.environ.get('WEBAPP_PORT', 8080))
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', 16))
+WEBHOOK_MAX_BODY_SIZE = int(os.environ.get('WEBHOOK_MAX_BODY_SIZE', 1024 * 1024))  # байты
+WEBHOOK_QUEUE_SIZE = int(os.environ.get('WEBHOOK_QUEUE_SIZE', 1000))
+
+# Процессы-обработчики: обновления распределяются между ними по идентификатору чата, 1 - обработка в одном процессе
+BOT_WORKERS = int(os.environ.get('BOT_WORKERS', 1))
+WORKER_QUEUE_SIZE = int(os.environ.get('WORKER_QUEUE_SIZE', 1000))
+WORKER_RESTART_DELAY = float(os.environ.get('WORKER_RESTART_DELAY', 1))  # секунды
+WORKER_MAX_RESTART_DELAY = float(os.environ.get('WORKER_MAX_RESTART_DELAY', 30))  # секунды
+WORKER_SHUTDOWN_TIMEOUT = float(os.environ.get('WORKER_SHUTDOWN_TIMEOUT', 30))  # секунды
+
+# Максимальное количество одновременно обрабатываемых обновлений (обновления одного чата обрабатываются по очереди)
+UPDATE_CONCURRENCY = int(os.environ.get('UPDATE_CONCURRENCY', 100))
+
+# Запись входящих обновлений (без персональных данных) в сжатый JSONL для воспроизведения, пустое значение - выключено
+UPDATE_RECORD_PATH = os.environ.get('UPDATE_RECORD_PATH', '')
+
+# HTTP-сервер метрик бота в формате Prometheus, порт 0 - выключен
+METRICS_HOST = os.environ.get('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+
+# Сторож цикла событий: период проверки и длительность блокировки (секунды), после которой в лог пишется стек,
+# порог 0 - выключен
+LOOP_WATCHDOG_INTERVAL = float(os.environ.get('LOOP_WATCHDOG_INTERVAL', 0.1))
+LOOP_WATCHDOG_THRESHOLD = float(os.environ.get('LOOP_WATCHDOG_THRESHOLD', 0.5))
+
+# Выборочное профилирование обработки обновлений в файлы folded stacks, пустой каталог - выключено
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.01))  # доля профилируемых обновлений
+PROFILE_SLOW_THRESHOLD = float(os.environ.get('PROFILE_SLOW_THRESHOLD', 0))  # секунды, 0 - выключено
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))  # период снятия стеков, секунды
+PROFILE_FLUSH_INTERVAL = float(os.environ.get('PROFILE_FLUSH_INTERVAL', 60))  # секунды
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 20))
+
+# Кэш профилей клиентов в процессе бота
+CLIENT_CACHE_SIZE = int(os.environ.get('CLIENT_CACHE_SIZE', 10000))
+CLIENT_CACHE_TTL = float(os.environ.get('CLIENT_CACHE_TTL', 300))  # секунды
+
+# Хранилище состояний диалогов бота: memory или sqlite
+FSM_STORAGE = os.environ.get('FSM_STORAGE', 'memory')
+FSM_STORAGE_PATH = os.environ.get('FSM_STORAGE_PATH', BASE_DIR / 'fsm_storage.db')
+
+# Лимиты исходящих сообщений (сообщений в секунду): общий для бота и на один чат, допустимый всплеск на чат
+SEND_GLOBAL_RATE = float(os.environ.get('SEND_GLOBAL_RATE', 30))
+SEND_CHAT_RATE = float(os.environ.get('SEND_CHAT_RATE', 1))
+SEND_CHAT_BURST = float(os.environ.get('SEND_CHAT_BURST', 3))
+SEND_MAX_RETRIES = int(os.environ.get('SEND_MAX_RETRIES', 5))
+
+# Напоминания о приеме: время рассылки (TIME_ZONE), размер пачки чтения из БД и число одновременных отправок
+REMINDER_TIME = os.environ.get('REMINDER_TIME', '09:00')
+REMINDER_CHUNK_SIZE = int(os.environ.get('REMINDER_CHUNK_SIZE', 500))
+REMINDER_CONCURRENCY = int(os.environ.get('REMINDER_CONCURRENCY', 20))
+# Очередь заданий на напоминания: размер захватываемой пачки, таймаут видимости, повторы и период опроса (секунды)
+REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 100))
+REMINDER_VISIBILITY_TIMEOUT = int(os.environ.get('REMINDER_VISIBILITY_TIMEOUT', 300))
+REMINDER_MAX_ATTEMPTS = int(os.environ.get('REMINDER_MAX_ATTEMPTS', 5))
+REMINDER_RETRY_BACKOFF = int(os.environ.get('REMINDER_RETRY_BACKOFF', 30))
+REMINDER_POLL_INTERVAL = float(os.environ.get('REMINDER_POLL_INTERVAL', 5))
+
+# Рассылки объявлений клиентам: число одновременных отправок, размер пачки получателей между контрольными точками,
+# аренда рассылки одной репликой и период проверки новых рассылок (секунды)
+BROADCAST_CONCURRENCY = int(os.environ.get('BROADCAST_CONCURRENCY', 50))
+BROADCAST_CHUNK_SIZE = int(os.environ.get('BROADCAST_CHUNK_SIZE', 500))
+BROADCAST_LEASE = int(os.environ.get('BROADCAST_LEASE', 300))
+BROADCAST_POLL_INTERVAL = float(os.environ.get('BROADCAST_POLL_INTERVAL', 10))
+
+# Очистка брошенных черновиков записей на прием
+DRAFT_MAX_AGE = int(os.environ.get('DRAFT_MAX_AGE', 24 * 60 * 60))  # секунды
+DRAFT_CLEANUP_BATCH_SIZE = int(os.environ.get('DRAFT_CLEANUP_BATCH_SIZE', 500))
+DRAFT_CLEANUP_INTERVAL = int(os.environ.get('DRAFT_CLEANUP_INTERVAL', 60 * 60))  # секунды
+
+# Перенос прошедших записей на прием в архив
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))  # дни после даты приема
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))
+ARCHIVE_INTERVAL = int(os.environ.get('ARCHIVE_INTERVAL', 6 * 60 * 60))  # секунды
+
+# Слоты записи на прием: максимальное количество записей на один слот, время актуальности загруженной занятости
+# и время, в течение которого неоформленный черновик удерживает выбранный слот
+APPOINTMENT_SLOT_CAPACITY = int(os.environ.get('APPOINTMENT_SLOT_CAPACITY', 1))
+SLOT_CACHE_TTL = float(os.environ.get('SLOT_CACHE_TTL', 5))  # секунды
+SLOT_HOLD_TTL = int(os.environ.get('SLOT_HOLD_TTL', 15 * 60))  # секунды
+
 DB_PATH = os.path.join(os.getcwd(), os.pardir, 'database.db')
 
 DEBUG = True
@@ -55,6 +145,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'main.wsgi.application'
 
+# Время жизни соединения с БД в секундах (0 - новое соединение на каждый запрос, None - без ограничения)
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE.strip() in ('', 'None') else int(DB_CONN_MAX_AGE)
+# Количество потоков (и соединений с БД), в которых бот выполняет запросы к БД
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
 
 if os.environ.get('PROD'):
     DATABASES = {
@@ -65,6 +160,8 @@ if os.environ.get('PROD'):
             'PASSWORD': 'root',
             'HOST': 'db',
             'PORT': '5432',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 else:
@@ -72,6 +169,8 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'database.db',  # sqlite3
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 